@@ -0,0 +1,129 @@
+"""
+Cost of the names and topology files (netConfig.py): building an emulated
+network that parses them once, and applying a topology change to a running
+one without restarting it.
+
+    build_ms    --> Emulator construction, the files parsed once for all routers
+    parse_ms    --> what parsing both files once per router costs, as every router did
+    detect_ms   --> from the topology file written until the routers saw the change
+    routes_ms   --> until the routes used it: the new link (add) or avoided it (remove)
+
+A link is added between two nodes that were far apart and then removed again.
+
+Usage:
+    python benchmarks/bench_config.py [--topology grid] [--nodes 100] [--algorithms ls dv] [--poll 0.1]
+"""
+
+import os
+import sys
+import json
+import asyncio
+import argparse
+import tempfile
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import netConfig
+from emulator import Emulator
+from topologies import GENERATORS, node_jid, node_name, write_config
+
+
+def next_hop(node, algorithm, dest):
+    """ Next hop of node towards dest (a node index), None without a route. """
+    if algorithm == 'ls':
+        route = node.router.forwarding_table.get(node_jid(dest))
+        return route[0] if route else None
+    route = node.router.vector.get(node_name(dest))
+    return route[1] if route else None
+
+
+def write_topo(topo_file, graph):
+    topo = {node_name(u): [node_name(v) for v in sorted(graph[u])] for u in range(len(graph))}
+    temp = topo_file + ".tmp"
+    with open(temp, "w") as f:
+        json.dump({"type": "topo", "config": topo}, f)
+    os.replace(temp, topo_file) # the poll never sees half a file
+
+
+async def change(emulator, algorithm, topo_file, graph, a, b, add, args):
+    """ Adds (or removes) the link a-b in the file, returns (detect, routes) seconds. """
+    loop = asyncio.get_event_loop()
+    node = emulator.nodes[node_jid(a)]
+    hop = node_jid(b) if algorithm == 'ls' else node_name(b)
+    version = emulator.config.version
+
+    if add:
+        graph[a].add(b)
+        graph[b].add(a)
+    else:
+        graph[a].discard(b)
+        graph[b].discard(a)
+    write_topo(topo_file, graph)
+
+    start = loop.time()
+    detect = routes = None
+    while loop.time() - start < args.timeout:
+        now = loop.time() - start
+        if detect is None and emulator.config.version != version:
+            detect = now
+        if detect is not None and (next_hop(node, algorithm, b) == hop) == add:
+            routes = now
+            break
+        await asyncio.sleep(0.002)
+    return detect, routes
+
+
+async def measure(emulator, algorithm, topo_file, graph, a, b, args):
+    emulator.start()
+    await asyncio.sleep(args.converge)
+    results = []
+    for add in (True, False):
+        results.append(await change(emulator, algorithm, topo_file, graph, a, b, add, args))
+        await asyncio.sleep(args.converge / 2)
+    emulator.stop()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--topology", choices=sorted(GENERATORS), default="grid")
+    parser.add_argument("--nodes", type=int, default=100)
+    parser.add_argument("--algorithms", nargs="+", default=["ls", "dv"])
+    parser.add_argument("--latency", type=float, default=0.002)
+    parser.add_argument("--poll", type=float, default=0.1, help="Seconds between checks of the files.")
+    parser.add_argument("--converge", type=float, default=6, help="Seconds before the first change.")
+    parser.add_argument("--timeout", type=float, default=30, help="Seconds to wait for the routes to follow.")
+    args = parser.parse_args()
+
+    graph = [set(row) for row in GENERATORS[args.topology](args.nodes, seed=1)]
+    a, b = 0, len(graph) - 1
+    print(f"{args.topology} {len(graph)} nodes, link {node_name(a)}-{node_name(b)} added then removed, poll {args.poll} s")
+
+    for algorithm in args.algorithms:
+        with tempfile.TemporaryDirectory() as directory:
+            names_file, topo_file = write_config(directory, [sorted(row) for row in graph])
+
+            parse_start = perf_counter()
+            for _ in graph:
+                netConfig.json_to_dict(names_file)
+                netConfig.json_to_dict(topo_file)
+            parse = perf_counter() - parse_start
+
+            build_start = perf_counter()
+            emulator = Emulator(names_file, topo_file, algorithm, args.latency, seed=1)
+            build = perf_counter() - build_start
+            emulator.config.poll = args.poll
+
+            results = asyncio.run(measure(emulator, algorithm, topo_file, [set(row) for row in graph], a, b, args))
+
+        print(f"{algorithm:>4}: build_ms {build * 1000:.0f}  parse_ms {parse * 1000:.0f}")
+        for label, (detect, routes) in zip(("add", "remove"), results):
+            detect_ms = f"{detect * 1000:.0f}" if detect is not None else "never"
+            routes_ms = f"{routes * 1000:.0f}" if routes is not None else f">{args.timeout * 1000:.0f}"
+            print(f"{label:>10}: detect_ms {detect_ms}  routes_ms {routes_ms}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Distance vector relaxation benchmark: vectorDistance.Router (dicts) vs
+vectorDistance.ArrayRouter (vectorized min-plus over NumPy arrays).
+
+A node with --neighbors neighbors first receives a full vector from each of
+them, then rounds of delta updates touching --churn of the destinations.
+
+Usage:
+    python benchmarks/bench_dv.py [--destinations 10000] [--neighbors 32] [--rounds 20]
+"""
+
+import os
+import sys
+import json
+import random
+import argparse
+import tempfile
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vectorDistance import Router, ArrayRouter, INFINITY
+
+
+def write_config(directory, destinations, neighbors):
+    names = {f"N{i}": f"n{i}@bench.local" for i in range(destinations)}
+    topo = {"N0": [f"N{i}" for i in range(1, neighbors + 1)]}
+
+    names_file = os.path.join(directory, "names.txt")
+    topo_file = os.path.join(directory, "topo.txt")
+    with open(names_file, "w") as f:
+        json.dump({"type": "names", "config": names}, f)
+    with open(topo_file, "w") as f:
+        json.dump({"type": "topo", "config": topo}, f)
+
+    return names_file, topo_file
+
+
+def full_vectors(destinations, neighbors, rng):
+    updates = []
+    for k in range(1, neighbors + 1):
+        vector = {f"N{d}": rng.randrange(1, INFINITY // 2) for d in range(1, destinations)}
+        vector[f"N{k}"] = 0
+        updates.append((f"N{k}", vector, True))
+    return updates
+
+
+def delta_round(destinations, neighbors, churn, rng):
+    updates = []
+    for k in range(1, neighbors + 1):
+        touched = rng.sample(range(1, destinations), int(destinations * churn))
+        vector = {f"N{d}": rng.choice([rng.randrange(1, INFINITY // 2), INFINITY]) for d in touched if d != k}
+        updates.append((f"N{k}", vector, False))
+    return updates
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--destinations", type=int, default=10000)
+    parser.add_argument("--neighbors", type=int, default=32)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--churn", type=float, default=0.05, help="Fraction of destinations changed per neighbor per round.")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    full = full_vectors(args.destinations, args.neighbors, rng)
+    rounds = [delta_round(args.destinations, args.neighbors, args.churn, rng) for _ in range(args.rounds)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        names_file, topo_file = write_config(directory, args.destinations, args.neighbors)
+        routers = {
+            "dict": Router("N0", names_file, topo_file),
+            "numpy": ArrayRouter("N0", names_file, topo_file),
+        }
+
+    print(f"{args.destinations} destinations x {args.neighbors} neighbors, {args.rounds} delta rounds of {args.churn:.0%}")
+    print(f"{'engine':>8} {'full batch (ms)':>16} {'delta batch (ms)':>17}")
+    for name, router in routers.items():
+        start = perf_counter()
+        router.process_batch(full)
+        full_time = perf_counter() - start
+
+        start = perf_counter()
+        for updates in rounds:
+            router.process_batch(updates)
+        delta_time = (perf_counter() - start) / args.rounds
+
+        print(f"{name:>8} {full_time * 1000:>16.1f} {delta_time * 1000:>17.2f}")
+
+    dict_vector = {dest: route[0] for dest, route in routers["dict"].vector.items()}
+    numpy_vector = {dest: route[0] for dest, route in routers["numpy"].vector.items()}
+    assert dict_vector == numpy_vector, "engines disagree"
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Per hop forwarding cost of a user message: envelope.parse + forward vs the
+previous all-json messages, decoded and re-encoded at every hop.
+
+Usage:
+    python benchmarks/bench_envelope.py [--hops 20000] [--sizes 100 10000 1000000]
+"""
+
+import os
+import sys
+import json
+import argparse
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from envelope import Envelope, parse
+
+PATH = [f"node{i}@alumchat.xyz" for i in range(8)]
+
+
+def legacy_hop(message, node):
+    """ What link.Node did for a transit message before the envelope format. """
+    body = json.loads(message)
+    payload = body["payload"]
+    new_message = {
+        "from_node": payload["path"][0],
+        "to_node": body["to_node"],
+        "jumps": 0,
+        "distance": 0,
+        "nodes": body["nodes"] + node,
+        "payload": payload,
+    }
+    return json.dumps(new_message)
+
+
+def envelope_hop(message, node):
+    return parse(message).forward(node).encode()
+
+
+def run(hop, message, hops):
+    start = perf_counter()
+    for i in range(hops):
+        hop(message, PATH[1])
+    return (perf_counter() - start) / hops
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--hops", type=int, default=20000)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10000, 1000000], help="Message sizes in bytes.")
+    args = parser.parse_args()
+
+    print(f"{'size':>10} {'legacy us/hop':>14} {'envelope us/hop':>16} {'speedup':>8}")
+    for size in args.sizes:
+        text = "x" * size
+        legacy = json.dumps({
+            "from_node": PATH[0], "to_node": PATH[-1], "jumps": 0, "distance": 0, "nodes": PATH[0],
+            "payload": {"type": "direct", "message": text, "path": PATH},
+        })
+        new = Envelope("direct", PATH[0], PATH[-1], text, path=PATH, nodes=PATH[0]).encode()
+        assert parse(envelope_hop(new, PATH[1])).body == text
+
+        hops = max(10, args.hops * 100 // max(size, 100))
+        legacy_time = run(legacy_hop, legacy, hops)
+        envelope_time = run(envelope_hop, new, hops)
+        print(f"{size:>10} {legacy_time * 1e6:>14.2f} {envelope_time * 1e6:>16.2f} {legacy_time / envelope_time:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
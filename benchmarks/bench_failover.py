@@ -0,0 +1,166 @@
+"""
+Failover benchmark: a stream of user messages crosses a link that is cut
+halfway, and the emulator measures how long the stream is black holed.
+
+For every algorithm (and link state with and without loop free alternates) it reports:
+    detect_s    --> time until a router at the cut link declared the neighbor down
+    repair_ms   --> with --notify, CPU time the two ends took to move their traffic
+                    (local repair with alternates, a full SPF without)
+    outage_s    --> time from the cut until the stream is delivered again for good
+    lost        --> stream messages lost, out of sent
+    looped      --> stream messages delivered after visiting a router twice
+    hop_load    --> messages per next hop at the source (link state multipath)
+
+--notify tells both ends of the link at once, like an interface going down,
+instead of leaving it to the failure detection.
+
+Usage:
+    python benchmarks/bench_failover.py [--topology grid] [--nodes 25] [--algorithms ls dv]
+                                        [--detect-interval 1.0] [--detect-multiplier 3]
+                                        [--notify] [--lfa both]
+"""
+
+import os
+import sys
+import asyncio
+import argparse
+import tempfile
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import settings
+from emulator import Emulator
+from topologies import GENERATORS, node_jid, node_name, write_config
+
+
+def primary_path(emulator, algorithm, source, recipient):
+    """ jids of the path the stream takes before the cut. """
+    node = emulator.nodes[source]
+    if algorithm == 'ls':
+        route = node.router.forwarding_table.get(recipient)
+        return route[1] if route else None
+
+    path = [source]
+    current = node
+    while path[-1] != recipient:
+        route = current.router.vector.get(current.recv_names(recipient, current.names))
+        if route is None or len(path) > len(emulator.nodes):
+            return None
+        path.append(current.names[route[1]])
+        current = emulator.nodes[path[-1]]
+    return path
+
+
+async def measure(emulator, algorithm, source, recipient, args):
+    loop = asyncio.get_event_loop()
+    emulator.start()
+    await asyncio.sleep(args.converge)
+
+    path = primary_path(emulator, algorithm, source, recipient)
+    if path is None or len(path) < 3:
+        emulator.stop()
+        return None
+    cut = (path[1], path[2]) # not the source's own link, so the repair happens in transit
+    load_before = dict(getattr(emulator.nodes[source].router, 'hop_load', {}))
+
+    sent = []
+    start = loop.time()
+    fail_at = start + args.fail_after
+    failed = False
+    repair = None
+    seq = 0
+    while loop.time() - start < args.stream:
+        if not failed and loop.time() >= fail_at:
+            fail_at = loop.time()
+            repair_start = perf_counter()
+            emulator.fail_link(*cut, notify=args.notify)
+            repair = perf_counter() - repair_start
+            failed = True
+        seq += 1
+        sent.append((loop.time(), seq))
+        emulator.send(source, recipient, str(seq), flow=seq % args.flows if algorithm == 'ls' else None)
+        await asyncio.sleep(args.interval)
+    await asyncio.sleep(1)
+    emulator.stop()
+
+    delivered = set()
+    looped = 0
+    for _, jid, _, message, nodes in emulator.delivered:
+        if jid == recipient:
+            delivered.add(int(message))
+            if isinstance(nodes, str): # link state concatenates the jids
+                nodes = nodes.split("@")[:-1]
+            looped += len(set(nodes)) < len(nodes)
+    lost = [(t, s) for t, s in sent if s not in delivered]
+    failovers = [t for node in emulator.nodes.values() for t, neighbor in getattr(node, 'failovers', ())
+                 if t >= fail_at]
+    lost_after = [t for t, _ in lost if t >= fail_at]
+
+    return {
+        'cut': cut,
+        'detect_s': min(failovers) - fail_at if failovers else None,
+        'repair_ms': repair * 1000 if args.notify else None,
+        'looped': looped,
+        'outage_s': max(lost_after) - fail_at + args.interval if lost_after else 0.0,
+        'lost': len(lost),
+        'sent': len(sent),
+        'hop_load': {hop.split("@")[0]: count - load_before.get(hop, 0)
+                     for hop, count in getattr(emulator.nodes[source].router, 'hop_load', {}).items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--topology", choices=sorted(GENERATORS), default="grid")
+    parser.add_argument("--nodes", type=int, default=25)
+    parser.add_argument("--algorithms", nargs="+", default=["ls", "dv"])
+    parser.add_argument("--latency", type=float, default=0.005)
+    parser.add_argument("--detect-interval", type=float, default=settings.DETECT_INTERVAL)
+    parser.add_argument("--detect-multiplier", type=int, default=settings.DETECT_MULTIPLIER)
+    parser.add_argument("--multipath", choices=["off", "ecmp", "ucmp"], default=settings.MULTIPATH)
+    parser.add_argument("--converge", type=float, default=6, help="Seconds before the stream starts.")
+    parser.add_argument("--stream", type=float, default=10, help="Seconds of stream.")
+    parser.add_argument("--fail-after", type=float, default=2, help="Seconds into the stream the link is cut.")
+    parser.add_argument("--interval", type=float, default=0.02, help="Seconds between stream messages.")
+    parser.add_argument("--flows", type=int, default=8, help="Flow ids the stream is spread over (link state).")
+    parser.add_argument("--notify", action="store_true", help="Tell the ends of the link right away.")
+    parser.add_argument("--lfa", choices=["on", "off", "both"], default="both", help="Loop free alternates in link state.")
+    args = parser.parse_args()
+
+    graph = GENERATORS[args.topology](args.nodes, seed=1)
+    source, recipient = node_jid(0), node_jid(len(graph) - 1)
+
+    print(f"{args.topology} {len(graph)} nodes, {node_name(0)} -> {node_name(len(graph) - 1)}, "
+          f"detect {args.detect_interval} s x {args.detect_multiplier}")
+    runs = []
+    for algorithm in args.algorithms:
+        if algorithm != 'ls':
+            runs.append((algorithm, False, algorithm))
+        else:
+            for lfa in {'on': [True], 'off': [False], 'both': [False, True]}[args.lfa]:
+                runs.append((algorithm, lfa, "ls+lfa" if lfa else "ls"))
+
+    for algorithm, lfa, label in runs:
+        with tempfile.TemporaryDirectory() as directory:
+            names_file, topo_file = write_config(directory, graph)
+            emulator = Emulator(names_file, topo_file, algorithm, args.latency, seed=1, multipath=args.multipath, lfa=lfa)
+        # the emulator builds its nodes with the settings defaults
+        for node in emulator.nodes.values():
+            node.detect.initial = node.detect.maximum = node.detect.interval = args.detect_interval
+            node.detect_multiplier = args.detect_multiplier
+
+        result = asyncio.run(measure(emulator, algorithm, source, recipient, args))
+        if result is None:
+            print(f"{label:>6}: no multi hop route between the endpoints")
+            continue
+        detect = f"{result['detect_s']:.2f}" if result['detect_s'] is not None else "never"
+        repair = f"  repair_ms {result['repair_ms']:.3f}" if result['repair_ms'] is not None else ""
+        print(f"{label:>6}: cut {result['cut'][0]}-{result['cut'][1]}  detect_s {detect}{repair}  "
+              f"outage_s {result['outage_s']:.2f}  lost {result['lost']}/{result['sent']}  looped {result['looped']}  "
+              f"hop_load {result['hop_load'] or '-'}")
+
+
+if __name__ == '__main__':
+    main()
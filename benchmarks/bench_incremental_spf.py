@@ -0,0 +1,89 @@
+"""
+Dynamic SPF benchmark: shortestPath.DynamicSPF vs a full shortestPath.dijkstra
+after every edge update, on randomized sequences of weight increases,
+decreases, link removals and link additions.
+
+The repaired trees are checked against the full recompute in
+tests/test_shortest_path.py.
+
+Usage:
+    python benchmarks/bench_incremental_spf.py [--sizes 100 1000 10000] [--updates 500]
+"""
+
+import os
+import sys
+import random
+import argparse
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import shortestPath
+from bench_spf import random_graph
+
+
+def random_updates(graph, count, rng):
+    """ Yields (tail, head, weight) updates, weight None meaning link down. """
+    num_nodes = len(graph)
+    for _ in range(count):
+        tail = rng.randrange(num_nodes)
+        kind = rng.random()
+        if graph[tail] and kind < 0.4: # increase
+            head = rng.choice(list(graph[tail]))
+            yield tail, head, graph[tail][head] * rng.uniform(1, 5)
+        elif graph[tail] and kind < 0.8: # decrease
+            head = rng.choice(list(graph[tail]))
+            yield tail, head, graph[tail][head] * rng.uniform(0.2, 1)
+        elif graph[tail] and kind < 0.9: # link down
+            yield tail, rng.choice(list(graph[tail])), None
+        else: # new link
+            head = rng.randrange(num_nodes)
+            if head != tail:
+                yield tail, head, rng.uniform(0.001, 1)
+
+
+def run(size, updates, seed):
+    rng = random.Random(seed)
+    graph = random_graph(size, seed=seed)
+    spf = shortestPath.DynamicSPF([dict(row) for row in graph], 0)
+
+    incremental_time = 0
+    full_time = 0
+    for tail, head, weight in list(random_updates(graph, updates, rng)):
+        if weight is None:
+            graph[tail].pop(head, None)
+        else:
+            graph[tail][head] = weight
+
+        start = perf_counter()
+        spf.update_edge(tail, head, weight)
+        incremental_time += perf_counter() - start
+
+        start = perf_counter()
+        shortestPath.dijkstra(graph, 0)
+        full_time += perf_counter() - start
+
+    return incremental_time, full_time
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--updates", type=int, default=500)
+    parser.add_argument("--seeds", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'nodes':>8} {'updates':>8} {'dynamic (s)':>12} {'full (s)':>12} {'speedup':>10}")
+    for size in args.sizes:
+        incremental_time = full_time = 0
+        for seed in range(args.seeds):
+            inc, full = run(size, args.updates, seed)
+            incremental_time += inc
+            full_time += full
+        total = args.updates * args.seeds
+        print(f"{size:>8} {total:>8} {incremental_time:>12.4f} {full_time:>12.4f} {full_time / incremental_time:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
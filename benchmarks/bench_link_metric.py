@@ -0,0 +1,100 @@
+"""
+Route flapping benchmark: raw echo delays as link weights (the previous
+behavior) vs linkMetric.LinkMetric smoothing, buckets and hysteresis.
+
+Every link has a base delay and every echo round draws a jittery sample of
+it. Halfway through, --steps links get slower for real, to check the
+estimator still follows actual changes.
+
+Usage:
+    python benchmarks/bench_link_metric.py [--nodes 200] [--rounds 200] [--jitter 0.3]
+"""
+
+import os
+import sys
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import shortestPath
+from linkMetric import LinkMetric
+from topologies import GENERATORS
+
+
+def simulate(graph, base, rounds, jitter, steps, smoothed, monitored, seed=0):
+    rng = random.Random(seed)
+    links = [(u, v) for u in range(len(graph)) for v in graph[u]]
+    metrics = {link: LinkMetric() for link in links}
+    weights = [{} for _ in graph]
+    for u, v in links:
+        weights[u][v] = base[(u, v)]
+
+    stepped = rng.sample(links, steps)
+    reacted = {}
+    originations = spf_runs = flaps = 0
+    hops = {source: shortestPath.dijkstra(weights, source)[2] for source in monitored}
+
+    for round in range(rounds):
+        if round == rounds // 2:
+            for link in stepped:
+                base[link] *= 3
+
+        originators = set()
+        for u, v in links:
+            sample = base[(u, v)] * rng.lognormvariate(0, jitter)
+            if smoothed:
+                if not metrics[(u, v)].sample(sample):
+                    continue
+                weight = metrics[(u, v)].weight
+            else:
+                weight = sample
+            if weight != weights[u][v]:
+                weights[u][v] = weight
+                originators.add(u)
+                if round >= rounds // 2 and (u, v) in stepped and (u, v) not in reacted:
+                    reacted[(u, v)] = round - rounds // 2
+
+        originations += len(originators)
+        spf_runs += len(originators) * len(graph) # every router recomputes on each new LSP it installs
+        if originators:
+            for source in monitored:
+                first_hop = shortestPath.dijkstra(weights, source)[2]
+                flaps += sum(1 for a, b in zip(first_hop, hops[source]) if a != b)
+                hops[source] = first_hop
+
+    lag = sum(reacted.values()) / len(reacted) if reacted else float('nan')
+    return originations, spf_runs, flaps, len(reacted), lag
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--topology", choices=sorted(GENERATORS), default="geometric")
+    parser.add_argument("--nodes", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=200, help="Echo rounds.")
+    parser.add_argument("--jitter", type=float, default=0.3, help="Sigma of the lognormal delay noise.")
+    parser.add_argument("--steps", type=int, default=10, help="Links that really get 3x slower halfway.")
+    parser.add_argument("--monitored", type=int, default=10, help="Routers whose next hops are checked for flaps.")
+    args = parser.parse_args()
+
+    graph = GENERATORS[args.topology](args.nodes, seed=1)
+    rng = random.Random(2)
+    base = {}
+    for u in range(len(graph)):
+        for v in graph[u]:
+            if (v, u) in base:
+                base[(u, v)] = base[(v, u)]
+            else:
+                base[(u, v)] = rng.uniform(0.005, 0.05)
+
+    monitored = list(range(0, args.nodes, max(1, args.nodes // args.monitored)))[:args.monitored]
+    print(f"{args.topology} {args.nodes} nodes, {args.rounds} rounds, jitter {args.jitter}")
+    print(f"{'weights':>9} {'LSPs':>8} {'SPF runs':>9} {'flaps':>7} {'steps seen':>11} {'lag rounds':>11}")
+    for name, smoothed in (("raw", False), ("smoothed", True)):
+        originations, spf_runs, flaps, seen, lag = simulate(graph, dict(base), args.rounds, args.jitter,
+                                                            args.steps, smoothed, monitored)
+        print(f"{name:>9} {originations:>8} {spf_runs:>9} {flaps:>7} {seen:>5}/{args.steps:<5} {lag:>11.1f}")
+
+
+if __name__ == '__main__':
+    main()
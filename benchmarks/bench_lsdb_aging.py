@@ -0,0 +1,115 @@
+"""
+LSDB size and SPF cost of one link state router under membership churn, with
+and without LSP aging.
+
+Every round (a refresh period of virtual time) the live routers re-originate
+their LSPs, some leave for good and some short lived guests (jids outside the
+names file) flood an LSP once. Routers that left are still listed by their
+neighbors unless --detect is given, like neighbors that run no failure
+detection. With aging the router sweeps its timer wheel every tick and
+purges what aged out; without it, it keeps everything, as before.
+
+For each round it reports the LSDB entries, the destinations in the
+forwarding table, the SPF time, and the time of the aging sweeps next to
+what a full scan of the LSDB would have taken.
+
+Usage:
+    python benchmarks/bench_lsdb_aging.py [--topology geometric] [--nodes 2000] [--rounds 12]
+                                          [--leave 0.05] [--guests 200] [--detect]
+"""
+
+import os
+import sys
+import random
+import argparse
+import tempfile
+from time import time, perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import linkRouter
+from topologies import GENERATORS, node_jid, write_config
+
+
+def run(names_file, topo_file, graph, weights, aging, args):
+    start = time() # virtual clock, started at the real one so LSPs are not taken as expired
+    router = linkRouter.Router(node_jid(0), names_file, topo_file, max_age=args.max_age)
+    router.neighbors_distance = {node_jid(v): weights[(0, v)] for v in graph[0]}
+    rng = random.Random(5)
+    live = set(range(len(graph)))
+    seq = 0
+    guest = 0
+    rows = []
+
+    for round_ in range(args.rounds):
+        now = start + round_ * args.refresh
+        seq += 1
+        if round_ > 0:
+            leaving = rng.sample(sorted(live - {0}), int(len(live) * args.leave))
+            live.difference_update(leaving)
+            if args.detect:
+                router.neighbors_distance = {node_jid(v): weights[(0, v)] for v in graph[0] if v in live}
+
+        router.build_package()
+        for u in sorted(live - {0}):
+            neighbors = [v for v in graph[u] if v in live or not args.detect]
+            router.install_lsp({'origin': node_jid(u), 'seq': seq, 'age': now, 'lifetime': args.max_age,
+                                'weights': {node_jid(v): weights[(u, v)] for v in neighbors}}, now)
+        for _ in range(args.guests):
+            guest += 1
+            router.install_lsp({'origin': f"guest{guest}@emu.local", 'seq': 1, 'age': now, 'lifetime': args.max_age, 'weights': {}}, now)
+
+        sweep = 0.0
+        if aging:
+            # the ticks of the round, the way link.Node sweeps the wheel
+            for tick in range(int(args.refresh / router.aging.tick)):
+                sweep_start = perf_counter()
+                router.age_lsdb(now + tick * router.aging.tick)
+                sweep += perf_counter() - sweep_start
+
+        scan_start = perf_counter()
+        [origin for origin, lsp in router.packages.items() if now - lsp['age'] > args.max_age]
+        scan = (perf_counter() - scan_start) * int(args.refresh / router.aging.tick)
+
+        router.topology_version += 1
+        spf_start = perf_counter()
+        router.build_graph_matrix()
+        spf = perf_counter() - spf_start
+        rows.append((round_, len(live), len(router.packages), len(router.forwarding_table), spf, sweep, scan))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--topology", choices=sorted(GENERATORS), default="geometric")
+    parser.add_argument("--nodes", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--refresh", type=float, default=20, help="Virtual seconds per round.")
+    parser.add_argument("--max-age", type=float, default=60, help="LSP max age, in virtual seconds.")
+    parser.add_argument("--leave", type=float, default=0.05, help="Fraction of the live routers leaving per round.")
+    parser.add_argument("--guests", type=int, default=200, help="One shot origins outside the names file per round.")
+    parser.add_argument("--detect", action="store_true", help="Neighbors stop listing the routers that left.")
+    args = parser.parse_args()
+
+    graph = GENERATORS[args.topology](args.nodes, seed=1)
+    rng = random.Random(2)
+    weights = {}
+    for u in range(len(graph)):
+        for v in graph[u]:
+            weights[(u, v)] = weights.get((v, u)) or rng.uniform(0.005, 0.05)
+
+    print(f"{args.topology} {len(graph)} nodes, {args.leave:.0%} leave and {args.guests} guests per round, "
+          f"max age {args.max_age:.0f} s, refresh {args.refresh:.0f} s, detect {'on' if args.detect else 'off'}")
+    with tempfile.TemporaryDirectory() as directory:
+        names_file, topo_file = write_config(directory, graph)
+        for aging in (False, True):
+            print(f"aging {'on' if aging else 'off'}")
+            print(f"{'round':>6} {'live':>6} {'lsdb':>7} {'destinations':>13} {'spf ms':>8} {'sweeps ms':>10} {'scans ms':>9}")
+            for round_, live, lsdb, destinations, spf, sweep, scan in run(names_file, topo_file, graph, weights, aging, args):
+                print(f"{round_:>6} {live:>6} {lsdb:>7} {destinations:>13} {spf * 1000:>8.1f} "
+                      f"{sweep * 1000 if aging else 0:>10.2f} {scan * 1000:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
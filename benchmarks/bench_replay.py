@@ -0,0 +1,96 @@
+"""
+Flooding duplicate suppression microbenchmark: replayWindow.ReplayWindow vs
+the previous per-source list of every counter seen.
+
+The stream mimics flooding on a meshed topology: each message arrives
+several times (once per path) and copies are reordered within a window.
+
+Usage:
+    python benchmarks/bench_replay.py [--messages 2000000] [--sources 50]
+"""
+
+import os
+import sys
+import random
+import argparse
+import tracemalloc
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from replayWindow import ReplayWindow
+
+
+def flooded_stream(messages, sources, copies, jitter, seed=0):
+    """ List of (source, counter) with duplicates and bounded reordering. """
+    rng = random.Random(seed)
+    counters = [0] * sources
+    stream = []
+    for _ in range(messages // copies):
+        source = rng.randrange(sources)
+        counters[source] += 1
+        for _ in range(copies):
+            stream.append((rng.random() * jitter + len(stream), source, counters[source]))
+    stream.sort()
+    return [(source, counter) for _, source, counter in stream]
+
+
+def legacy_filter(stream):
+    nodes = {}
+    accepted = []
+    for source, counter in stream:
+        if source in nodes:
+            if counter <= len(nodes[source]):
+                continue
+        else:
+            nodes[source] = []
+        nodes[source].append(counter)
+        accepted.append((source, counter))
+    return accepted, nodes
+
+
+def window_filter(stream, size):
+    nodes = {}
+    accepted = []
+    for source, counter in stream:
+        window = nodes.get(source)
+        if window is None:
+            window = nodes[source] = ReplayWindow(size)
+        if window.accept(counter):
+            accepted.append((source, counter))
+    return accepted, nodes
+
+
+def measure(function, *args):
+    tracemalloc.start()
+    start = perf_counter()
+    accepted, state = function(*args)
+    elapsed = perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return accepted, elapsed, memory - sys.getsizeof(accepted) - len(accepted) * sys.getsizeof(accepted[0])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=2000000)
+    parser.add_argument("--sources", type=int, default=50)
+    parser.add_argument("--copies", type=int, default=3, help="Times each message is received.")
+    parser.add_argument("--jitter", type=float, default=200, help="Reordering distance, in messages.")
+    parser.add_argument("--window", type=int, default=256)
+    args = parser.parse_args()
+
+    stream = flooded_stream(args.messages, args.sources, args.copies, args.jitter)
+    unique = len(set(stream))
+
+    print(f"{len(stream)} messages, {unique} unique, {args.sources} sources")
+    print(f"{'filter':>8} {'accepted':>10} {'missed':>8} {'dupes':>8} {'Mmsg/s':>8} {'state KB':>10}")
+    for name, function, extra in (("legacy", legacy_filter, ()), ("window", window_filter, (args.window,))):
+        accepted, elapsed, memory = measure(function, stream, *extra)
+        distinct = len(set(accepted))
+        print(f"{name:>8} {len(accepted):>10} {unique - distinct:>8} {len(accepted) - distinct:>8} "
+              f"{len(stream) / elapsed / 1e6:>8.2f} {memory / 1024:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
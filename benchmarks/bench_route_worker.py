@@ -0,0 +1,104 @@
+"""
+Event loop stalls while link state routes are recomputed: inline SPF vs
+routeWorker.RouteWorker in a thread or process pool.
+
+One router holds a large topology and receives a burst of LSPs, asking for
+new routes after each one, the way link.Node does. Meanwhile a heartbeat
+callback expects to run every millisecond; its lateness is what echoes and
+acks would suffer.
+
+Usage:
+    python benchmarks/bench_route_worker.py [--nodes 3000] [--lsps 50] [--spacing 0.002]
+"""
+
+import os
+import sys
+import random
+import asyncio
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import linkRouter
+from routeWorker import RouteWorker
+from topologies import GENERATORS, node_jid, write_config
+
+
+def build_router(names_file, topo_file, graph, weights):
+    router = linkRouter.Router(node_jid(0), names_file, topo_file, incremental=False) # full SPFs, the ones worth moving off the loop
+    for u in range(len(graph)):
+        router.update_graph_row(node_jid(u), {node_jid(v): weights[(u, v)] for v in graph[u]})
+    router.topology_version += 1
+    router.build_graph_matrix()
+    return router
+
+
+async def measure(router, graph, weights, executor, args):
+    loop = asyncio.get_event_loop()
+    worker = RouteWorker(router, executor)
+    rng = random.Random(3)
+    lags = []
+    running = True
+
+    def heartbeat(expected):
+        now = loop.time()
+        lags.append(now - expected)
+        if running:
+            loop.call_at(now + 0.001, heartbeat, now + 0.001)
+
+    loop.call_soon(heartbeat, loop.time())
+    start = loop.time()
+    for _ in range(args.lsps):
+        u = rng.randrange(len(graph))
+        row = {node_jid(v): weights[(u, v)] * rng.uniform(0.5, 2) for v in graph[u]}
+        router.topology_version += 1
+        router.update_graph_row(node_jid(u), row)
+        worker.request()
+        await asyncio.sleep(args.spacing)
+
+    while router.table_version < router.topology_version:
+        await asyncio.sleep(0.001)
+    converged = loop.time() - start
+    running = False
+
+    lags.sort()
+    return {
+        'max_stall_ms': lags[-1] * 1000,
+        'p99_lag_ms': lags[int(len(lags) * 0.99)] * 1000,
+        'runs': worker.stats['runs'] if executor != 'inline' else args.lsps,
+        'coalesced': worker.stats['coalesced'],
+        'converged_s': converged,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--topology", choices=sorted(GENERATORS), default="geometric")
+    parser.add_argument("--nodes", type=int, default=3000)
+    parser.add_argument("--lsps", type=int, default=50, help="LSPs in the burst.")
+    parser.add_argument("--spacing", type=float, default=0.002, help="Seconds between LSPs.")
+    parser.add_argument("--executors", nargs="+", default=["inline", "thread", "process"])
+    args = parser.parse_args()
+
+    graph = GENERATORS[args.topology](args.nodes, seed=1)
+    rng = random.Random(2)
+    weights = {}
+    for u in range(len(graph)):
+        for v in graph[u]:
+            weights[(u, v)] = weights.get((v, u)) or rng.uniform(0.005, 0.05)
+
+    print(f"{args.topology} {args.nodes} nodes, {args.lsps} LSPs every {args.spacing * 1000:.0f} ms")
+    print(f"{'executor':>9} {'max stall ms':>13} {'p99 lag ms':>11} {'SPF runs':>9} {'coalesced':>10} {'converged s':>12}")
+    with tempfile.TemporaryDirectory() as directory:
+        names_file, topo_file = write_config(directory, graph)
+        for executor in args.executors:
+            router = build_router(names_file, topo_file, graph, weights)
+            result = asyncio.run(measure(router, graph, weights, executor, args))
+            print(f"{executor:>9} {result['max_stall_ms']:>13.1f} {result['p99_lag_ms']:>11.1f} {result['runs']:>9} "
+                  f"{result['coalesced']:>10} {result['converged_s']:>12.2f}")
+
+
+if __name__ == '__main__':
+    main()
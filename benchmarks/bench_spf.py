@@ -0,0 +1,106 @@
+"""
+SPF benchmark: heap based shortestPath.dijkstra vs the previous
+sort-the-unvisited-set implementation of linkRouter.Router.dijkstra.
+
+Usage:
+    python benchmarks/bench_spf.py [--sizes 1000 5000 10000 50000] [--legacy-max 5000]
+"""
+
+import os
+import sys
+import random
+import argparse
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import shortestPath
+
+
+def random_graph(num_nodes, degree=4, seed=0):
+    """ Connected random graph: a ring plus random chords, weights in (0, 1]. """
+    rng = random.Random(seed)
+    graph = [{} for _ in range(num_nodes)]
+
+    def link(u, v):
+        if u != v:
+            weight = rng.uniform(0.001, 1)
+            graph[u][v] = weight
+            graph[v][u] = weight
+
+    for u in range(num_nodes):
+        link(u, (u + 1) % num_nodes)
+    for _ in range(num_nodes * (degree - 2) // 2):
+        link(rng.randrange(num_nodes), rng.randrange(num_nodes))
+
+    return graph
+
+
+def legacy_dijkstra(graph, start):
+    """ Previous Router.dijkstra algorithm, kept here only as a baseline. """
+    unvisited = {node: None for node in range(len(graph))}
+    previous = {node: None for node in range(len(graph))}
+    visited = {}
+
+    current = start
+    current_dist = 0
+    unvisited[current] = current_dist
+
+    while True:
+        for node, distance in graph[current].items():
+            if node not in unvisited: continue
+            new_dist = current_dist + distance
+            if not unvisited[node] or unvisited[node] > new_dist:
+                unvisited[node] = new_dist
+                previous[node] = current
+
+        visited[current] = current_dist
+        del unvisited[current]
+
+        done = 1
+        for x in unvisited:
+            if unvisited[x]:
+                done = 0
+                break
+        if not unvisited or done:
+            break
+
+        elements = [node for node in unvisited.items() if node[1]]
+        current, current_dist = sorted(elements, key = lambda x: x[1])[0]
+
+    return visited, previous
+
+
+def timed(function, *args, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = perf_counter()
+        result = function(*args)
+        elapsed = perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 10000, 50000])
+    parser.add_argument("--degree", type=int, default=4)
+    parser.add_argument("--legacy-max", type=int, default=5000, help="Largest graph to run the old algorithm on.")
+    args = parser.parse_args()
+
+    print(f"{'nodes':>8} {'heap (s)':>12} {'legacy (s)':>12} {'speedup':>10}")
+    for size in args.sizes:
+        graph = random_graph(size, args.degree)
+        heap_time, (distance, _, _) = timed(shortestPath.dijkstra, graph, 0)
+
+        if size <= args.legacy_max:
+            legacy_time, (visited, _) = timed(legacy_dijkstra, graph, 0, repeat=1)
+            for node, dist in visited.items():
+                assert abs(distance[node] - dist) < 1e-9, "engines disagree"
+            print(f"{size:>8} {heap_time:>12.4f} {legacy_time:>12.4f} {legacy_time / heap_time:>9.1f}x")
+        else:
+            print(f"{size:>8} {heap_time:>12.4f} {'-':>12} {'-':>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+Topology database benchmark: sparse per-row updates in linkRouter.Router vs
+the previous dense N x N rebuild of build_graph_matrix on every LSP.
+
+Usage:
+    python benchmarks/bench_topology.py [--sizes 1000 10000] [--lsps 200] [--legacy-max 2000]
+"""
+
+import os
+import sys
+import json
+import random
+import argparse
+import tempfile
+import tracemalloc
+from time import perf_counter
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from linkRouter import Router
+from bench_spf import random_graph
+
+
+def write_config(directory, graph):
+    """ Writes names/topo files in the lab format for an integer graph. """
+    names = {f"N{i}": f"n{i}@bench.local" for i in range(len(graph))}
+    topo = {f"N{i}": [f"N{j}" for j in row] for i, row in enumerate(graph)}
+
+    names_file = os.path.join(directory, "names.txt")
+    topo_file = os.path.join(directory, "topo.txt")
+    with open(names_file, "w") as f:
+        json.dump({"type": "names", "config": names}, f)
+    with open(topo_file, "w") as f:
+        json.dump({"type": "topo", "config": topo}, f)
+
+    return names_file, topo_file
+
+
+def lsp_for(node, graph, seq):
+    return {
+        'origin': f"n{node}@bench.local",
+        'seq': seq,
+        'age': 0,
+        'lifetime': 3600,
+        'weights': {f"n{j}@bench.local": w for j, w in graph[node].items()},
+    }
+
+
+def legacy_build(router, matrix):
+    """ Previous build_graph_matrix body: dense nested loops over every cell. """
+    for i in range(len(router.users)):
+        for j in range(len(router.users)):
+            if i == j:
+                matrix[i][j]=0
+            else:
+                row_name = router.users[router.users_list[i]]
+                col_name = router.users[router.users_list[j]]
+                try:
+                    peso = router.packages[row_name]['weights'][col_name]
+                    matrix[i][j]=peso
+                except:
+                    matrix[i][j]=0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--lsps", type=int, default=200, help="LSP updates to time per size.")
+    parser.add_argument("--legacy-max", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    print(f"{'nodes':>8} {'edges':>8} {'row update (us)':>16} {'update+SPF (ms)':>16} {'legacy (ms)':>12} {'sparse MB':>10} {'dense MB':>10}")
+
+    for size in args.sizes:
+        graph = random_graph(size)
+        edges = sum(len(row) for row in graph)
+
+        with tempfile.TemporaryDirectory() as directory:
+            names_file, topo_file = write_config(directory, graph)
+            router = Router("n0@bench.local", names_file, topo_file, incremental=False)
+
+        tracemalloc.start()
+        for node in range(size):
+            router.change_neighbor_package(f"n{node}@bench.local", lsp_for(node, graph, 1))
+        sparse_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        router.build_graph_matrix()
+
+        updates = [rng.randrange(size) for _ in range(args.lsps)]
+        row_time = 0
+        for seq, node in enumerate(updates, 2):
+            for neighbor in graph[node]:
+                graph[node][neighbor] = rng.uniform(0.001, 1)
+            lsp = lsp_for(node, graph, seq)
+            start = perf_counter()
+            router.change_neighbor_package(lsp['origin'], lsp)
+            row_time += perf_counter() - start
+
+        start = perf_counter()
+        router.topology_version += 1
+        router.build_graph_matrix()
+        spf_time = perf_counter() - start
+
+        legacy = "-"
+        if size <= args.legacy_max:
+            matrix = np.empty((size, size))
+            start = perf_counter()
+            legacy_build(router, matrix)
+            legacy = f"{(perf_counter() - start) * 1000:.1f}"
+
+        print(f"{size:>8} {edges:>8} {row_time / args.lsps * 1e6:>16.1f} {spf_time * 1000:>16.1f} {legacy:>12} "
+              f"{sparse_bytes / 2**20:>10.1f} {size * size * 8 / 2**20:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Time to first route after a router restarts, cold or from a warm restart
+snapshot (warmStart.py), in the emulator.
+
+The network converges, one router is restarted (a new node on the same
+address, keeping only its snapshot file) and the destinations it has a route
+to are polled until they are all back:
+    first_ms    --> until it routes to a destination beyond its neighbors
+    full_ms     --> until it routes to every destination it had before
+    snapshot    --> size of the snapshot file and time to load it
+
+Usage:
+    python benchmarks/bench_warm_restart.py [--topology grid] [--nodes 49] [--algorithms ls dv]
+"""
+
+import os
+import sys
+import asyncio
+import argparse
+import tempfile
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import linkRouter
+import vectorDistance
+from emulator import Emulator
+from warmStart import Snapshot
+from topologies import GENERATORS, node_jid, node_name, write_config
+
+
+def destinations(node, algorithm):
+    if algorithm == 'ls':
+        return set(node.router.forwarding_table)
+    return {dest for dest in node.router.vector if dest != node.router.node}
+
+
+async def measure(emulator, algorithm, jid, args):
+    loop = asyncio.get_event_loop()
+    emulator.start()
+    await asyncio.sleep(args.converge)
+
+    node = emulator.nodes[jid]
+    before = destinations(node, algorithm)
+    neighbors = set(node.router.neighbors)
+
+    start = loop.time()
+    node = emulator.restart(jid)
+    first = full = None
+    while loop.time() - start < args.timeout:
+        routes = destinations(node, algorithm)
+        now = loop.time() - start
+        if first is None and routes - neighbors:
+            first = now
+        if routes >= before:
+            full = now
+            break
+        await asyncio.sleep(0.005)
+    emulator.stop()
+    return len(before), first, full
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--topology", choices=sorted(GENERATORS), default="grid")
+    parser.add_argument("--nodes", type=int, default=49)
+    parser.add_argument("--algorithms", nargs="+", default=["ls", "dv"])
+    parser.add_argument("--latency", type=float, default=0.005)
+    parser.add_argument("--converge", type=float, default=8, help="Seconds before the restart.")
+    parser.add_argument("--timeout", type=float, default=40, help="Seconds to wait for the routes to come back.")
+    args = parser.parse_args()
+
+    graph = GENERATORS[args.topology](args.nodes, seed=1)
+    jid = node_jid(len(graph) // 2)
+    print(f"{args.topology} {len(graph)} nodes, restarting {jid}")
+
+    for algorithm in args.algorithms:
+        for warm in (False, True):
+            with tempfile.TemporaryDirectory() as directory:
+                names_file, topo_file = write_config(directory, graph)
+                snapshots = directory if warm else None
+                emulator = Emulator(names_file, topo_file, algorithm, args.latency, seed=1, snapshots=snapshots)
+                count, first, full = asyncio.run(measure(emulator, algorithm, jid, args))
+
+                info = ""
+                if warm: # the file the stopped network left behind, loaded into a fresh router
+                    path = os.path.join(directory, jid + ".snap")
+                    snapshot = Snapshot(path, emulator.names)
+                    if algorithm == 'ls':
+                        router = linkRouter.Router(jid, names_file, topo_file)
+                        load_start = perf_counter()
+                        snapshot.load_link_state(router)
+                    else:
+                        router = vectorDistance.Router(node_name(len(graph) // 2), names_file, topo_file)
+                        load_start = perf_counter()
+                        snapshot.load_vector(router)
+                    info = f"  snapshot {os.path.getsize(path)} B, loaded in {(perf_counter() - load_start) * 1000:.2f} ms"
+
+            label = f"{algorithm} {'warm' if warm else 'cold'}"
+            first_ms = f"{first * 1000:.0f}" if first is not None else "never"
+            full_ms = f"{full * 1000:.0f}" if full is not None else f">{args.timeout * 1000:.0f}"
+            print(f"{label:>8}: {count} destinations  first_ms {first_ms}  full_ms {full_ms}{info}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Control message size and encode/decode speed: wire.WireCodec binary vs JSON.
+
+Usage:
+    python benchmarks/bench_wire.py [--nodes 1000] [--degree 4] [--repeat 20000]
+"""
+
+import os
+import sys
+import random
+import argparse
+from time import time, perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from wire import WireCodec
+from topologies import node_name, node_jid
+
+
+def messages(names, degree, vector_size, rng):
+    jids = list(names.values())
+    nodes = list(names)
+    lsp = {
+        'origin': jids[0],
+        'seq': 12345,
+        'age': time(),
+        'lifetime': 3600,
+        'weights': {jid: rng.uniform(0.001, 0.2) for jid in rng.sample(jids[1:], degree)},
+    }
+    return {
+        'lsp': {'type': 'lsp', 'lsp': lsp},
+        'echo': {'type': 'echo', 'timestamp': time()},
+        'dv delta': {'type': 'update', 'sender': nodes[0], 'seq': 77, 'full': False,
+                     'vector': {node: rng.randrange(1, 20) for node in rng.sample(nodes, 8)}},
+        'dv full': {'type': 'update', 'sender': nodes[0], 'seq': 78, 'full': True,
+                    'vector': {node: rng.randrange(1, 20) for node in rng.sample(nodes, vector_size)}},
+        'update-ack': {'type': 'update-ack', 'sender': nodes[0], 'seq': 77},
+    }
+
+
+def timed(function, repeat):
+    start = perf_counter()
+    for _ in range(repeat):
+        function()
+    return (perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nodes", type=int, default=1000)
+    parser.add_argument("--degree", type=int, default=4, help="Neighbors in the LSP.")
+    parser.add_argument("--vector", type=int, default=200, help="Entries in the full DV update.")
+    parser.add_argument("--repeat", type=int, default=20000)
+    args = parser.parse_args()
+
+    names = {node_name(u): node_jid(u) for u in range(args.nodes)}
+    peer = node_jid(1)
+    json_codec = WireCodec(names, binary=False)
+    binary_codec = WireCodec(names)
+    binary_codec.peers.add(peer)
+
+    rng = random.Random(0)
+    print(f"{'message':>11} {'json B':>8} {'binary B':>9} {'ratio':>6} "
+          f"{'json enc us':>12} {'bin enc us':>11} {'json dec us':>12} {'bin dec us':>11}")
+    for name, payload in messages(names, args.degree, min(args.vector, args.nodes), rng).items():
+        json_body = json_codec.dumps(payload, peer)
+        binary_body = binary_codec.dumps(payload, peer)
+        decoded = binary_codec.loads(binary_body)
+        if name == 'lsp': # weights come back rounded to microseconds
+            assert all(abs(decoded['lsp']['weights'][jid] - weight) < 1e-6 for jid, weight in payload['lsp']['weights'].items())
+        else:
+            assert decoded == payload
+
+        repeat = max(100, args.repeat // max(1, len(json_body) // 100))
+        print(f"{name:>11} {len(json_body):>8} {len(binary_body):>9} {len(json_body) / len(binary_body):>6.1f} "
+              f"{timed(lambda: json_codec.dumps(payload, peer), repeat):>12.2f} "
+              f"{timed(lambda: binary_codec.dumps(payload, peer), repeat):>11.2f} "
+              f"{timed(lambda: json_codec.loads(json_body), repeat):>12.2f} "
+              f"{timed(lambda: binary_codec.loads(binary_body), repeat):>11.2f}")
+
+
+if __name__ == '__main__':
+    main()
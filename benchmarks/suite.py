@@ -0,0 +1,178 @@
+"""
+Convergence and throughput benchmark suite for flooding, distance vector and
+link state, run over emulator.Emulator on generated topologies.
+
+For every (topology, size, algorithm) it reports:
+    convergence_s            --> time until every node has a route to every reachable node
+                                 (n/a for flooding, which keeps no routes)
+    control_messages_per_node, control_bytes_per_node
+                             --> routing traffic sent until convergence, per node
+    spf_cpu_s                --> route computation CPU seconds, summed over nodes (link state)
+    data_messages_per_s      --> end to end user messages delivered per second
+    data_delivered           --> fraction of the user messages that arrived
+
+Results are written as JSON so runs can be compared over time.
+
+Usage:
+    python benchmarks/suite.py [--topologies ring grid geometric scale-free]
+                               [--sizes 10 100 1000] [--algorithms flooding dv ls]
+                               [--output bench_output.json]
+"""
+
+import os
+import sys
+import json
+import random
+import asyncio
+import argparse
+import platform
+import tempfile
+import subprocess
+from time import time, perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from emulator import Emulator
+from topologies import GENERATORS, hop_distances, node_jid, node_name, write_config
+
+
+def converged(emulator, algorithm, expected):
+    """ True once every node routes to everything reachable from it. """
+    for u, reachable in expected.items():
+        node = emulator.nodes[node_jid(u)]
+        if algorithm == 'ls':
+            if len(node.router.forwarding_table) < len(reachable) - 1:
+                return False
+        else:
+            vector = node.router.vector
+            for v, hops in reachable.items():
+                route = vector.get(node_name(v))
+                if route is None or route[0] != hops:
+                    return False
+    return True
+
+
+async def measure(emulator, algorithm, graph, args, rng):
+    loop = asyncio.get_event_loop()
+    expected = {u: hop_distances(graph, u) for u in range(len(graph))}
+
+    start = loop.time()
+    emulator.start()
+
+    convergence = None
+    if algorithm != 'flooding':
+        while loop.time() - start < args.timeout:
+            await asyncio.sleep(args.poll)
+            if converged(emulator, algorithm, expected):
+                convergence = loop.time() - start
+                break
+
+    control = emulator.stats()
+
+    # data phase: user messages between random connected pairs
+    pairs = []
+    while len(pairs) < args.messages and len(graph) > 1:
+        u = rng.randrange(len(graph))
+        v = rng.choice(list(expected[u]))
+        if u != v:
+            pairs.append((node_jid(u), node_jid(v)))
+
+    delivered_before = len(emulator.delivered)
+    data_start = loop.time()
+    for source, recipient in pairs:
+        emulator.send(source, recipient, "benchmark")
+
+    deadline = data_start + args.data_timeout
+    while len(emulator.delivered) - delivered_before < len(pairs) and loop.time() < deadline:
+        await asyncio.sleep(args.poll / 10)
+    data_time = loop.time() - data_start
+    delivered = len(emulator.delivered) - delivered_before
+
+    emulator.stop()
+
+    spf_time = 0.0
+    if algorithm == 'ls':
+        spf_time = sum(node.router.spf_stats['time'] for node in emulator.nodes.values())
+
+    return {
+        'convergence_s': convergence,
+        'control_messages_per_node': control['messages'] / len(graph),
+        'control_bytes_per_node': control['bytes'] / len(graph),
+        'spf_cpu_s': spf_time,
+        'data_messages_per_s': delivered / data_time if data_time > 0 else None,
+        'data_delivered': delivered / len(pairs) if pairs else None,
+    }
+
+
+def run_one(topology, size, algorithm, args):
+    graph = GENERATORS[topology](size, seed=args.seed)
+    rng = random.Random(args.seed)
+
+    with tempfile.TemporaryDirectory() as directory:
+        names_file, topo_file = write_config(directory, graph)
+        build_start = perf_counter()
+        emulator = Emulator(names_file, topo_file, algorithm, args.latency, args.loss, args.seed, args.engine)
+        build_time = perf_counter() - build_start
+
+    result = asyncio.run(measure(emulator, algorithm, graph, args, rng))
+    result.update({
+        'topology': topology,
+        'nodes': size,
+        'links': sum(len(neighbors) for neighbors in graph) // 2,
+        'algorithm': algorithm,
+        'setup_s': build_time,
+    })
+    return result
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--topologies", nargs="+", default=list(GENERATORS), choices=list(GENERATORS))
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--algorithms", nargs="+", default=["flooding", "dv", "ls"], choices=["flooding", "dv", "ls"])
+    parser.add_argument("--engine", choices=["dict", "numpy"], default="dict", help="Distance vector engine.")
+    parser.add_argument("--latency", type=float, default=0.001)
+    parser.add_argument("--loss", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--messages", type=int, default=200, help="User messages sent in the data phase.")
+    parser.add_argument("--timeout", type=float, default=60, help="Max seconds to wait for convergence.")
+    parser.add_argument("--data-timeout", type=float, default=10, help="Max seconds to wait for the data phase.")
+    parser.add_argument("--poll", type=float, default=0.05, help="Convergence check interval, in seconds.")
+    parser.add_argument("--output", default="bench_output.json")
+    args = parser.parse_args()
+
+    results = []
+    for topology in args.topologies:
+        for size in args.sizes:
+            for algorithm in args.algorithms:
+                result = run_one(topology, size, algorithm, args)
+                results.append(result)
+                convergence = result['convergence_s']
+                print(f"{topology:>10} {size:>6} {algorithm:>8} "
+                      f"conv={'n/a' if convergence is None else f'{convergence:.2f}s':>8} "
+                      f"ctrl={result['control_messages_per_node']:.1f} msg/node "
+                      f"spf={result['spf_cpu_s']:.3f}s "
+                      f"data={result['data_messages_per_s'] or 0:.0f} msg/s")
+
+    report = {
+        'timestamp': time(),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'parameters': vars(args),
+        'results': results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""
+Topology generators for the benchmarks. Every generator returns an undirected
+graph as a list of neighbor sets indexed by node id.
+
+write_config turns a graph into names/topo files in the lab format.
+"""
+
+import os
+import math
+import json
+import random
+
+
+def ring(num_nodes, seed=None):
+    graph = [set() for _ in range(num_nodes)]
+    if num_nodes > 1:
+        for u in range(num_nodes):
+            v = (u + 1) % num_nodes
+            if u != v:
+                graph[u].add(v)
+                graph[v].add(u)
+    return graph
+
+
+def grid(num_nodes, seed=None):
+    """ Square-ish grid with 4-neighbor links, the last row may be partial. """
+    side = max(1, math.ceil(math.sqrt(num_nodes)))
+    graph = [set() for _ in range(num_nodes)]
+    for u in range(num_nodes):
+        row, col = divmod(u, side)
+        for v in (u + 1 if col + 1 < side else None, u + side):
+            if v is not None and v < num_nodes:
+                graph[u].add(v)
+                graph[v].add(u)
+    return graph
+
+
+def random_geometric(num_nodes, seed=None, radius=None):
+    """
+    Nodes at random points of the unit square, linked when closer than radius.
+    The default radius sits a bit above the connectivity threshold, and any
+    remaining components are chained together so the graph is connected.
+    """
+    rng = random.Random(seed)
+    if radius is None:
+        radius = math.sqrt(2 * math.log(max(num_nodes, 2)) / (math.pi * max(num_nodes, 2)))
+
+    points = [(rng.random(), rng.random()) for _ in range(num_nodes)]
+    graph = [set() for _ in range(num_nodes)]
+
+    # bucket points in radius-sized cells so only nearby cells are compared
+    cells = {}
+    for u, (x, y) in enumerate(points):
+        cells.setdefault((int(x / radius), int(y / radius)), []).append(u)
+
+    for (cx, cy), members in cells.items():
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for v in cells.get((cx + dx, cy + dy), ()):
+                    for u in members:
+                        if u < v and math.dist(points[u], points[v]) <= radius:
+                            graph[u].add(v)
+                            graph[v].add(u)
+
+    components = connected_components(graph)
+    for a, b in zip(components, components[1:]):
+        graph[a[0]].add(b[0])
+        graph[b[0]].add(a[0])
+
+    return graph
+
+
+def scale_free(num_nodes, seed=None, links=2):
+    """ Barabasi-Albert preferential attachment, each new node brings `links` links. """
+    rng = random.Random(seed)
+    graph = [set() for _ in range(num_nodes)]
+    targets = []
+
+    for u in range(num_nodes):
+        if u <= links:
+            chosen = set(range(u))
+        else:
+            chosen = set()
+            while len(chosen) < links:
+                chosen.add(rng.choice(targets))
+
+        for v in chosen:
+            graph[u].add(v)
+            graph[v].add(u)
+            targets.extend((u, v))
+
+    return graph
+
+
+GENERATORS = {
+    'ring': ring,
+    'grid': grid,
+    'geometric': random_geometric,
+    'scale-free': scale_free,
+}
+
+
+def connected_components(graph):
+    seen = [False] * len(graph)
+    components = []
+    for start in range(len(graph)):
+        if seen[start]:
+            continue
+        seen[start] = True
+        component = [start]
+        for u in component:
+            for v in graph[u]:
+                if not seen[v]:
+                    seen[v] = True
+                    component.append(v)
+        components.append(component)
+    return components
+
+
+def hop_distances(graph, source):
+    """ BFS hop count from source to every reachable node. """
+    distance = {source: 0}
+    queue = [source]
+    for u in queue:
+        for v in graph[u]:
+            if v not in distance:
+                distance[v] = distance[u] + 1
+                queue.append(v)
+    return distance
+
+
+def node_name(u):
+    return f"N{u}"
+
+
+def node_jid(u):
+    return f"n{u}@emu.local"
+
+
+def write_config(directory, graph):
+    """ Writes names.txt/topo.txt for graph in directory, returns both paths. """
+    names = {node_name(u): node_jid(u) for u in range(len(graph))}
+    topo = {node_name(u): [node_name(v) for v in sorted(graph[u])] for u in range(len(graph))}
+
+    names_file = os.path.join(directory, "names.txt")
+    topo_file = os.path.join(directory, "topo.txt")
+    with open(names_file, "w") as f:
+        json.dump({"type": "names", "config": names}, f)
+    with open(topo_file, "w") as f:
+        json.dump({"type": "topo", "config": topo}, f)
+
+    return names_file, topo_file
@@ -0,0 +1,230 @@
+"""
+Runs a whole names/topo network in one process over a transport.LoopbackNetwork,
+without an XMPP server.
+
+Usage:
+    python emulator.py --alg dv -n names-default.txt -t topo-default.txt --duration 10
+
+Instance example --> emulator = Emulator("names.txt", "topo.txt", "ls", latency=0.005)
+                     emulator.start(); ...; emulator.stop()
+"""
+
+import os
+import asyncio
+import argparse
+import logging
+
+import settings
+import link
+import routing
+import linkRouter
+import vectorDistance
+from transport import LoopbackNetwork, SocketNetwork
+from scheduler import ScheduledTransport
+import netConfig
+
+
+class Emulator(object):
+    """
+    Builds one routing node per entry of the names file, all attached to the
+    same LoopbackNetwork and wired as the topology file says.
+
+    Arguments:
+        names --> Names file in json format
+        topo --> Topology file in json format
+        algorithm --> 'flooding', 'dv' or 'ls'
+        latency --> Default one way delay of every link, in seconds
+        loss --> Default probability of dropping a message on any link
+        seed --> Seed for the loss decisions
+        engine --> Distance vector engine, 'dict' or 'numpy'
+        network --> LoopbackNetwork to attach the nodes to, a new one by default
+        members --> Node names to build, all of them by default
+        dataplane --> 'loopback' (in memory) or 'tcp' (localhost sockets, latency and loss are ignored)
+        wire --> Control message encoding of every node, 'binary' or 'json'
+        window --> Flush window of the per neighbor outbound scheduler, 0 sends right away
+        rate --> Stanzas per second each node may send, 0 for no limit
+        multipath --> Link state multipath mode, 'off', 'ecmp' or 'ucmp'
+        lfa --> Precompute loop free alternates in link state mode
+        incremental --> Repair the shortest path tree instead of a full SPF in link state mode
+        snapshots --> Directory for the warm restart snapshots of the nodes, None for none
+
+    Returns:
+        None
+    """
+    def __init__(self, names, topo, algorithm, latency=0.0, loss=0.0, seed=None, engine='dict', network=None, members=None, dataplane='loopback', wire=settings.WIRE_FORMAT,
+                 window=settings.OUTBOUND_WINDOW, rate=settings.OUTBOUND_RATE, multipath=settings.MULTIPATH,
+                 lfa=settings.LFA, incremental=settings.INCREMENTAL_SPF, snapshots=None):
+        self.names_file = names
+        self.topo_file = topo
+        self.algorithm = algorithm.lower()
+        self.wire = wire
+        self.multipath = multipath
+        self.lfa = lfa
+        self.incremental = incremental
+        self.snapshots = snapshots
+        self.engine = engine
+
+        self.config = netConfig.load(names, topo) # parsed once, shared with the routers
+        self.names = self.config.names
+        self.topo = self.config.topo
+
+        if network is None:
+            network = SocketNetwork() if dataplane == 'tcp' else LoopbackNetwork(latency, loss, seed)
+        self.network = network
+        self.nodes = {}
+        self.schedulers = {}
+        self.delivered = []
+
+        for name, jid in self.names.items():
+            if members is not None and name not in members:
+                continue
+            transport = self.network.attach(jid)
+            if window or rate:
+                transport = self.schedulers[jid] = ScheduledTransport(transport, window, rate=rate)
+            node = self.build_node(transport, name, jid, engine)
+            node.deliver = self.recorder(jid)
+            self.nodes[jid] = node
+
+    def build_node(self, transport, name, jid, engine):
+        snapshot = os.path.join(self.snapshots, jid + ".snap") if self.snapshots else None
+        if self.algorithm in ('ls', 'link'):
+            router = linkRouter.Router(jid, self.names_file, self.topo_file, multipath=self.multipath, lfa=self.lfa,
+                                       incremental=self.incremental)
+            return link.Node(transport, router, self.wire, snapshot=snapshot)
+
+        router = None
+        if self.algorithm == 'dv':
+            if engine == 'numpy':
+                router = vectorDistance.ArrayRouter(name, self.names_file, self.topo_file)
+            else:
+                router = vectorDistance.Router(name, self.names_file, self.topo_file)
+        return routing.Node(transport, self.algorithm, self.topo, self.names, router, self.wire, snapshot=snapshot)
+
+    def recorder(self, jid):
+        """ deliver() replacement that records (time, recipient, source, message, path). """
+        def deliver(source, message, nodes):
+            self.delivered.append((asyncio.get_event_loop().time(), jid, source, message, nodes))
+        return deliver
+
+    def start(self):
+        self.network.start()
+        for node in self.nodes.values():
+            node.start()
+
+    def stop(self):
+        for node in self.nodes.values():
+            node.stop()
+        self.network.close()
+
+    def restart(self, jid):
+        """
+        Replaces the node with jid by a new one, as if its process had restarted: it
+        keeps nothing but its snapshot file (with snapshots) and its transport.
+        """
+        old = self.nodes[jid]
+        old.stop()
+        transport = self.schedulers.get(jid) or self.network.attach(jid)
+        name = next(name for name, value in self.names.items() if value == jid)
+        node = self.build_node(transport, name, jid, self.engine)
+        node.deliver = old.deliver
+        self.nodes[jid] = node
+        node.start()
+        return node
+
+    def send(self, source, recipient, message, flow=None):
+        """ Sends a user message from the node with jid source to the jid recipient (flow: link state only). """
+        if flow is None:
+            return self.nodes[source].send(recipient, message)
+        return self.nodes[source].send(recipient, message, flow)
+
+    def fail_link(self, a, b, failed=True, notify=False):
+        """
+        Cuts (or restores) the link between the jids a and b: everything sent on it is lost.
+        notify tells both ends at once, like an interface going down, instead of
+        leaving it to their failure detection.
+        """
+        self.network.set_link(a, b, loss=1.0 if failed else self.network.loss)
+        if failed and notify and self.algorithm != 'flooding':
+            for end, neighbor in ((a, b), (b, a)):
+                if end in self.nodes:
+                    self.nodes[end].neighbor_down(neighbor)
+
+    def stats(self):
+        stats = {
+            'nodes': len(self.nodes),
+            'messages': sum(self.network.sent.values()),
+            'bytes': sum(self.network.sent_bytes.values()),
+            'dropped': self.network.dropped,
+            'delivered': len(self.delivered),
+            'failovers': sum(len(getattr(node, 'failovers', ())) for node in self.nodes.values()),
+        }
+        timers = [node.timer_stats for node in self.nodes.values() if hasattr(node, 'timer_stats')]
+        if timers:
+            stats['hello_rounds'] = sum(t['hellos'] for t in timers)
+            stats['lsps_originated'] = sum(t['lsps'] for t in timers)
+            stats['lsps_triggered'] = sum(t['triggered'] for t in timers)
+        if self.schedulers:
+            metrics = [scheduler.metrics() for scheduler in self.schedulers.values()]
+            stats['coalesced'] = sum(m['coalesced'] for m in metrics)
+            stats['throttled'] = sum(m['throttled'] for m in metrics)
+            stats['data_dropped'] = sum(m['dropped'] for m in metrics)
+            stats['stanzas_saved'] = sum(m['saved'] for m in metrics)
+            stats['stanzas_saved_per_s'] = sum(m['saved_per_s'] for m in metrics)
+        return stats
+
+
+async def run(args):
+    if args.shards:
+        from shardedEmulator import ShardedEmulator
+
+        emulator = ShardedEmulator(args.names, args.topo, args.alg, args.shards, args.latency, args.loss, args.seed, args.engine, args.wire)
+        sends = [(args.source, args.recipient, args.message)] if args.source and args.recipient else []
+        result = emulator.run(args.duration, sends)
+        for _, jid, source, message, nodes in result['delivered']:
+            print(f"{jid} received '{message}' from {source} through {nodes}")
+        del result['delivered']
+        print(result)
+        return
+
+    emulator = Emulator(args.names, args.topo, args.alg, args.latency, args.loss, args.seed, args.engine, dataplane=args.dataplane, wire=args.wire, window=args.window, rate=args.rate,
+                        incremental=args.incremental)
+    emulator.start()
+    await asyncio.sleep(args.duration)
+
+    if args.source and args.recipient:
+        emulator.send(args.source, args.recipient, args.message)
+        await asyncio.sleep(1)
+        for _, jid, source, message, nodes in emulator.delivered:
+            print(f"{jid} received '{message}' from {source} through {nodes}")
+
+    emulator.stop()
+    print(emulator.stats())
+
+
+if __name__=='__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--alg", dest="alg", default=settings.DEFAULT_ALG, help="Routing algorithm: 'flooding', 'dv' or 'ls'.")
+    parser.add_argument("-n", "--names", dest="names", default="names-default.txt", help="Names filename.")
+    parser.add_argument("-t", "--topo", dest="topo", default="topo-default.txt", help="Topology filename.")
+    parser.add_argument("-e", "--engine", dest="engine", choices=["dict", "numpy"], default=settings.DV_ENGINE)
+    parser.add_argument("--latency", type=float, default=0.001, help="Link latency in seconds.")
+    parser.add_argument("--loss", type=float, default=0.0, help="Link loss probability.")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--duration", type=float, default=12, help="Seconds to let the routers converge.")
+    parser.add_argument("--from", dest="source", help="JID sending a test message after convergence.")
+    parser.add_argument("--to", dest="recipient", help="JID receiving the test message.")
+    parser.add_argument("--message", default="hello")
+    parser.add_argument("--dataplane", choices=["loopback", "tcp"], default="loopback", help="In memory links or localhost TCP sockets.")
+    parser.add_argument("--wire", choices=["binary", "json"], default=settings.WIRE_FORMAT, help="Control message encoding.")
+    parser.add_argument("--window", type=float, default=settings.OUTBOUND_WINDOW, help="Outbound batching window in seconds, 0 disables it.")
+    parser.add_argument("--rate", type=float, default=settings.OUTBOUND_RATE, help="Stanzas per second per node, 0 for no limit.")
+    parser.add_argument("--incremental", action=argparse.BooleanOptionalAction, default=settings.INCREMENTAL_SPF,
+                        help="Repair the shortest path tree instead of a full SPF (link state).")
+    parser.add_argument("--shards", type=int, default=0, help="Split the topology across this many processes.")
+    parser.add_argument("-d", "--debug", action="store_const", dest="loglevel",
+                        const=logging.DEBUG, default=logging.WARNING)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=args.loglevel, format='%(levelname)-8s %(message)s')
+
+    asyncio.run(run(args))
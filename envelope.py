@@ -0,0 +1,150 @@
+"""
+Envelope of the link state messages.
+
+A message is a one line routing header followed by an opaque body:
+
+    ENV1 <kind> <source> <destination> <hops> <index> <path> <nodes> [<flow>]\n<body>
+
+Transit nodes only split and rebuild the header; the body is passed on as is,
+without decoding it. Fields are separated by single spaces, so none of them
+may contain spaces (jids and node names do not); empty fields are written as '-'.
+The flow id of a user message is only written when there is one, so headers
+without one can still be read by nodes of the previous version.
+
+Instance example --> message = Envelope("direct", "a@x", "c@x", "hello", path=["a@x", "b@x", "c@x"]).encode()
+                     envelope = parse(message)
+                     next_message = envelope.forward("b@x").encode()
+"""
+
+import json
+
+MAGIC = "ENV1"
+EMPTY = "-"
+
+
+class Envelope(object):
+    """
+    Routing header plus opaque body.
+
+    Arguments:
+        kind --> Message type: 'echo', 'ack', 'lsp' or 'direct'
+        source --> Node that created the message
+        destination --> Node the message is for
+        body --> Body as a str, never decoded by transit nodes
+        hops --> Number of hops traveled so far
+        index --> Position of the current node in path
+        path --> Source route, list of nodes (may be empty)
+        nodes --> Nodes traveled so far, concatenated
+        flow --> Flow id the multipath next hops are picked by, None for none
+
+    Returns:
+        None
+    """
+    __slots__ = ('kind', 'source', 'destination', 'body', 'hops', 'index', 'path', 'nodes', 'flow')
+
+    def __init__(self, kind, source, destination, body, hops=0, index=0, path=None, nodes="", flow=None):
+        self.kind = kind
+        self.source = source
+        self.destination = destination
+        self.body = body
+        self.hops = hops
+        self.index = index
+        self.path = path or []
+        self.nodes = nodes
+        self.flow = flow
+
+    def header(self):
+        header = " ".join((
+            MAGIC,
+            self.kind,
+            self.source or EMPTY,
+            self.destination or EMPTY,
+            str(self.hops),
+            str(self.index),
+            ",".join(self.path) or EMPTY,
+            self.nodes or EMPTY,
+        ))
+        return header if self.flow is None else header + " " + self.flow
+
+    def encode(self):
+        return self.header() + "\n" + self.body
+
+    def forward(self, node, destination=None):
+        """
+        Envelope to send on after node handled this one: one more hop, node added
+        to the traveled nodes and, optionally, a new destination (used by floods).
+        The body is shared, not copied.
+        """
+        return Envelope(
+            self.kind,
+            self.source,
+            self.destination if destination is None else destination,
+            self.body,
+            self.hops + 1,
+            self.index + 1,
+            self.path,
+            self.nodes + node,
+            self.flow,
+        )
+
+    def next_on_path(self, node):
+        """ Node after node in the source route, None if it is not on it. """
+        if self.index + 1 < len(self.path) and self.path[self.index] == node:
+            return self.path[self.index + 1]
+        if node in self.path:
+            position = self.path.index(node)
+            if position + 1 < len(self.path):
+                return self.path[position + 1]
+        return None
+
+    def payload(self):
+        """ Body decoded as json, for the message kinds that carry a dict. """
+        return json.loads(self.body)
+
+
+def parse(message):
+    """
+    Splits message into header fields and body. Only the header is decoded.
+
+    Messages in the older all-json format are converted, so nodes running
+    the previous version still interoperate.
+
+    Arguments:
+        message --> Message as received from the transport
+
+    Returns:
+        Envelope
+    """
+    if message.startswith("{"):
+        return parse_legacy(message)
+
+    end = message.find("\n")
+    if end < 0:
+        raise ValueError("Envelope without header")
+
+    fields = message[:end].split(" ")
+    if len(fields) not in (8, 9) or fields[0] != MAGIC:
+        raise ValueError(f"Unknown envelope header: {message[:end]}")
+
+    _, kind, source, destination, hops, index, path, nodes = fields[:8]
+    return Envelope(
+        kind,
+        None if source == EMPTY else source,
+        None if destination == EMPTY else destination,
+        message[end+1:],
+        int(hops),
+        int(index),
+        [] if path == EMPTY else path.split(","),
+        "" if nodes == EMPTY else nodes,
+        fields[8] if len(fields) == 9 else None,
+    )
+
+
+def parse_legacy(message):
+    message = json.loads(message)
+    payload = message["payload"]
+    kind = payload["type"]
+    path = payload.get("path") or []
+    body = payload["message"] if kind == "direct" else json.dumps(payload)
+    return Envelope(kind, message["from_node"], message["to_node"], body,
+                    message.get("jumps", 0), 0, path, message.get("nodes", ""))
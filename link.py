@@ -1,20 +1,24 @@
 
 import asyncio
-import re
 import settings
-import sys
+import netConfig
 import argparse
-import json
-import random
+import logging
 from time import time
 
 import slixmpp
-from slixmpp.exceptions import IqError, IqTimeout, XMPPError
+from slixmpp.exceptions import IqError, IqTimeout
 from aioconsole import ainput
 
-from linkRouter import Router
-
-from vectorDistance import read_file
+from linkRouter import Router, flow_key
+from transport import XMPPTransport, SocketTransport, CONTROL, DATA, PROBE
+from envelope import Envelope, parse
+from wire import WireCodec
+from scheduler import ScheduledTransport
+from timers import Backoff
+from liveness import Liveness
+from routeWorker import RouteWorker
+from warmStart import Snapshot
 
 
 def clean_jid(jid, domain="@alumchat.xyz"):
@@ -24,16 +28,369 @@ def clean_jid(jid, domain="@alumchat.xyz"):
     return jid
 
 
+class Node(object):
+    """
+    Link state routing logic of one router. Messages go through a transport,
+    so the node runs the same over XMPP or inside the emulator.
+
+    Arguments:
+        transport --> transport.Transport used to reach the neighbors
+        router --> linkRouter.Router of this node
+        wire --> Control message encoding, 'binary' (negotiated) or 'json'
+        hello --> Seconds between echo probes after a link changed
+        hello_max --> Longest probe interval reached while the links are stable
+        lsp_interval --> Hold down between two triggered LSPs
+        refresh --> First periodic re-flood of the own LSP after it changed
+        max_refresh --> Longest re-flood interval reached while nothing changes
+        jitter --> Max fraction every interval is shortened by
+        detect_interval --> Silence before a neighbor is probed, 0 disables failure detection
+        detect_multiplier --> Silent intervals before a neighbor is declared down
+        executor --> Where routes are computed: 'inline', 'thread' or 'process'
+        snapshot --> File for the warm restart snapshots, None for none
+
+    Returns:
+        None
+    """
+    def __init__(self, transport, router, wire=settings.WIRE_FORMAT, hello=settings.HELLO_INTERVAL,
+                 hello_max=settings.HELLO_MAX_INTERVAL, lsp_interval=settings.LSP_MIN_INTERVAL,
+                 refresh=settings.LSP_REFRESH, max_refresh=settings.LSP_MAX_REFRESH, jitter=settings.TIMER_JITTER,
+                 detect_interval=settings.DETECT_INTERVAL, detect_multiplier=settings.DETECT_MULTIPLIER,
+                 executor=settings.SPF_EXECUTOR, snapshot=None):
+        self.transport = transport
+        self.router = router
+        self.wire = WireCodec(router.users, binary=(wire == 'binary'))
+        self.suppressed_floods = 0 # LSP re-floods avoided by the LSDB checks
+        self.worker = RouteWorker(router, executor)
+
+        self.hello = Backoff(hello, hello_max, jitter)
+        self.refresh = Backoff(refresh, max_refresh, jitter)
+        self.lsp_interval = lsp_interval
+        self.last_lsp = None # loop time the own LSP was last flooded
+        self.lsp_pending = False # a triggered LSP waits for the hold down
+        self.timers = {} # 'hello' / 'lsp' / 'age' / 'liveness' / 'snapshot' / 'confirm' -> TimerHandle
+        self.timer_stats = {'hellos': 0, 'lsps': 0, 'triggered': 0, 'refreshes': 0}
+
+        self.detect = Backoff(detect_interval, detect_interval, jitter)
+        self.detect_multiplier = detect_multiplier
+        self.liveness = None # built by start(), with the loop clock
+        self.failovers = [] # (loop time, neighbor) of every neighbor declared down
+
+        self.snapshot = Snapshot(snapshot, router.users) if snapshot else None
+
+        self.transport.set_handler(self.receive_message)
+
+    def start(self):
+        if self.snapshot is not None:
+            if self.snapshot.load_link_state(self.router):
+                self.schedule('confirm', settings.WARM_START_CONFIRM, self.confirm_warm_start)
+                self.worker.request()
+            self.schedule('snapshot', settings.SNAPSHOT_INTERVAL, self.save_snapshot)
+        # the neighbors' LSDBs fill ours (and confirm a loaded one) without waiting for their refreshes
+        for neighbor in self.router.neighbors:
+            self.direct_message(neighbor, self.create_message(neighbor, {'type': "lsdb-request"}).encode())
+
+        # first probe somewhere in the first jitter slice, so nodes started together do not sync up
+        self.schedule('hello', self.hello.initial - self.hello.peek(), self.send_hellos)
+        self.schedule('lsp', self.refresh.next(), self.refresh_lsp)
+        self.schedule('age', self.router.aging.tick, self.age_lsdb)
+        if self.detect.initial:
+            now = asyncio.get_event_loop().time()
+            self.liveness = Liveness(self.router.neighbors, self.detect.initial, self.detect_multiplier, now)
+            self.schedule('liveness', self.detect.next(), self.check_liveness)
+        self.router.config.watch(self.config_changed)
+
+    def stop(self):
+        self.router.config.unwatch(self.config_changed)
+        for timer in self.timers.values():
+            timer.cancel()
+        self.timers = {}
+        self.worker.cancel()
+        if self.snapshot is not None:
+            self.snapshot.save_link_state(self.router)
+
+    def schedule(self, name, delay, callback):
+        """ (Re)arms the timer name, replacing its pending expiration. """
+        timer = self.timers.pop(name, None)
+        if timer is not None:
+            timer.cancel()
+        self.timers[name] = asyncio.get_event_loop().call_later(delay, callback)
+
+    def send(self, recipient, msg, flow=None):
+        """
+        Sends a user message along the shortest path, or one of the equal cost ones
+        picked by flow. Returns False if there is no route.
+        """
+        if flow is not None:
+            flow = "".join(str(flow).split()) or None # it travels as a header field
+        route = self.router.route(recipient, flow_key(self.router.name, recipient, flow))
+        if route is None:
+            print(f"Unknown route to {recipient}")
+            return False
+
+        next_hop, path = route
+        envelope = self.create_direct_message(recipient, msg, path, flow)
+        if not self.direct_message(next_hop, envelope.encode(), priority=DATA):
+            print(f"Outbound queue to {next_hop} is full, message dropped")
+            return False
+        return True
+
+    def deliver(self, sender, msg, nodes_traveled):
+        """ Called when a user message reaches its destination. """
+        print("Mensaje: ", msg)
+        print(f"Recorrido: {nodes_traveled}")
+
+    def send_hellos(self):
+        """ Probes every neighbor, less and less often while the weights do not change. """
+        self.timer_stats['hellos'] += 1
+        for neighbor in self.router.neighbors:
+            self.send_echo_message(neighbor)
+        self.schedule('hello', self.hello.next(), self.send_hellos)
+
+    def refresh_lsp(self):
+        self.timer_stats['refreshes'] += 1
+        self.originate()
+
+    def trigger_lsp(self, urgent=False):
+        """
+        A link weight changed: flood the LSP now, or when the hold down since the previous
+        one ends. urgent (a lost neighbor) skips the hold down.
+        """
+        self.hello.reset()
+        self.refresh.reset()
+        hello = self.timers.get('hello')
+        if hello is not None and hello.when() - asyncio.get_event_loop().time() > self.hello.initial:
+            self.schedule('hello', self.hello.next(), self.send_hellos) # keep up with the changing link
+
+        if self.lsp_pending and not urgent:
+            return # the pending one will carry this change too
+        self.timer_stats['triggered'] += 1
+        wait = 0 if self.last_lsp is None or urgent else self.last_lsp + self.lsp_interval - asyncio.get_event_loop().time()
+        if wait <= 0:
+            self.originate()
+        else:
+            self.lsp_pending = True
+            self.schedule('lsp', wait, self.originate)
+
+    def originate(self):
+        self.lsp_pending = False
+        self.last_lsp = asyncio.get_event_loop().time()
+        self.timer_stats['lsps'] += 1
+        self.flooding()
+        self.schedule('lsp', self.refresh.next(), self.refresh_lsp)
+
+    def age_lsdb(self):
+        """ Purges the LSPs that aged out and floods the purges, so every router drops them together. """
+        purges = self.router.age_lsdb()
+        for purge in purges:
+            flood_msg = {'type': "lsp", 'lsp': purge} # JSON, the binary LSP has no purge flag
+            for neighbor in self.router.neighbors_distance:
+                envelope = self.create_message(neighbor, flood_msg)
+                self.send_direct_message(neighbor, envelope, key="lsp:" + purge['origin'])
+        if purges:
+            self.worker.request()
+        self.schedule('age', self.router.aging.tick, self.age_lsdb)
+
+    def save_snapshot(self):
+        self.snapshot.save_link_state(self.router)
+        self.schedule('snapshot', settings.SNAPSHOT_INTERVAL, self.save_snapshot)
+
+    def confirm_warm_start(self):
+        """ Drops the loaded LSPs that no neighbor sent us again: their origins are gone. """
+        if self.router.drop_provisional():
+            self.worker.request()
+
+    def check_liveness(self):
+        """ Probes the neighbors that went silent and fails over from the ones that stayed silent. """
+        now = asyncio.get_event_loop().time()
+        for neighbor in self.liveness.expired(now):
+            self.neighbor_down(neighbor)
+        for neighbor in self.liveness.silent(now):
+            self.send_echo_message(neighbor)
+        self.schedule('liveness', self.detect.next(), self.check_liveness)
+
+    def neighbor_down(self, neighbor):
+        """ neighbor stopped answering: route around it right away and tell everyone. """
+        if self.router.neighbor_down(neighbor):
+            self.failovers.append((asyncio.get_event_loop().time(), neighbor))
+            # traffic already moved to the alternates (if any), the SPF runs in the worker
+            self.worker.request()
+            asyncio.get_event_loop().call_soon(self.trigger_lsp, True)
+
+    def neighbor_up(self, neighbor):
+        """
+        neighbor answers again. The echo measures the link (its first sample brings the
+        link back into our LSP) and the LSDB goes along, since it may have restarted empty.
+        """
+        self.send_echo_message(neighbor)
+        self.send_lsdb(neighbor)
+
+    def config_changed(self, changes):
+        """ The topology file changed: links to us are added or removed without a restart. """
+        self.wire.add_nodes(self.router.users)
+        if self.snapshot is not None:
+            self.snapshot.add_nodes(self.router.users)
+        if self.router.id not in changes:
+            return
+        added, removed = changes[self.router.id]
+        now = asyncio.get_event_loop().time()
+
+        for node in removed:
+            neighbor = self.router.users.get(node)
+            if self.router.remove_neighbor(neighbor) and self.liveness is not None:
+                self.liveness.remove(neighbor)
+        for node in added:
+            neighbor = self.router.users.get(node)
+            if self.router.add_neighbor(neighbor):
+                if self.liveness is not None:
+                    self.liveness.add(neighbor, now)
+                self.send_echo_message(neighbor)
+                self.send_lsdb(neighbor)
+
+        self.trigger_lsp(True)
+        self.worker.request()
+
+    def send_lsdb(self, neighbor):
+        now = time()
+        for origin in self.router.packages:
+            envelope = self.create_message(neighbor, {'type': "lsp", 'lsp': self.router.outgoing_lsp(origin, now)})
+            self.direct_message(neighbor, envelope.encode(), key="lsp:" + origin)
+
+
+    def flooding(self):
+        own_lsp = self.router.build_package()
+        flood_msg = {
+            'type': "lsp",
+            'lsp': own_lsp,
+        }
+
+        for neighbor in self.router.neighbors_distance: # live neighbors
+            envelope = self.create_message(neighbor, flood_msg)
+            self.send_direct_message(neighbor, envelope, key="lsp:" + self.router.name)
+
+        self.worker.request()
+
+    def send_echo_message(self, neighbor):
+        echo_msg = {
+            'type': "echo" ,
+            'timestamp': time()
+        }
+        envelope = self.create_message(neighbor, echo_msg)
+        # straight to it, even when it looks down, and not held back with queued traffic
+        self.direct_message(neighbor, envelope.encode(), key="echo", priority=PROBE)
+    
+    def receive_message(self, relay, message):
+        # only the routing header is decoded here, bodies are decoded by the kinds that use them
+        envelope = parse(message)
+        sender = envelope.source
+        # capabilities are learned from bodies the relay wrote itself, not from ones it passes on
+        origin = relay if sender == relay else None
+        if self.liveness is not None and self.liveness.heard(relay, asyncio.get_event_loop().time()):
+            self.neighbor_up(relay)
+
+        if "echo" == envelope.kind:
+            ack_msg = {
+                'type': "ack",
+                'start_timestamp': self.wire.loads(envelope.body, origin)['timestamp']
+            }
+            ack = self.create_message(sender, ack_msg)
+            self.direct_message(relay, ack.encode(), priority=PROBE)
+
+        elif "ack" == envelope.kind:
+            start_time = self.wire.loads(envelope.body, origin)['start_timestamp']
+            if sender is not None:
+                end_time = time()
+                time_diff = (end_time - start_time) / 2 
+                if self.router.observe_delay(sender, time_diff):
+                    self.trigger_lsp()
+
+        elif "lsdb-request" == envelope.kind:
+            self.send_lsdb(relay)
+
+        elif "lsp" == envelope.kind:
+            payload = self.wire.loads(envelope.body, origin)
+            received_lsp = payload['lsp']
+            own_seq = self.router.package['seq']
+            flood_to = [neighbor for neighbor in self.router.neighbors_distance if neighbor not in (sender, relay)]
+
+            if not self.router.install_lsp(received_lsp):
+                # duplicate or older copy, stop the flood here
+                self.suppressed_floods += len(flood_to)
+                if received_lsp['origin'] == self.router.name and (received_lsp.get('purge') or self.router.package['seq'] > own_seq):
+                    # our LSP aged out somewhere, or one from before a restart is still around: put a newer one in its place
+                    self.trigger_lsp(True)
+                return
+
+            self.worker.request() # the flood goes on while the routes are computed
+
+            for neighbor in flood_to:
+                self.send_direct_message(neighbor, self.resend_message(neighbor, envelope, payload),
+                                         key="lsp:" + received_lsp['origin'])
+        
+        elif "direct" == envelope.kind:
+            if envelope.destination == self.router.name:
+                self.deliver(sender, envelope.body, envelope.nodes)
+            else:
+                logging.debug('reenviando')
+                # the origin's flow key, so the flow keeps one path whatever hop it came from
+                next_hop = self.router.next_hop(envelope.destination, flow_key(envelope.source, envelope.destination, envelope.flow))
+                if next_hop is None: # no table yet, follow the source route
+                    next_hop = envelope.next_on_path(self.router.name)
+                if next_hop is None:
+                    logging.debug(f"Unknown route to {envelope.destination}, dropping message")
+                    return
+                self.direct_message(next_hop, envelope.forward(self.router.name).encode(), priority=DATA)
+
+    def create_direct_message(self, recipient, message, path, flow=None):
+        """ Envelope for a user message, the body is the message itself. """
+        return Envelope("direct", self.router.name, recipient, message, path=path, nodes=self.router.name, flow=flow)
+
+    def direct_message(self, send_to, message, key=None, priority=CONTROL):
+        return self.transport.send(send_to, message, key, priority)
+
+    def send_direct_message(self, send_to, envelope, key=None):
+        """ Sends envelope towards its destination; key lets a newer queued message replace this one. """
+        routes = self.router.get_routes(envelope.destination)
+        if len(routes) == 0:
+            print(f"Unknown route to {envelope.destination}")
+        else:
+            send_to = self.router.pick(routes, flow_key(envelope.source, envelope.destination, envelope.flow))
+
+        self.direct_message(send_to, envelope.encode(), key)
+    
+    def create_message(self, recipient, payload):
+        body = self.wire.dumps(payload, recipient)
+        return Envelope(payload['type'], self.router.name, recipient, body, nodes=self.router.name)
+
+    def resend_message(self, recipient, envelope, payload):
+        """
+        Copy of a flooded envelope for the next neighbor. The LSP body is not re-encoded,
+        unless it is binary and the neighbor has not negotiated binary.
+        """
+        forwarded = envelope.forward(self.router.name, destination=recipient)
+        if self.wire.is_binary(envelope.body) and recipient not in self.wire.peers:
+            forwarded.body = self.wire.dumps(payload, recipient)
+        return forwarded
+
+
 class Client(slixmpp.ClientXMPP):
 
-    def __init__(self, jid, password, algorithm:str, topo:dict, names:dict):
+    def __init__(self, jid, password, algorithm:str, topo:dict, names:dict, dataplane=None, timers=None,
+                 executor=settings.SPF_EXECUTOR, snapshot=None, incremental=settings.INCREMENTAL_SPF):
         super().__init__(jid, password)
 
         self.nick = None
 
         self.algorithm = algorithm
 
-        self.router = Router(jid)
+        self.router = Router(jid, incremental=incremental)
+        self.transport = XMPPTransport(self)
+        self.dataplane = None
+        if dataplane: # host:port for direct TCP links to the neighbors, XMPP stays for bootstrap
+            host, port = dataplane.rsplit(":", 1)
+            self.transport = self.dataplane = SocketTransport(self.boundjid.bare, host, int(port), fallback=self.transport)
+        # even with batching off (window and rate 0) it splits the batches neighbors send
+        self.transport = ScheduledTransport(self.transport)
+        self.routing = Node(self.transport, self.router, executor=executor, snapshot=snapshot, **(timers or {})) # timers: hello/LSP intervals of Node
 
         if self.algorithm.lower()=='flooding':
             self.counter = 0
@@ -46,7 +403,6 @@ class Client(slixmpp.ClientXMPP):
         # EVENT HANDLERS
         self.add_event_handler("session_start", self.session_start)
         self.add_event_handler("session_start", self.app)
-        self.add_event_handler("message", self.receive_message)
 
 
     async def session_start(self, event):
@@ -75,7 +431,7 @@ class Client(slixmpp.ClientXMPP):
     
     async def app(self, event):
 
-        self.setup_router()
+        await self.setup_router()
         IN_APP_LOOP = True
 
         while IN_APP_LOOP:
@@ -93,12 +449,8 @@ class Client(slixmpp.ClientXMPP):
 
                 
                 msg = str(await ainput(">> "))
-                self.router.set_distances(self.router.matrix)
-                self.router.dijkstra(self.router.name)
-                path = self.router.shortest_path(self.router.name, recipient)
-                msg_payload = {'type': 'direct', 'message': msg, 'path': path}
-                message = self.create_direct_message(recipient, msg_payload)
-                self.direct_message(path[1],message)
+                await self.transport.drain() # wait for room instead of dropping
+                self.routing.send(recipient, msg)
 
             elif option==10: # Exit
                 print("Exit")
@@ -108,176 +460,58 @@ class Client(slixmpp.ClientXMPP):
             else:
                 print("Not a valid option.")
 
-    def setup_router(self):
-        self.loop.create_task(self.refresh_topology_packages())
+    async def setup_router(self):
+        if self.dataplane is not None:
+            await self.dataplane.start()
+            self.dataplane.announce(self.router.neighbors)
+        self.routing.start()
         print("Setting up router...")
-
-    async def refresh_topology_packages(self):
-        while True:
-            for neighbor in self.router.neighbors:
-                self.send_echo_message(neighbor)
-
-            await asyncio.sleep(5)
-
-            self.flooding()
-
-
-    def flooding(self):
-        own_lsp = self.router.build_package()
-        flood_msg = {
-            'type': "lsp",
-            'lsp': own_lsp,
-        }
-
-        for neighbor in self.router.neighbors:
-            msg = self.create_message(neighbor, flood_msg)
-            self.send_direct_message(neighbor, msg)
-
-    def send_echo_message(self, neighbor):
-        echo_msg = {
-            'type': "echo" ,
-            'timestamp': time()
-        }
-        msg = self.create_message(neighbor, echo_msg)
-        self.send_direct_message(neighbor, msg)
-    
-    def receive_message(self, message):
-        message_type = str(message['type'])
-        if message_type == 'chat':
-            body_json = str(message['body'])
-            body = json.loads(body_json)
-            
-            sender = body["from_node"]
-            recipient = body["to_node"]
-            nodes_traveled = body["nodes"]
-            payload = body["payload"]
-            msg_type = payload["type"]
-            if "echo"  == msg_type:
-                received_time = payload['timestamp']
-                ack_msg = {
-                    'type': "ack",
-                    'start_timestamp': received_time
-                }
-                ack_msg_json = self.create_message(sender, ack_msg)
-                message.reply(ack_msg_json).send()
-
-            elif "ack" == msg_type:
-                start_time = payload['start_timestamp']
-                if sender is not None:
-                    end_time = time()
-                    time_diff = (end_time - start_time) / 2 
-                    self.router.change_weight(sender, time_diff)
-
-            elif "lsp" == msg_type:
-                received_lsp = payload['lsp']
-
-                self.router.change_neighbor_package(sender, received_lsp)
-                self.router.build_graph_matrix()
-
-                
-                for neighbor in self.router.neighbors:
-                    if neighbor != sender:
-                        resend_msg = self.resend_message(neighbor, payload, nodes_traveled)
-                        self.send_direct_message(neighbor, resend_msg)
-            
-            elif "direct" == msg_type:
-                if recipient == self.router.name:
-                    print("Mensaje: ", payload['message'])
-                    print(f"Recorrido: {nodes_traveled}")
-                else:
-                    print('reenviando')
-                    path = payload['path']
-                    print(path)
-                    index = path.index(self.router.name)
-                    print(index)
-                    msg = self.create_direct_message(path[index+1],payload, path[0], nodes_traveled)
-                    self.direct_message(path[index+1],msg)
-
-    def create_direct_message(self, recipient, payload, sender = None, nodes = ''):
-        if sender == None:
-            sender = self.router.name
-        new_message = {
-            "from_node": sender,
-            "to_node": recipient,
-            "jumps": 0,
-            "distance": 0,
-            "nodes": nodes,
-            "payload": payload
-        }
-
-        new_message["nodes"] += f"{self.router.name}"
-        new_message = json.dumps(new_message)
-        return new_message
-
-
-    def direct_message(self, send_to, message):
-        self.send_message(
-            mto = send_to,
-            mbody = message,
-            mtype = 'chat',
-            mfrom = self.jid
-        )
-
-    def send_direct_message(self, send_to, message):
-        message = json.loads(message)
-        routes = self.router.get_routes(message["to_node"])
-        if len(routes) == 0:
-            print(f"Unknown route to {message['to_node']}")
-        else:
-            send_to = random.choice(routes)
-            message["jumps"] += 1
-            message["distance"] += 1
-
-        self.direct_message(send_to, json.dumps(message))
-    
-    def create_message(self, recipient, payload, nodes = ""):
-        new_message = {
-            "from_node": self.router.name,
-            "to_node": recipient,
-            "jumps": 0,
-            "distance": 0,
-            "nodes": nodes,
-            "payload": payload
-        }
-
-        new_message["nodes"] += f"{self.router.name}"
-        new_message = json.dumps(new_message)
-        return new_message
-
-    def resend_message(self, recipient, payload, nodes = ""):
-        lsp = payload['lsp']
-        new_message = {
-            "from_node": lsp['origin'],
-            "to_node": recipient,
-            "jumps": 0,
-            "distance": 0,
-            "nodes": nodes,
-            "payload": payload
-        }
-
-        new_message["nodes"] += f"{self.router.name}"
-        new_message = json.dumps(new_message)
-        return new_message
             
 
 
 if __name__=='__main__':
     parser = argparse.ArgumentParser()
     parser.add_argument("--alg", dest='alg', help="Routing algorithm to use.")
+    parser.add_argument("--dataplane", dest='dataplane', help="host:port to exchange routed traffic with the neighbors over TCP.")
+    parser.add_argument("--hello", type=float, default=settings.HELLO_INTERVAL, help="Seconds between echo probes after a link changed.")
+    parser.add_argument("--hello-max", type=float, default=settings.HELLO_MAX_INTERVAL, help="Longest probe interval while the links are stable.")
+    parser.add_argument("--lsp-interval", type=float, default=settings.LSP_MIN_INTERVAL, help="Min seconds between two triggered LSPs.")
+    parser.add_argument("--refresh", type=float, default=settings.LSP_REFRESH, help="First periodic LSP re-flood after a change.")
+    parser.add_argument("--max-refresh", type=float, default=settings.LSP_MAX_REFRESH, help="Longest LSP re-flood interval while nothing changes.")
+    parser.add_argument("--jitter", type=float, default=settings.TIMER_JITTER, help="Max fraction every timer interval is shortened by.")
+    parser.add_argument("--detect-interval", type=float, default=settings.DETECT_INTERVAL, help="Silence before a neighbor is probed, 0 disables failure detection.")
+    parser.add_argument("--detect-multiplier", type=int, default=settings.DETECT_MULTIPLIER, help="Silent intervals before a neighbor is declared down.")
+    parser.add_argument("--executor", choices=["inline", "thread", "process"], default=settings.SPF_EXECUTOR, help="Where routes are computed.")
+    parser.add_argument("--snapshot", help="File to save the routing state to, and to warm restart from.")
+    parser.add_argument("--incremental", action=argparse.BooleanOptionalAction, default=settings.INCREMENTAL_SPF,
+                        help="Repair the shortest path tree instead of a full SPF on every change.")
 
     args = parser.parse_args()
+    timers = {
+        'hello': args.hello,
+        'hello_max': args.hello_max,
+        'lsp_interval': args.lsp_interval,
+        'refresh': args.refresh,
+        'max_refresh': args.max_refresh,
+        'jitter': args.jitter,
+        'detect_interval': args.detect_interval,
+        'detect_multiplier': args.detect_multiplier,
+    }
 
     # TODO: parametrize topo and names files?
-    names = read_file('names-default.txt')
-    topo = read_file('topo-default.txt')
+    config = netConfig.load(settings.NAMES_FILE, settings.TOPO_FILE)
+    names = config.names
+    topo = config.topo
     jid = input('JID: ')
     password = input('Password: ')
     if args.alg:
         print(f"Router ON with {args.alg} routing algorithm.")
         print(f"Running node: {settings.JID}")
-        xmpp = Client(jid, password, args.alg, topo=topo, names=names)
+        xmpp = Client(jid, password, args.alg, topo=topo, names=names, dataplane=args.dataplane, timers=timers, executor=args.executor,
+                      snapshot=args.snapshot, incremental=args.incremental)
     else:
-        xmpp = Client(settings.JID, settings.PASSWORD, settings.DEFAULT_ALG, topo=topo, names=names)
+        xmpp = Client(settings.JID, settings.PASSWORD, settings.DEFAULT_ALG, topo=topo, names=names, dataplane=args.dataplane, timers=timers, executor=args.executor,
+                      snapshot=args.snapshot, incremental=args.incremental)
 
     xmpp.connect()
     xmpp.process(forever=False)
\ No newline at end of file
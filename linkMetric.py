@@ -0,0 +1,72 @@
+"""
+Link weights out of echo/ack delay samples.
+
+Every sample goes through a Jacobson style estimator (smoothed delay and
+mean deviation, as TCP does for its RTT). The advertised weight is the
+smoothed delay rounded to a bucket, and it only moves when the estimate
+leaves a hysteresis band around the current weight, so jitter does not
+make the router originate new LSPs.
+
+Instance example --> metric = LinkMetric()
+                     if metric.sample(0.012): router.change_weight(neighbor, metric.weight)
+"""
+
+import settings
+
+
+class LinkMetric(object):
+    """
+    Delay estimator and advertised weight of one link.
+
+    Arguments:
+        alpha --> Gain of the smoothed delay (1/8 in TCP)
+        beta --> Gain of the mean deviation (1/4 in TCP)
+        quantum --> Bucket size of the advertised weight, in seconds
+        hysteresis --> Fraction of the current weight the estimate has to move
+                       before the weight changes
+
+    Returns:
+        None
+    """
+    def __init__(self, alpha=settings.LINK_METRIC_ALPHA, beta=settings.LINK_METRIC_BETA,
+                 quantum=settings.LINK_METRIC_QUANTUM, hysteresis=settings.LINK_METRIC_HYSTERESIS):
+        self.alpha = alpha
+        self.beta = beta
+        self.quantum = quantum
+        self.hysteresis = hysteresis
+
+        self.srtt = None # smoothed delay
+        self.rttvar = 0.0 # mean deviation of the delay
+        self.weight = None # advertised weight
+        self.samples = 0
+        self.changes = 0
+
+    def quantize(self, value):
+        # never 0: a 0 weight reads as "no link" in the topology
+        return max(1, round(value / self.quantum)) * self.quantum
+
+    def sample(self, delay):
+        """
+        Adds a delay sample.
+
+        Returns:
+            True if the advertised weight changed
+        """
+        self.samples += 1
+        if self.srtt is None:
+            self.srtt = delay
+            self.rttvar = delay / 2
+        else:
+            self.rttvar += self.beta * (abs(delay - self.srtt) - self.rttvar)
+            self.srtt += self.alpha * (delay - self.srtt)
+
+        weight = self.quantize(self.srtt)
+        if self.weight is not None:
+            # the band grows with the measured deviation so noisy links need a bigger move
+            band = max(self.quantum, self.hysteresis * self.weight, self.rttvar)
+            if weight == self.weight or abs(self.srtt - self.weight) <= band:
+                return False
+
+        self.weight = weight
+        self.changes += 1
+        return True
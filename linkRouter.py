@@ -1,212 +1,677 @@
 import sys
-from time import time
+import math
+import zlib
+from time import time, perf_counter
 from settings import *
-import json
 import numpy as np
 
+import netConfig
+import shortestPath
+from linkMetric import LinkMetric
+from timers import TimerWheel
+
+
+def flow_key(source, destination, flow=None):
+    """ Hash key of a flow: every message with the same key takes the same next hop. """
+    return f"{source} {destination} {flow or ''}"
+
+
+def rendezvous(key, hops):
+    """
+    Weighted rendezvous (highest random weight) hashing.
+
+    Arguments:
+        key --> Flow key
+        hops --> List of (next hop, weight)
+
+    Returns:
+        The next hop key maps to. When a hop is added or removed only the keys
+        that map to it move, and every hop gets keys in proportion to its weight.
+    """
+    best, best_score = None, -1.0
+    for hop, weight in hops:
+        draw = (zlib.crc32(f"{key} {hop}".encode()) + 1) / 4294967297 # in (0, 1)
+        score = -weight / math.log(draw)
+        if score > best_score:
+            best, best_score = hop, score
+    return best
+
+
+class RouteTable(object):
+    """
+    Everything one route computation produces: the shortest path tree, the
+    forwarding table, the multipath sets and the alternates. It is built apart
+    from the router and installed in one go, so lookups never mix two versions.
+    """
+    __slots__ = ('version', 'distance', 'previous', 'first_hop', 'forwarding', 'multipath',
+                 'backups', 'destinations', 'time')
+
+
+def compute_routes(graph, source, jids, version, multipath=MULTIPATH, lfa=LFA, tree=None):
+    """
+    Routes of source over a topology. Only reads its arguments, so it can run in
+    an executor on a Router.snapshot().
+
+    Arguments:
+        graph --> List (or tuple) of adjacency dicts indexed by node id
+        source --> Id of the router the routes are for
+        jids --> jid of every node id
+        version --> Topology version graph belongs to
+        multipath --> 'off', 'ecmp' or 'ucmp'
+        lfa --> Also pick the loop free alternates
+        tree --> (distance, previous, first_hop) if already known (dynamic SPF)
+
+    Returns:
+        RouteTable
+    """
+    start = perf_counter()
+    distance, previous, first_hop = tree if tree is not None else shortestPath.dijkstra(graph, source)
+
+    forwarding = {}
+    for node, hop in enumerate(first_hop):
+        if hop is not None:
+            path = shortestPath.build_path(previous, source, node)
+            forwarding[jids[node]] = (jids[hop], [jids[n] for n in path])
+
+    # trees of every neighbor, for ucmp and the alternates
+    neighbor_distance = neighbor_previous = None
+    if lfa or multipath == 'ucmp':
+        neighbor_trees = {hop: shortestPath.dijkstra(graph, hop) for hop in graph[source]}
+        neighbor_distance = {hop: tree[0] for hop, tree in neighbor_trees.items()}
+        neighbor_previous = {hop: tree[1] for hop, tree in neighbor_trees.items()}
+
+    routes = RouteTable()
+    routes.version = version
+    routes.distance, routes.previous, routes.first_hop = distance, previous, first_hop
+    routes.forwarding = forwarding
+    routes.multipath = multipath_hops(graph, source, jids, distance, neighbor_distance, multipath)
+    routes.backups, routes.destinations = {}, len(forwarding)
+    if lfa:
+        routes.backups = loop_free_alternates(graph, source, jids, distance, first_hop, neighbor_distance, neighbor_previous)
+    routes.time = perf_counter() - start
+    return routes
+
+
+def multipath_hops(graph, source, jids, distance, neighbor_distance, mode):
+    """
+    Destinations with more than one usable next hop. 'ecmp' keeps the first hops
+    of every shortest path, all with weight 1. 'ucmp' also keeps neighbors whose
+    path is up to UCMP_STRETCH costlier, as long as they are closer to the
+    destination than we are (so they never send it back), weighted by best / cost.
+    """
+    multipath = {}
+
+    if mode == 'ecmp':
+        for node, hops in enumerate(shortestPath.equal_cost_hops(graph, source, distance)):
+            if len(hops) > 1:
+                multipath[jids[node]] = [(jids[hop], 1) for hop in sorted(hops)]
+
+    elif mode == 'ucmp':
+        links = graph[source]
+        for node, best in enumerate(distance):
+            if node == source or best == shortestPath.INFINITY:
+                continue
+            hops = []
+            for hop, hop_distance in neighbor_distance.items():
+                cost = links[hop] + hop_distance[node]
+                if hop_distance[node] < best and cost <= (1 + UCMP_STRETCH) * best:
+                    hops.append((jids[hop], best / cost))
+            if len(hops) > 1:
+                multipath[jids[node]] = hops
+
+    return multipath
+
+
+def loop_free_alternates(graph, source, jids, distance, first_hop, neighbor_distance, neighbor_previous):
+    """
+    Loop free alternate (RFC 5286) of every destination: a neighbor n, other than
+    the primary next hop p, that does not send the destination d back through
+    us, D(n, d) < D(n, s) + D(s, d). Alternates that also avoid p itself
+    (D(n, d) < D(n, p) + D(p, d)) go first, then the cheapest one.
+
+    Returns:
+        Dict {destination jid: (alternate next hop jid, path through it)}, like the
+        forwarding table; the path comes from the alternate's own tree
+    """
+    links = graph[source]
+    backups = {}
+
+    for node, hop in enumerate(first_hop):
+        if hop is None:
+            continue
+        primary = neighbor_distance[hop]
+        best, backup = None, None
+        for neighbor, hop_distance in neighbor_distance.items():
+            if neighbor == hop or hop_distance[node] >= hop_distance[source] + distance[node]:
+                continue
+            protects_node = node != hop and hop_distance[node] < hop_distance[hop] + primary[node]
+            rank = (not protects_node, links[neighbor] + hop_distance[node])
+            if best is None or rank < best:
+                best, backup = rank, neighbor
+        if backup is not None:
+            path = shortestPath.build_path(neighbor_previous[backup], backup, node)
+            backups[jids[node]] = (jids[backup], [jids[source]] + [jids[n] for n in path])
+
+    return backups
+
+
 class Router(object):
 
-    def __init__(self, name) -> None:
+    def __init__(self, name, names=NAMES_FILE, topo=TOPO_FILE, incremental=INCREMENTAL_SPF, multipath=MULTIPATH, lfa=LFA,
+                 max_age=LSP_MAX_AGE) -> None:
         self.id = None
         self.name = name
+        self.names_file = names
+        self.topo_file = topo
 
-        self.distances = {}
+        # sparse topology: one adjacency dict per node index, {neighbor index: weight}
+        self.distances = []
         self.nodes = []
         self.previos = {}
         self.visited = {}
 
+        self.config = None # netConfig.NetworkConfig shared with the other routers of the process
         self.neighbor_ids = []
         self.users = {}
         self.users_list = []
+        self.jids = []
+        self.index = {}
         self.neighbors = []
         self.neighbors_distance = {}
-        self.matrix = np.empty((len(self.users), len(self.users)))
-
-        self.routing_table = {}
+        self.link_metrics = {} # neighbor jid -> LinkMetric smoothing its echo delays
+
+        # destination jid -> (next hop jid, full path), rebuilt once per topology version
+        self.forwarding_table = {}
+        # destination jid -> [(next hop jid, weight)] when there is more than one usable next hop
+        self.multipath_mode = multipath
+        self.multipath = {}
+        self.hop_load = {} # next hop jid -> messages sent through it
+        # destination jid -> (loop free alternate next hop jid, full path), used when the primary link fails
+        self.lfa = lfa
+        self.backups = {}
+        self.lfa_stats = {'destinations': 0, 'protected': 0, 'repairs': 0}
+        self.topology_version = 0
+        self.table_version = 0
+        self.spf_stats = {'runs': 0, 'time': 0.0, 'stale': 0} # route computations, CPU seconds spent, results dropped as outdated
         self.package = {
             'origin': self.name,
             'seq': 0,
             'age': time(),
+            'lifetime': max_age,
             'weights': {}
         }
         self.names_list = {}
         self.configure_files()
         self.MAX_WEIGHT = sys.maxsize
+        # link state database: origin -> newest LSP accepted from it, or its purge for a while
         self.packages = {}
+        self.max_age = max_age
+        self.aging = TimerWheel(LSP_AGE_TICK, now=time()) # origin -> when its LSP ages out (or its purge is dropped)
+        self.removed = set() # ids of the nodes purged from the graph
+        self.provisional = set() # origins loaded from a snapshot that no neighbor has confirmed yet
+        self.lsdb_stats = {
+            'accepted': 0,
+            'duplicate': 0,
+            'stale': 0,
+            'expired': 0,
+            'aged_out': 0,
+            'purged': 0,
+        }
+
+        # dynamic SPF mode: LSPs patch the shortest path tree instead of a full recompute
+        self.spf = None
+        if incremental:
+            self.spf = shortestPath.DynamicSPF(self.distances, self.index[self.name])
 
     
     def configure_files(self):
-        file = open("names.txt", "r")
-        file_content = file.read().replace("'", '"')
-        users_content = json.loads(file_content)
-
-        self.users = users_content['config']
-        for key, value in self.users.items():
-            if key in self.users_list:
-                pass
-            else:
-                self.users_list.append(key)
-            if value == self.name:
-                self.id = key
-
-        file = open("topo.txt", "r")
-        file_content = file.read().replace("'", '"')
-        topo_content = json.loads(file_content)
-
-        for key, value in topo_content['config'].items():
-            if key == self.id:
-                self.neighbor_ids = value
-
-        for neighbor_id in self.neighbor_ids:
-            self.neighbors.append(self.users[neighbor_id])
-
+        config = self.config = netConfig.load(self.names_file, self.topo_file)
+        # shared, read only: they grow in place when nodes are added to the names file
+        self.users = config.names
+        self.users_list = config.node_names
+        self.jids = config.jids
+        self.index = config.jid_ids # jid -> id, so SPF never scans users/users_list
+
+        self.id = config.node(self.name)
+        adjacent = config.adjacency[self.index[self.name]] if self.id is not None else ()
+        self.neighbor_ids = [config.node_names[i] for i in adjacent]
+        self.neighbors = [config.jids[i] for i in adjacent]
         for neighbor in self.neighbors:
             self.neighbors_distance[neighbor] = 1
 
-        self.matrix = np.empty((len(self.users), len(self.users)))
-        
-    def get_routes(self, dest):
-        m = self.MAX_WEIGHT
-        routes = list()
-
-        if (dest in self.routing_table):
-            m, routes = self.short_route(self.routing_table[dest])
+        self.distances = [{} for _ in self.jids]
+
+    def grow(self):
+        """ Rows for the nodes added to the names file since the graph was built. """
+        if len(self.distances) == len(self.jids):
+            return
+        self.distances.extend({} for _ in range(len(self.jids) - len(self.distances)))
+        if self.spf is not None:
+            self.spf = shortestPath.DynamicSPF(self.distances, self.index[self.name])
+
+    def add_neighbor(self, node):
+        """
+        A link to node was added to the topology file: it is used from now on,
+        weighted 1 until measured, and goes into our next LSP.
+
+        Returns:
+            True if node was not a neighbor yet
+        """
+        if node in self.neighbors or node not in self.index:
+            return False
+        self.grow()
+        self.neighbors.append(node)
+        self.neighbor_ids.append(self.config.node(node))
+        self.neighbors_distance[node] = 1
+        self.build_package()
+        return True
+
+    def remove_neighbor(self, node):
+        """
+        The link to node was removed from the topology file: it is dropped like
+        a failed one, for good.
+
+        Returns:
+            True if node was a neighbor
+        """
+        if node not in self.neighbors:
+            return False
+        self.neighbors.remove(node)
+        self.neighbor_ids.remove(self.config.node(node))
+        self.neighbor_down(node) # nothing more to do if it already was down
+        return True
 
-        if (dest in self.neighbors_distance):
-            if (self.neighbors_distance[dest] < m):
-                m = self.neighbors_distance[dest]
-                routes = [dest]
-
-            elif (self.neighbors_distance[dest] == m):
-               routes.append(dest)
-        return routes
+    def get_routes(self, dest):
+        """
+        Next hops towards dest with their weights: the direct link if dest is a
+        live neighbor, else the multipath set (or the single next hop) of the last SPF.
+        """
+        if dest in self.neighbors_distance:
+            return [(dest, 1)]
+        if dest in self.multipath:
+            return self.multipath[dest]
+        route = self.forwarding_table.get(dest)
+        return [(route[0], 1)] if route else []
+
+    def pick(self, hops, flow):
+        """ Next hop of hops for the flow key, counted in hop_load. """
+        hop = hops[0][0] if len(hops) == 1 else rendezvous(flow, hops)
+        self.hop_load[hop] = self.hop_load.get(hop, 0) + 1
+        return hop
 
     def build_graph_matrix(self):
-        for i in range(len(self.users)):
-            for j in range(len(self.users)):
-                if i == j:
-                    self.matrix[i][j]=0
-                else:
-                    row_name = self.users[self.users_list[i]]
-                    col_name = self.users[self.users_list[j]]
-                    try:
-                        peso = self.packages[row_name]['weights'][col_name]
-                        self.matrix[i][j]=peso
-                    except:
-                        self.matrix[i][j]=0
+        if self.table_version == self.topology_version:
+            return # no new LSP since the last build
+
+        graph, version, tree = self.snapshot()
+        self.install(compute_routes(graph, self.index[self.name], self.jids, version, self.multipath_mode, self.lfa, tree))
+
+    def snapshot(self):
+        """
+        (graph, version, tree) for a route computation outside the router, e.g. in a
+        worker thread. update_graph_row replaces rows instead of editing them, so the
+        snapshot shares them and stays valid while the router moves on. tree is a
+        copy of the shortest path tree update_graph_row already repaired (dynamic
+        SPF), None if compute_routes has to run the SPF itself.
+        """
+        tree = None
+        if self.spf is not None:
+            tree = (list(self.spf.distance), list(self.spf.previous), list(self.spf.first_hop))
+        return tuple(self.distances), self.topology_version, tree
+
+    def install(self, routes):
+        """
+        Swaps in a RouteTable as a whole. It may have been computed before a
+        neighbor went down, so routes through neighbors that are down by now
+        are repaired the way neighbor_down did when they went down.
+
+        Returns:
+            False if it is not newer than the current one, which is then kept
+        """
+        if routes.version <= self.table_version:
+            self.spf_stats['stale'] += 1
+            return False
+
+        self.visited, self.previous, self.interface = routes.distance, routes.previous, routes.first_hop
+        self.forwarding_table = routes.forwarding
+        self.multipath = routes.multipath
+        self.backups = routes.backups
+        self.lfa_stats['destinations'] = routes.destinations
+        self.lfa_stats['protected'] = len(routes.backups)
+        self.table_version = routes.version
+
+        hops = {hop for hop, _ in self.forwarding_table.values()}
+        hops.update(hop for routes_ in self.multipath.values() for hop, _ in routes_)
+        for node in hops - set(self.neighbors_distance):
+            self.use_backups(node)
+
+        self.spf_stats['runs'] += 1
+        self.spf_stats['time'] += routes.time
+        return True
+
+    @property
+    def matrix(self):
+        """ Dense N x N export of the topology, only built on demand. """
+        matrix = np.zeros((len(self.jids), len(self.jids)))
+        for i, row in enumerate(self.distances):
+            for j, weight in row.items():
+                matrix[i][j] = weight
+        return matrix
+
+    def use_backups(self, node):
+        """
+        Local repair after losing the link to node: destinations routed through it
+        move to their alternate right away, before the SPF runs again.
+
+        Returns:
+            Number of destinations moved
+        """
+        moved = 0
+        for dest, (hop, _) in self.forwarding_table.items():
+            if hop == node and dest in self.backups:
+                self.forwarding_table[dest] = self.backups[dest]
+                moved += 1
+
+        for dest, hops in list(self.multipath.items()):
+            kept = [(hop, weight) for hop, weight in hops if hop != node]
+            if len(kept) > 1:
+                self.multipath[dest] = kept
+            elif len(kept) < len(hops):
+                del self.multipath[dest]
+
+        self.lfa_stats['repairs'] += moved
+        return moved
+
+    def route(self, dest, flow=None):
+        """
+        (next hop, path) towards dest, or None if it is unreachable. With several
+        next hops the flow key picks one, so a flow is never reordered; path is
+        only known for the shortest path one.
+        """
+        route = self.forwarding_table.get(dest)
+        if route is None:
+            return None
+        hop = self.pick(self.multipath.get(dest) or [(route[0], 1)], flow)
+        return route if hop == route[0] else (hop, [])
+
+    def next_hop(self, dest, flow=None):
+        route = self.route(dest, flow)
+        return route[0] if route else None
 
     def change_weight(self, node, weight):
         self.neighbors_distance[node] = weight
 
+    def neighbor_down(self, node):
+        """
+        Drops the link to a neighbor that stopped answering, without waiting for
+        LSPs about it. Our own row of the graph loses the link at once, and with
+        alternates the traffic moves to them right away; the SPF is left to the
+        caller (link.Node asks its RouteWorker), so it does not run on the event loop.
+
+        Returns:
+            True if node was a live neighbor
+        """
+        if node not in self.neighbors_distance:
+            return False
+        del self.neighbors_distance[node]
+        self.link_metrics.pop(node, None) # measured from scratch if it comes back
+        if self.lfa:
+            self.use_backups(node)
+        self.build_package()
+        return True
+
+    def observe_delay(self, node, delay):
+        """
+        Feeds an echo/ack delay sample of the link to node. The weight only
+        changes when the smoothed, quantized delay moved enough.
+
+        Returns:
+            True if the weight of the link changed
+        """
+        metric = self.link_metrics.get(node)
+        if metric is None:
+            metric = self.link_metrics[node] = LinkMetric()
+        if not metric.sample(delay):
+            return False
+        self.change_weight(node, metric.weight)
+        return True
+
     def build_package(self):
         current_time = time()
         new_lsp = {
             'origin': self.name,
             'seq': int(self.package['seq']) + 1,
             'age': current_time,
-            'weights': self.neighbors_distance,
+            'lifetime': self.max_age,
+            'weights': dict(self.neighbors_distance),
         }
+        if new_lsp['weights'] != self.package['weights']:
+            self.topology_version += 1
+            self.update_graph_row(self.name, new_lsp['weights'])
         self.package = new_lsp
         self.packages[self.name]=self.package
         return self.package
 
-    def short_route(self, routes):
-        if (len(routes) == 0):
-            return self.MAX_WEIGHT, routes
-
-        min_weight = min(routes, key = lambda x: x[1])[1]
-        min_routes = list(map(lambda x: x[0], filter(lambda x: x[1] == min_weight, routes)))
-        return min_weight, min_routes
-
-
-    def change_neighbor_package(self, node, lsp):
+    def is_newer(self, lsp, old_lsp):
+        """
+        The seq orders the copies of an LSP. The origin's stamp only breaks ties,
+        and a purge carries the seq and stamp of the LSP it ages out.
+        """
+        if lsp['seq'] != old_lsp['seq']:
+            return lsp['seq'] > old_lsp['seq']
+        return lsp['age'] > old_lsp['age']
+
+    def install_lsp(self, lsp, now=None):
+        """
+        Stores lsp in the LSDB if it is newer than what we have for its origin.
+        Its remaining lifetime is counted down from now, on our own clock.
+
+        Returns:
+            True if it was accepted (and should be flooded on), False if it is
+            a duplicate, an older copy, expired or our own LSP coming back.
+        """
+        origin = lsp['origin']
+        old_lsp = self.packages.get(origin)
+        self.provisional.discard(origin) # a neighbor still knows it
+        if lsp.get('purge'):
+            return self.install_purge(lsp, old_lsp)
+
+        if origin == self.name:
+            # a copy from before we restarted, whose seq we start below: the next own LSP must beat it
+            self.package['seq'] = max(self.package['seq'], lsp['seq'])
+            self.lsdb_stats['duplicate'] += 1
+            return False
+
+        if old_lsp is not None and lsp['seq'] == old_lsp['seq'] and lsp['age'] == old_lsp['age']:
+            self.lsdb_stats['duplicate'] += 1
+            return False
+
+        if lsp['lifetime'] <= 0:
+            self.lsdb_stats['expired'] += 1
+            return False
+
+        if old_lsp is not None and not self.is_newer(lsp, old_lsp):
+            self.lsdb_stats['stale'] += 1
+            return False
+
+        self.change_neighbor_package(origin, lsp, now)
+        self.lsdb_stats['accepted'] += 1
+        return True
+
+    def install_purge(self, purge, old_lsp):
+        """
+        A router aged the LSP of purge['origin'] out. It is dropped here too,
+        unless we hold a newer one or already dropped it.
+        """
+        origin = purge['origin']
+        if origin == self.name:
+            # we are alive: the next own LSP must beat the purged one
+            self.package['seq'] = max(self.package['seq'], purge['seq'])
+            self.lsdb_stats['stale'] += 1
+            return False
+
+        if old_lsp is None or old_lsp.get('purge'):
+            self.lsdb_stats['duplicate'] += 1
+            return False
+        if self.is_newer(old_lsp, purge):
+            self.lsdb_stats['stale'] += 1
+            return False
+
+        self.purge(origin, purge, time())
+        self.remove_nodes([origin])
+        self.lsdb_stats['purged'] += 1
+        return True
+
+    def age_lsdb(self, now=None):
+        """
+        Purges the LSPs whose lifetime ran out before their origin refreshed them, and
+        forgets the purges held for LSP_PURGE_HOLD. Only the aging wheel slots
+        that came due are looked at, not the whole LSDB.
+
+        Returns:
+            The purges to flood, so the other routers drop the same LSPs
+        """
+        now = time() if now is None else now
+        purges = []
+        for origin in self.aging.advance(now):
+            lsp = self.packages[origin]
+            if lsp.get('purge'):
+                del self.packages[origin]
+                continue
+            purge = {'origin': origin, 'seq': lsp['seq'], 'age': lsp['age'], 'lifetime': 0, 'weights': {}, 'purge': True}
+            self.purge(origin, purge, now)
+            self.lsdb_stats['aged_out'] += 1
+            purges.append(purge)
+        self.remove_nodes([purge['origin'] for purge in purges])
+        return purges
+
+    def outgoing_lsp(self, origin, now=None):
+        """
+        The LSDB entry of origin as it is sent on: an LSP of another router carries
+        what is left of its lifetime, so it ages out everywhere at about the same time.
+        """
+        lsp = self.packages[origin]
+        if origin == self.name or lsp.get('purge'):
+            return lsp
+        now = time() if now is None else now
+        return dict(lsp, lifetime=max(0.0, self.aging.deadline(origin) - now))
+
+    def purge(self, origin, lsp, now):
+        """ Keeps the purge lsp of origin in the LSDB for a while; remove_nodes takes origin out of the graph. """
+        self.packages[origin] = lsp
+        self.aging.schedule(origin, now + LSP_PURGE_HOLD)
+
+    def remove_nodes(self, nodes):
+        """
+        Empties the rows of nodes and drops the links other rows still have to
+        them (two way check), so they are no longer reached or routed through.
+        """
+        removed = {self.index[node] for node in nodes if node in self.index}
+        if not removed:
+            return
+        self.topology_version += 1
+        self.removed.update(removed)
+        for i, row in enumerate(self.distances):
+            if i in removed:
+                self.set_graph_row(i, {})
+            elif not removed.isdisjoint(row):
+                self.set_graph_row(i, {neighbor: weight for neighbor, weight in row.items() if neighbor not in removed})
+
+    def restore_node(self, node):
+        """ node has an LSP again: the links to it left out by remove_nodes come back. """
+        self.removed.discard(self.index[node])
+        for origin, lsp in self.packages.items():
+            if origin != node and node in lsp['weights']:
+                self.update_graph_row(origin, lsp['weights'])
+
+    def warm_start(self, lsps, forwarding):
+        """
+        Loads the state saved by a warmStart.Snapshot before the restart. The LSPs
+        are provisional until drop_provisional(); the forwarding table is used until
+        the first route computation over the loaded LSDB replaces it.
+
+        Arguments:
+            lsps --> Saved LSDB entries, our own LSP included
+            forwarding --> Saved forwarding table
+        """
+        now = time()
+        for lsp in lsps:
+            origin = lsp['origin']
+            if origin == self.name:
+                # our next LSP must beat the old one, and the links start from their last weights
+                self.package['seq'] = max(self.package['seq'], lsp['seq'])
+                for neighbor, weight in lsp['weights'].items():
+                    if neighbor in self.neighbors_distance:
+                        self.neighbors_distance[neighbor] = weight
+                self.topology_version += 1
+                self.update_graph_row(self.name, self.neighbors_distance)
+                continue
+            if origin in self.packages or lsp['lifetime'] <= 0:
+                continue
+            self.change_neighbor_package(origin, lsp, now)
+            self.provisional.add(origin)
+        self.forwarding_table = forwarding # table_version stays behind: it is not computed from this graph
+
+    def drop_provisional(self):
+        """
+        Drops the loaded LSPs no neighbor confirmed, their origins are gone.
+
+        Returns:
+            The origins dropped
+        """
+        dropped = [origin for origin in self.provisional if origin in self.packages]
+        for origin in dropped:
+            del self.packages[origin]
+            self.aging.cancel(origin)
+        self.provisional = set()
+        self.remove_nodes(dropped)
+        return dropped
+
+    def change_neighbor_package(self, node, lsp, now=None):
+        old_lsp = self.packages.get(node)
         self.packages[node] = lsp
+        # the origin's clock is never compared with ours: the lifetime runs out on ours
+        now = time() if now is None else now
+        self.aging.schedule(node, now + min(lsp['lifetime'], self.max_age))
+        if old_lsp is None or old_lsp['weights'] != lsp['weights'] or old_lsp.get('purge'):
+            self.topology_version += 1
+            self.update_graph_row(node, lsp['weights'])
+            if node in self.index and self.index[node] in self.removed:
+                self.restore_node(node)
+
+    def update_graph_row(self, node, weights):
+        """ Replaces the row of one LSP origin, leaving the rest of the topology untouched. """
+        if node not in self.index:
+            return
+        self.grow()
+
+        row = {}
+        for neighbor, weight in weights.items():
+            if neighbor in self.index and weight > 0 and self.index[neighbor] not in self.removed:
+                row[self.index[neighbor]] = weight
+        self.set_graph_row(self.index[node], row)
+
+    def set_graph_row(self, node, row):
+        if self.spf is None:
+            self.distances[node] = row
+        else:
+            self.spf.update_row(node, row)
 
     def set_distances(self, router_matrix):
 
         num_nodes = len(router_matrix)
 
+        # adjacency dicts indexed from 0; 0 and -1 mean "no link"
+        self.distances = []
         for i in range(num_nodes):
-            tempdict = {}
-            for j in range(num_nodes):
-                if i!=j and router_matrix[i][j]!=-1:
-                    tempdict[j+1] = router_matrix[i][j]
-            self.distances[i+1] = tempdict
-            self.nodes.append(i+1)
+            row = router_matrix[i]
+            self.distances.append({j: row[j] for j in range(num_nodes) if i != j and row[j] > 0})
+        self.nodes = list(range(num_nodes))
 
     def dijkstra(self, start):
-
-        for key, value in self.users.items():
-            if value == start:
-                start = key
-        start = self.users_list.index(start)+1 
-
-        unvisited = {node: None for node in self.nodes}
-        self.previous = {node: None for node in self.nodes}
-        interface = {node: None for node in self.nodes}
-        self.visited = {node: None for node in self.nodes}
-
-        current = int(start)
-        currentDist = 0
-        unvisited[current] = currentDist
-
-        while True:
-            for next, distance in self.distances[current].items():
-
-                if next not in unvisited: continue
-                
-                newDist = currentDist + distance
-
-                if not unvisited[next] or unvisited[next] > newDist:
-                    unvisited[next] = newDist
-                    self.previous[next] = current
-
-                    if not interface[current]:
-                        interface[next] = next
-                    else:
-                        interface[next] = interface[current]
-                        
-            self.visited[current] = currentDist
-            del unvisited[current]
-            
-            done = 1
-            for x in unvisited:
-                if unvisited[x]:
-                    done = 0
-                    break
-            if not unvisited or done:
-                break
-
-            elements = [node for node in unvisited.items() if node[1]]
-
-            current, currentDist = sorted(elements, key = lambda x: x[1])[0]
-
+        source = self.index[start]
+        self.visited, self.previous, self.interface = shortestPath.dijkstra(self.distances, source)
 
     def shortest_path(self, start, end):
-
-        for key, value in self.users.items():
-            if value == start:
-                start = key
-        start = self.users_list.index(start)+1 
-
-        for key, value in self.users.items():
-            if value == end:
-                end = key
-        end = self.users_list.index(end)+1 
-
-        path = []
-        dest = int(end)
-        src = int(start)
-        path.append(dest)
-
-        while dest != src:
-            path.append(self.previous[dest])
-            dest = self.previous[dest]
-
-        path.reverse()
-
-        for node in path:
-            name = self.users[self.users_list[node-1]]
-            index = path.index(node)
-            path[index]=name
-        return path
+        path = shortestPath.build_path(self.previous, self.index[start], self.index[end])
+        return [self.jids[node] for node in path]
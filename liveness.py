@@ -0,0 +1,69 @@
+"""
+BFD style failure detection of the neighbors of a router.
+
+Anything received from a neighbor proves it is alive. A neighbor that has been
+silent for one interval is probed (an echo, whose ack counts as hearing from
+it), and one that stays silent for multiplier intervals is declared down.
+Hearing from a down neighbor brings it back up.
+
+Instance example --> liveness = Liveness(neighbors, interval=1, multiplier=3)
+                     liveness.heard(neighbor, loop.time()) # on every message
+                     for neighbor in liveness.expired(loop.time()): ... # every interval
+"""
+
+import settings
+
+
+class Liveness(object):
+    """
+    Arguments:
+        neighbors --> Neighbors to watch
+        interval --> Seconds of silence before a neighbor is probed
+        multiplier --> Intervals of silence before a neighbor is declared down
+        now --> Current loop time; neighbors count as heard at it
+
+    Returns:
+        None
+    """
+    def __init__(self, neighbors, interval=settings.DETECT_INTERVAL, multiplier=settings.DETECT_MULTIPLIER, now=0.0):
+        self.interval = interval
+        self.multiplier = multiplier
+        self.last_heard = {neighbor: now for neighbor in neighbors}
+        self.down = set()
+        self.stats = {'failures': 0, 'recoveries': 0}
+
+    def heard(self, neighbor, now):
+        """ Records a message from neighbor. Returns True if it was down and is back up. """
+        if neighbor not in self.last_heard:
+            return False
+        self.last_heard[neighbor] = now
+        if neighbor in self.down:
+            self.down.discard(neighbor)
+            self.stats['recoveries'] += 1
+            return True
+        return False
+
+    def silent(self, now):
+        """ Neighbors that are up but have not been heard from for an interval, to be probed. """
+        return [neighbor for neighbor, last in self.last_heard.items()
+                if neighbor not in self.down and now - last >= self.interval]
+
+    def expired(self, now):
+        """ Neighbors declared down now: silent for multiplier intervals. """
+        detect = self.interval * self.multiplier
+        failed = [neighbor for neighbor, last in self.last_heard.items()
+                  if neighbor not in self.down and now - last >= detect]
+        self.down.update(failed)
+        self.stats['failures'] += len(failed)
+        return failed
+
+    def add(self, neighbor, now):
+        """ Starts watching a neighbor added at runtime, as heard at now. """
+        self.last_heard.setdefault(neighbor, now)
+
+    def remove(self, neighbor):
+        self.last_heard.pop(neighbor, None)
+        self.down.discard(neighbor)
+
+    def is_up(self, neighbor):
+        return neighbor not in self.down
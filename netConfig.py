@@ -0,0 +1,167 @@
+"""
+Names and topology files, parsed once per process and shared by every router.
+
+Nodes are interned to integer ids in names file order, and the topology is
+kept as one tuple of neighbor ids per id next to the plain dicts. Routers
+built on the same files share one NetworkConfig, so an emulated network of N
+routers parses the files once instead of N times.
+
+The files are polled for changes while anyone watches them. Ids stay stable
+across reloads: nodes added to the names file get new ids at the end, and a
+node whose jid changed keeps the old one until the routers restart. Watchers
+get the neighbors added and removed per node and apply them at runtime.
+
+Instance example --> config = load("names-default.txt", "topo-default.txt")
+                     config.ids["A"], config.jids[0], config.adjacency[0]
+                     config.watch(callback) # callback({node: (added, removed)}) after a change
+"""
+
+import os
+import json
+import asyncio
+import logging
+
+import settings
+
+_configs = {} # (names path, topo path) -> NetworkConfig
+
+
+"""
+Converts a json formatted string from a .txt file to a python dictionary.
+
+Arguments:
+    fname --> Name of the input file
+
+Returns:
+    Dictionary
+"""
+def json_to_dict(fname):
+    with open(fname, 'r') as f:
+        return json.loads(f.read().replace("'", '"'))
+
+
+"""
+The shared NetworkConfig of a names and a topology file, parsed on first use.
+
+Arguments:
+    names --> Names file in json format
+    topo --> Topology file in json format
+
+Returns:
+    NetworkConfig
+"""
+def load(names, topo):
+    key = (os.path.abspath(names), os.path.abspath(topo))
+    config = _configs.get(key)
+    if config is None:
+        config = _configs[key] = NetworkConfig(names, topo)
+    else:
+        config.reload() # cheap when the files did not change
+    return config
+
+
+class NetworkConfig(object):
+    """
+    Arguments:
+        names --> Names file in json format
+        topo --> Topology file in json format
+        poll --> Seconds between checks of the files while watched, 0 for none
+
+    Returns:
+        None
+    """
+    def __init__(self, names, topo, poll=settings.CONFIG_POLL):
+        self.names_file = names
+        self.topo_file = topo
+        self.poll = poll
+
+        # updated in place on reload, so whoever holds them sees the changes
+        self.names = {} # node -> jid
+        self.topo = {} # node -> [neighbor nodes]
+        self.node_names = [] # id -> node
+        self.jids = [] # id -> jid
+        self.ids = {} # node -> id
+        self.jid_ids = {} # jid -> id
+        self.adjacency = [] # id -> tuple of neighbor ids
+
+        self.version = 0
+        self.mtimes = None
+        self.watchers = []
+        self.timer = None
+        self.error = None # of the last failed check, logged once
+        self.reload()
+
+    def node(self, jid):
+        """ Node name of a jid, None if it is not in the names file. """
+        i = self.jid_ids.get(jid)
+        return None if i is None else self.node_names[i]
+
+    def neighbors(self, node):
+        """ Neighbor nodes of node that are in the names file. """
+        i = self.ids.get(node)
+        return [] if i is None else [self.node_names[j] for j in self.adjacency[i]]
+
+    def reload(self):
+        """
+        Re-reads the files if they changed since the last time and tells the watchers.
+
+        Returns:
+            Dict {node: (added neighbors, removed neighbors)} of the nodes whose
+            neighbors changed, empty if nothing did
+        """
+        mtimes = (os.stat(self.names_file).st_mtime_ns, os.stat(self.topo_file).st_mtime_ns)
+        if mtimes == self.mtimes:
+            return {}
+        names = json_to_dict(self.names_file)['config']
+        topo = json_to_dict(self.topo_file)['config']
+        self.mtimes = mtimes
+
+        for node, jid in names.items():
+            if node not in self.ids:
+                self.ids[node] = self.jid_ids[jid] = len(self.node_names)
+                self.node_names.append(node)
+                self.jids.append(jid)
+                self.names[node] = jid
+            elif self.names[node] != jid:
+                logging.warning(f"{node} changed its jid to {jid}, routers keep {self.names[node]} until they restart")
+
+        changes = {}
+        for node in set(self.topo) | set(topo):
+            old, new = self.topo.get(node, []), topo.get(node, [])
+            added = [neighbor for neighbor in new if neighbor not in old]
+            removed = [neighbor for neighbor in old if neighbor not in new]
+            if added or removed:
+                changes[node] = (added, removed)
+        self.topo.clear()
+        self.topo.update(topo)
+        self.adjacency[:] = [tuple(self.ids[neighbor] for neighbor in topo.get(node, []) if neighbor in self.ids)
+                             for node in self.node_names]
+
+        self.version += 1
+        if self.version > 1 and changes:
+            for callback in list(self.watchers):
+                callback(changes)
+        return changes
+
+    def watch(self, callback):
+        """ Calls callback(changes) every time the files change; they are polled while watched. """
+        self.watchers.append(callback)
+        if self.timer is None and self.poll:
+            self.timer = asyncio.get_event_loop().call_later(self.poll, self.check)
+
+    def unwatch(self, callback):
+        if callback in self.watchers:
+            self.watchers.remove(callback)
+        if not self.watchers and self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+    def check(self):
+        try:
+            self.reload()
+            self.error = None
+        except (OSError, ValueError, KeyError) as err: # e.g. caught halfway through a save
+            if self.error is None:
+                logging.warning(f"Config not reloaded, trying again every {self.poll} s: {err!r}")
+            self.error = err
+        self.timer = asyncio.get_event_loop().call_later(self.poll, self.check)
@@ -0,0 +1,58 @@
+"""
+Sliding window duplicate suppression for flooded messages, in the style of
+the IPsec/DTLS anti-replay window.
+
+Instance example --> window = ReplayWindow(64); window.accept(counter)
+"""
+
+
+class ReplayWindow(object):
+    """
+    Remembers which of the last `size` counters of one source were already seen.
+
+    The newest counter is kept in `highest` and older ones as bits of `bitmap`,
+    bit i standing for counter highest - i. Memory is bounded by `size` bits no
+    matter how many messages the source sends.
+
+    Arguments:
+        size --> Number of counters behind the newest one that are still tracked
+
+    Returns:
+        None
+    """
+    def __init__(self, size=64):
+        self.size = size
+        self.mask = (1 << size) - 1
+        self.highest = 0
+        self.bitmap = 0
+
+    def accept(self, counter):
+        """
+        Checks counter against the window and marks it as seen.
+
+        Arguments:
+            counter --> Sequence number of the incoming message
+
+        Returns:
+            True if the counter is new (even if it arrived out of order),
+            False if it is a duplicate or too old to tell
+        """
+        if counter > self.highest:
+            shift = counter - self.highest
+            if shift < self.size:
+                self.bitmap = ((self.bitmap << shift) | 1) & self.mask
+            else:
+                self.bitmap = 1
+            self.highest = counter
+            return True
+
+        offset = self.highest - counter
+        if offset >= self.size:
+            return False
+
+        bit = 1 << offset
+        if self.bitmap & bit:
+            return False
+
+        self.bitmap |= bit
+        return True
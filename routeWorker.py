@@ -0,0 +1,99 @@
+"""
+Link state route computations off the event loop.
+
+RouteWorker hands linkRouter.compute_routes a snapshot of the topology and
+runs it in an executor, so a long SPF does not hold back echoes, acks and
+floods (and skew the measured link delays). With dynamic SPF only the tree
+repair is done on the event loop (by Router.update_graph_row); the snapshot
+carries a copy of the repaired tree and the forwarding table, multipath sets
+and alternates are built from it in the executor. The finished RouteTable is
+installed in one go. Requests made while a computation runs are coalesced
+into a single run over the newest topology once it ends.
+
+Instance example --> worker = RouteWorker(router, 'thread')
+                     router.install_lsp(lsp); worker.request()
+"""
+
+import asyncio
+import logging
+import concurrent.futures
+
+import settings
+from linkRouter import compute_routes
+
+_process_pool = None
+
+
+def process_pool():
+    """ Process pool shared by every worker of the process, created on first use. """
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = concurrent.futures.ProcessPoolExecutor()
+    return _process_pool
+
+
+class RouteWorker(object):
+    """
+    Arguments:
+        router --> linkRouter.Router whose routes are computed
+        executor --> 'thread' (the loop's default thread pool), 'process' (a process
+                     pool; snapshots are pickled over) or 'inline' (no executor)
+
+    Returns:
+        None
+    """
+    def __init__(self, router, executor=settings.SPF_EXECUTOR):
+        self.router = router
+        self.executor = executor
+        self.running = None # future of the computation in progress
+        self.pending = False # the topology changed while it ran
+        self.stopped = False # LSPs still in flight to a stopped node start nothing
+        self.stats = {'requests': 0, 'runs': 0, 'coalesced': 0}
+
+    def request(self):
+        """ Routes for the current topology are needed; they are installed when ready. """
+        self.stats['requests'] += 1
+        if self.stopped or self.router.table_version == self.router.topology_version:
+            return
+        if self.executor == 'inline':
+            self.router.build_graph_matrix()
+            return
+
+        if self.running is not None:
+            if self.pending:
+                self.stats['coalesced'] += 1
+            self.pending = True
+            return
+        self.start()
+
+    def start(self):
+        router = self.router
+        graph, version, tree = router.snapshot()
+        executor = process_pool() if self.executor == 'process' else None
+
+        self.stats['runs'] += 1
+        self.running = asyncio.get_event_loop().run_in_executor(
+            executor, compute_routes, graph, router.index[router.name], router.jids, version,
+            router.multipath_mode, router.lfa, tree)
+        self.running.add_done_callback(self.done)
+
+    def done(self, future):
+        self.running = None
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            logging.error(f"Route computation failed: {future.exception()!r}")
+        else:
+            self.router.install(future.result())
+
+        pending, self.pending = self.pending, False
+        if pending and self.router.table_version < self.router.topology_version:
+            self.start()
+
+    def cancel(self):
+        """ The node stopped: the computation in progress is dropped and no other starts. """
+        self.stopped = True
+        if self.running is not None:
+            self.running.cancel()
+            self.running = None
+        self.pending = False
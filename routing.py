@@ -11,7 +11,15 @@ import slixmpp
 from slixmpp.exceptions import IqError, IqTimeout, XMPPError
 
 import settings
-from vectorDistance import json_to_dict, Router
+import netConfig
+from vectorDistance import Router, ArrayRouter
+from replayWindow import ReplayWindow
+from transport import XMPPTransport, SocketTransport, CONTROL, DATA
+from wire import WireCodec
+from scheduler import ScheduledTransport
+from timers import Backoff
+from liveness import Liveness
+from warmStart import Snapshot
 
 
 def clean_jid(jid, domain="@alumchat.xyz"):
@@ -21,43 +29,102 @@ def clean_jid(jid, domain="@alumchat.xyz"):
     return jid
 
 
-class Client(slixmpp.ClientXMPP):
-
-    def __init__(self, jid, password, algorithm:str, topo:dict, names:dict, nfile, tfile):
-        slixmpp.ClientXMPP.__init__(self, jid, password)
+class Node(object):
+    """
+    Flooding / distance vector routing logic of one router. Messages go through a
+    transport, so the node runs the same over XMPP or inside the emulator.
 
-        self.nick = None
+    Arguments:
+        transport --> transport.Transport used to reach the neighbors
+        algorithm --> 'flooding' or 'dv'
+        topo --> Topology dict {node: [neighbor nodes]}
+        names --> Names dict {node: jid}
+        router --> vectorDistance.Router of this node, required for 'dv'
+        wire --> Control message encoding, 'binary' (negotiated) or 'json'
+        detect_interval --> Silence before a neighbor is probed, 0 disables failure detection ('dv')
+        detect_multiplier --> Silent intervals before a neighbor is declared down
+        snapshot --> File for the warm restart snapshots ('dv'), None for none
 
+    Returns:
+        None
+    """
+    def __init__(self, transport, algorithm:str, topo:dict, names:dict, router=None, wire=settings.WIRE_FORMAT,
+                 detect_interval=settings.DETECT_INTERVAL, detect_multiplier=settings.DETECT_MULTIPLIER, snapshot=None):
+        self.transport = transport
+        self.jid = transport.jid
         self.algorithm = algorithm
-        print(self.algorithm)
         self.topo = topo
         self.names = names
+        self.tasks = []
+        self.running = False
+        self.wire = WireCodec(names, binary=(wire == 'binary'))
+        self.detect = Backoff(detect_interval, detect_interval)
+        self.detect_multiplier = detect_multiplier
+        self.detect_timer = None
+        self.liveness = None # built by start() in 'dv' mode, keyed by neighbor jid
+        self.failovers = [] # (loop time, neighbor) of every neighbor declared down
+        self.snapshot = None
+        self.snapshot_timer = None
+        self.confirm_timer = None # drops what the neighbors did not confirm of a loaded snapshot
 
         self.node = self.recv_names(self.jid, self.names)
         if self.algorithm.lower()=='dv':
-            self.router = Router(self.node, nfile, tfile)
+            self.router = router
+            self.updates = asyncio.Queue() # 'update' and 'sync' packages waiting for bellman-ford
+            if snapshot:
+                self.snapshot = Snapshot(snapshot, router.names)
 
         if self.algorithm.lower()=='flooding':
             self.counter = 0
-            self.nodes = {}
+            self.nodes = {} # source -> ReplayWindow of flooded counters
 
-        # PLUGINS
-        self.register_plugin('xep_0030') # Service Discovery
-        self.register_plugin('xep_0199') # XMPP Ping
+        self.transport.set_handler(self.recv_message)
 
-        # EVENT HANDLERS
-        self.add_event_handler("session_start", self.session_start)
-        self.add_event_handler("session_start", self.app)
+
+    def start(self):
+        self.loop = asyncio.get_event_loop()
+        self.running = True
+        if self.algorithm.lower()=='dv':
+            if self.snapshot is not None:
+                if self.snapshot.load_vector(self.router):
+                    self.confirm_timer = self.loop.call_later(settings.WARM_START_CONFIRM, self.confirm_warm_start)
+                self.snapshot_timer = self.loop.call_later(settings.SNAPSHOT_INTERVAL, self.save_snapshot)
+            # full updates from the neighbors right away (confirming a loaded snapshot), not at their next sync
+            for node in self.router.neighbors:
+                self.control(self.router.names[node], {"type": "resync", "sender": self.router.node})
+            self.tasks.append(asyncio.ensure_future(self.bellman_ford()))
+            if self.detect.initial:
+                neighbors = [self.router.names[node] for node in self.router.neighbors]
+                self.liveness = Liveness(neighbors, self.detect.initial, self.detect_multiplier, self.loop.time())
+                self.detect_timer = self.loop.call_later(self.detect.next(), self.check_liveness)
+            self.router.config.watch(self.config_changed)
+
+
+    def stop(self):
+        self.running = False
         if self.algorithm.lower()=='dv':
-            self.add_event_handler("session_start", self.bellman_ford)
-        self.add_event_handler("message", self.recv_message)
+            self.router.config.unwatch(self.config_changed)
+        if self.detect_timer is not None:
+            self.detect_timer.cancel()
+            self.detect_timer = None
+        for task in self.tasks:
+            task.cancel()
+        self.tasks = []
+        for timer in (self.snapshot_timer, self.confirm_timer):
+            if timer is not None:
+                timer.cancel()
+        self.snapshot_timer = self.confirm_timer = None
+        if self.snapshot is not None:
+            self.snapshot.save_vector(self.router)
 
 
     """
     Calculation of the optimal route for each node "discovered" and saved in vector.
 
-    Processes incoming 'update' packages from neighbor nodes to find a better route (if there is one)
-    for each saved node, or add one if there is not one previous existing route.
+    Waits for 'update' and 'sync' packages from neighbor nodes and handles every one queued
+    so far in one go. Delta updates are only sent when the vector changed (triggered update).
+    Every settings.DV_REFRESH seconds unacknowledged entries are resent and a sync checksum
+    lets neighbors that drifted out of sync ask for a full update.
 
     Arguments:
         None
@@ -65,131 +132,353 @@ class Client(slixmpp.ClientXMPP):
     Returns:
         None
     """
-    async def bellman_ford(self, event):
-        while True:
-            await asyncio.sleep(0.5)
-            
-            work = self.router.to_process.copy()
-
-            for pair in work:
-                for key, value in pair[1].items():
-                    try:
-                        # incoming value (route) lower than the one stored
-                        if self.router.vector[key][0] > value[0] + 1:
-                            self.router.vector[key] = (value[0] + 1, pair[0])
-                            print(self.router.vector[key])
-                    except KeyError:
-                        print("\nNEW NODE!\n")
-                        self.router.vector[key] = (value[0] + 1, pair[0])
-                        print(self.router.vector[key])
-
-            # build dict to send to neighbor nodes
+    async def bellman_ford(self):
+        self.send_updates(full=True)
+        next_refresh = self.loop.time() + settings.DV_REFRESH
+
+        # wait_for may swallow a cancel that races with a queued update, so stop() also clears running
+        while self.running:
+            changed = False
+            try:
+                payloads = [await asyncio.wait_for(self.updates.get(), max(0, next_refresh - self.loop.time()))]
+                while not self.updates.empty():
+                    payloads.append(self.updates.get_nowait())
+                changed = self.process_updates(payloads)
+            except asyncio.TimeoutError:
+                pass
+
+            refresh = self.loop.time() >= next_refresh
+            if changed or refresh:
+                self.send_updates()
+            if refresh:
+                self.send_sync()
+                next_refresh = self.loop.time() + settings.DV_REFRESH
+
+
+    def process_updates(self, payloads):
+        """
+        Applies queued 'update' and 'sync' packages. Consecutive updates are relaxed
+        as one batch; a sync is only checked once the updates queued before it are applied.
+        Returns True if the vector changed.
+        """
+        changed = False
+        batch = []
+        for payload in payloads:
+            sender = payload['sender']
+            if payload['type'] == "update":
+                ack = {"type": "update-ack", "sender": self.router.node, "seq": payload['seq']}
+                self.control(self.router.names[sender], ack)
+                batch.append((sender, payload['vector'], payload['full']))
+                continue
+
+            if batch:
+                changed = self.router.process_batch(batch) or changed
+                batch = []
+            if not self.router.in_sync(sender, payload['checksum']):
+                resync = {"type": "resync", "sender": self.router.node}
+                self.control(self.router.names[sender], resync)
+
+        if batch:
+            changed = self.router.process_batch(batch) or changed
+        return changed
+
+
+    def send_updates(self, full=False, neighbors=None):
+        """ Sends delta (or full) vector updates to the neighbors that need one. """
+        if neighbors is None:
+            updates = self.router.build_updates(full)
+        else:
+            updates = {}
+            for node in neighbors:
+                update = self.router.build_update(node, full)
+                if update is not None:
+                    updates[node] = update
+
+        for node, (seq, entries) in updates.items():
             payload = {
                 "type": "update",
                 "sender": self.router.node,
-                "vector": self.router.vector
+                "seq": seq,
+                "full": full,
+                "vector": entries
             }
-            # send to all neighbors
-            for node in self.router.neighbors:
-                self.message(self.router.names[node], json.dumps(payload))
+            self.control(self.router.names[node], payload)
 
 
-    async def session_start(self, event):
-        """ Session start. Must send presence to server and get JID's roster. """
-        self.send_presence()
+    def check_liveness(self):
+        """ Probes the neighbors that went silent and withdraws the routes of the ones that stayed silent. """
+        now = self.loop.time()
+        for jid in self.liveness.expired(now):
+            self.neighbor_down(jid)
+        for jid in self.liveness.silent(now):
+            self.control(jid, {"type": "echo", "timestamp": now})
+        self.detect_timer = self.loop.call_later(self.detect.next(), self.check_liveness)
+
+
+    def save_snapshot(self):
+        self.snapshot.save_vector(self.router)
+        self.snapshot_timer = self.loop.call_later(settings.SNAPSHOT_INTERVAL, self.save_snapshot)
+
+
+    def confirm_warm_start(self):
+        """ Neighbors that did not send a full update since the restart are routed through as direct links only. """
+        self.confirm_timer = None
+        if self.router.drop_provisional():
+            self.send_updates()
+
+
+    def neighbor_down(self, jid):
+        """ A neighbor stopped answering: its routes are withdrawn and the neighbors told right away. """
+        node = self.recv_names(jid, self.router.names)
+        if self.router.neighbor_down(node):
+            self.failovers.append((self.loop.time(), node))
+            self.send_updates() # triggered, not at the next bellman-ford round
 
-        try:
-            await self.get_roster()
-        except IqError as err:
-            print('Error: %s' % err.iq['error']['condition'])
-        except IqTimeout:
-            print('Error: Request timed out')
 
+    def neighbor_up(self, jid):
+        """ A neighbor answers again: it gets our whole vector and we route through it again. """
+        node = self.recv_names(jid, self.router.names)
+        self.router.neighbor_up(node)
+        self.send_updates(full=True, neighbors=[node])
+        self.send_updates()
 
-    def recv_message(self, msg):
+
+    def config_changed(self, changes):
+        """ The topology file changed: links to us are added or removed without a restart. """
+        self.wire.add_nodes(self.router.names)
+        if self.snapshot is not None:
+            self.snapshot.add_nodes(self.router.names)
+        if self.router.node not in changes:
+            return
+        added, removed = changes[self.router.node]
+
+        for node in removed:
+            if self.router.remove_neighbor(node) and self.liveness is not None:
+                self.liveness.remove(self.router.names[node])
+        new = [node for node in added if node in self.router.names and self.router.add_neighbor(node)]
+        for node in new:
+            if self.liveness is not None:
+                self.liveness.add(self.router.names[node], self.loop.time())
+            self.control(self.router.names[node], {"type": "resync", "sender": self.router.node})
+
+        self.send_updates(full=True, neighbors=new)
+        self.send_updates()
+
+
+    def send_sync(self):
+        """ Sends each neighbor the checksum of the vector it should hold from us. """
+        for node in self.router.neighbors:
+            checksum = self.router.sync_checksum(node)
+            if checksum is not None:
+                payload = {"type": "sync", "sender": self.router.node, "checksum": checksum}
+                self.control(self.router.names[node], payload, key="sync")
+
+
+    def recv_message(self, sender, body):
         """ Handles incoming messages. """
 
-        if msg['type'] in ('chat', 'normal'):
-            payload = json.loads(msg['body']) # get payload
-
-            if payload['type']=='names':
-                print("Names config received.")
-                self.names = payload['config']
-                self.node = self.recv_names(self.jid, self.names)
-
-            if payload['type']=='topo':
-                print("Topology config received.")
-                self.topo = payload['config']
-            
-            if self.algorithm.lower()=='flooding':
-                # Validate source node list
-                if payload['source'] in self.nodes.keys():
-                    # Check if msg has been flooded
-                    if payload['counter'] <= len(self.nodes[payload['source']]):
-                        print("Message in node list. Discarding message.")
-                        return
+        payload = self.wire.loads(body, sender) # get payload
 
-                else:
-                    self.nodes[payload['source']] = []
+        if payload.get('type')=='names':
+            print("Names config received.")
+            self.names = payload['config']
+            self.node = self.recv_names(self.jid, self.names)
+            self.wire = WireCodec(self.names, self.wire.binary) # node ids follow the names file
 
-                payload['hops'] += 1
-                payload['distance'] += 1
-                payload['nodes'].append(self.node)
-                
-                self.nodes[payload['source']].append(payload['counter'])
-
-                if payload['destination']==self.jid:
-                    if payload['message'].lower()=='echo':
-                        payload['destination'] = self.names[payload['source']]
-                        payload['source'] = self.node
-                        for node in self.topo[self.node]: # node's neighbors
-                            neighbor = self.names[node]
-                            self.message(neighbor, json.dumps(payload))
-                    
-                    else:
-                        print(f"{payload['source']} says: {payload['message']}")
-                else:
-                    print("Flooding message")
+        if payload.get('type')=='topo':
+            print("Topology config received.")
+            self.topo = payload['config']
+        
+        if self.algorithm.lower()=='flooding':
+            # Check if msg has already been flooded
+            window = self.nodes.get(payload['source'])
+            if window is None:
+                window = self.nodes[payload['source']] = ReplayWindow(settings.REPLAY_WINDOW)
+
+            if not window.accept(payload['counter']):
+                logging.debug("Message already seen. Discarding message.")
+                return
+
+            payload['hops'] += 1
+            payload['distance'] += 1
+            payload['nodes'].append(self.node)
+
+            if payload['destination']==self.jid:
+                if payload['message'].lower()=='echo':
+                    payload['destination'] = self.names[payload['source']]
+                    payload['source'] = self.node
                     for node in self.topo[self.node]: # node's neighbors
                         neighbor = self.names[node]
-                        if msg['from'] != neighbor:
-                            self.message(neighbor, json.dumps(payload))
-
-            if self.algorithm.lower() == 'dv':
-                # if the message is about vector state, append to list for bellman-ford to process
-                if payload['type'] == "update":
-                    self.router.to_process.append((payload['sender'], payload['vector']))
-                # if the message is a normal communication, print if self is recipient, forward if not
-                elif payload['type'] == "comm":
-                    try:
-                        if self.router.node != payload['recipient_node']:
-                            payload['node_count'] += 1 # increment the node counter
-                            payload['node_list'].append(self.node) # append self node to node list
-
-                            dest = self.router.vector[payload['recipient_node']][1]
-                            self.message(self.router.names[dest], json.dumps(payload)) # forward message
-
-                            print(f""" FORWARDED MESSAGE RECEIVED
-                            --> FROM: [{payload['sender_node']}] {payload['sender']}
-                            --> TO: [{payload['recipient_node']}] {payload['recipient']}
-                            --> FORWARDED TO: [{dest}] {self.router.names[dest]}
-                            """)
-                        else:
-                            # print received message if intended recipient
-                            print(f""" MESSAGE RECEIVED
-                            --> FROM: [{payload['sender_node']}] {payload['sender']}
-                            --> TO: [{payload['recipient_node']}] {payload['recipient']}
-                            --> JUMPS: {payload['node_count']}
-                            --> NODES: {payload['node_list']}
-                            --> SAYS: {payload['message']}
-                            """)
-                    except KeyError:
-                        print("\nNODE NO LONGER EXISTS!\n")
+                        self.message(neighbor, json.dumps(payload), priority=DATA)
+                
+                else:
+                    self.deliver(payload['source'], payload['message'], payload['nodes'])
+            else:
+                logging.debug("Flooding message")
+                for node in self.topo[self.node]: # node's neighbors
+                    neighbor = self.names[node]
+                    if sender != neighbor:
+                        self.message(neighbor, json.dumps(payload), priority=DATA)
+
+        if self.algorithm.lower() == 'dv':
+            if self.liveness is not None and self.liveness.heard(sender, self.loop.time()):
+                self.neighbor_up(sender)
+
+            # if the message is about vector state, queue it for bellman-ford to process
+            if payload['type'] in ("update", "sync"):
+                self.updates.put_nowait(payload)
+            elif payload['type'] == "update-ack":
+                self.router.acknowledge(payload['sender'], payload['seq'])
+            elif payload['type'] == "resync" and payload['sender'] in self.router.neighbors:
+                self.send_updates(full=True, neighbors=[payload['sender']])
+            # liveness probes: any answer proves the link works
+            elif payload['type'] == "echo":
+                self.control(sender, {"type": "ack", "start_timestamp": payload['timestamp']})
+            elif payload['type'] == "ack":
+                pass
+            # if the message is a normal communication, print if self is recipient, forward if not
+            elif payload['type'] == "comm":
+                try:
+                    if self.router.node != payload['recipient_node']:
+                        payload['node_count'] += 1 # increment the node counter
+                        payload['node_list'].append(self.node) # append self node to node list
+
+                        dest = self.router.vector[payload['recipient_node']][1]
+                        self.message(self.router.names[dest], json.dumps(payload), priority=DATA) # forward message
+
+                        logging.debug(f"Forwarded message from {payload['sender_node']} to {payload['recipient_node']} through {dest}")
+                    else:
+                        # print received message if intended recipient
+                        self.deliver(payload['sender_node'], payload['message'], payload['node_list'])
+                except KeyError:
+                    print("\nNODE NO LONGER EXISTS!\n")
 
 
-            
-        elif msg['type'] in ('error'):
-            print('An error has ocurred.')
+    def message(self, recipient, message=None, key=None, priority=CONTROL):
+        """ Sends message to another router through the transport. Returns False if it was dropped. """
+        return self.transport.send(recipient, message, key, priority)
+
+    def control(self, recipient, payload, key=None):
+        """ Sends a distance vector control payload, binary encoded if the neighbor negotiated it. """
+        self.message(recipient, self.wire.dumps(payload, recipient), key)
+
+    def recv_topo(self, topo:dict):
+        self.topo = topo
+
+    def recv_names(self, addr:str, names:dict):
+        """ Identify node name based on names dict. """
+        for key, value in names.items():
+            if value == addr:
+                return key
+
+
+    def deliver(self, source, message, nodes):
+        """ Called when a user message reaches its destination. """
+        print(f""" MESSAGE RECEIVED
+        --> FROM: [{source}] {self.names.get(source)}
+        --> JUMPS: {len(nodes)}
+        --> NODES: {nodes}
+        --> SAYS: {message}
+        """)
+
+
+    def send(self, recipient, msg):
+        """
+        Sends a user message to recipient with the configured algorithm.
+        Returns the next hop node in distance vector mode.
+        """
+        if self.algorithm.lower()=='flooding':
+            self.counter += 1
+            payload = {
+                "counter": self.counter,
+                "source": self.node,
+                "destination": recipient,
+                "hops": 0,
+                "distance": 0,
+                "nodes": [],
+                "message": msg
+            }
+            for node in self.topo[self.node]: # node's neighbors
+                neighbor = self.names[node]
+                self.message(neighbor, json.dumps(payload), priority=DATA)
+
+        elif self.algorithm.lower() == 'dv':
+            recipient_node = self.recv_names(recipient, self.names)
+            if recipient_node not in self.router.vector:
+                print(f"Unknown route to {recipient}")
+                return None
+
+            payload = {
+                "type": "comm",
+                "sender": self.jid,
+                "sender_node": self.router.node,
+                "recipient": recipient,
+                "recipient_node": recipient_node,
+                "node_count": 1,
+                "node_list": [self.node],
+                "message": msg
+            }
+            intermediary = self.router.vector[recipient_node][1]
+
+            if not self.message(self.names[intermediary], json.dumps(payload), priority=DATA):
+                print(f"Outbound queue to {self.names[intermediary]} is full, message dropped")
+                return None
+            return intermediary
+
+
+class Client(slixmpp.ClientXMPP):
+
+    def __init__(self, jid, password, algorithm:str, topo:dict, names:dict, nfile, tfile, engine='dict', dataplane=None,
+                 detect_interval=settings.DETECT_INTERVAL, detect_multiplier=settings.DETECT_MULTIPLIER, snapshot=None):
+        slixmpp.ClientXMPP.__init__(self, jid, password)
+
+        self.nick = None
+
+        self.algorithm = algorithm
+        print(self.algorithm)
+
+        self.node = self.recv_names(self.boundjid.bare, names)
+        self.router = None
+        if self.algorithm.lower()=='dv':
+            if engine == 'numpy':
+                self.router = ArrayRouter(self.node, nfile, tfile)
+            else:
+                self.router = Router(self.node, nfile, tfile)
+
+        self.transport = XMPPTransport(self)
+        self.dataplane = None
+        if dataplane: # host:port for direct TCP links to the neighbors, XMPP stays for bootstrap
+            host, port = dataplane.rsplit(":", 1)
+            self.transport = self.dataplane = SocketTransport(self.boundjid.bare, host, int(port), fallback=self.transport)
+        # even with batching off (window and rate 0) it splits the batches neighbors send
+        self.transport = ScheduledTransport(self.transport)
+        self.routing = Node(self.transport, algorithm, topo, names, self.router,
+                            detect_interval=detect_interval, detect_multiplier=detect_multiplier, snapshot=snapshot)
+
+        # PLUGINS
+        self.register_plugin('xep_0030') # Service Discovery
+        self.register_plugin('xep_0199') # XMPP Ping
+
+        # EVENT HANDLERS
+        self.add_event_handler("session_start", self.session_start)
+        self.add_event_handler("session_start", self.app)
+
+
+    async def session_start(self, event):
+        """ Session start. Must send presence to server and get JID's roster. """
+        self.send_presence()
+
+        try:
+            await self.get_roster()
+        except IqError as err:
+            print('Error: %s' % err.iq['error']['condition'])
+        except IqTimeout:
+            print('Error: Request timed out')
+
+        if self.dataplane is not None:
+            await self.dataplane.start()
+            self.dataplane.announce([self.routing.names[node] for node in self.routing.topo.get(self.node, [])])
+        self.routing.start()
 
 
     def message(self, recipient, message=None, mtype='chat'):
@@ -204,9 +493,6 @@ class Client(slixmpp.ClientXMPP):
 
         msg.send()
 
-    def recv_topo(self, topo:dict):
-        self.topo = topo
-
     def recv_names(self, addr:str, names:dict):
         """ Identify node name based on names dict. """
         for key, value in names.items():
@@ -235,48 +521,14 @@ class Client(slixmpp.ClientXMPP):
                 while IN_CHAT:
                     msg = str(await ainput(">> "))
                     
-                    payload = {}
-
-                    if self.algorithm.lower()=='flooding':
-                        self.counter += 1
-                        payload = {
-                            "counter": self.counter,
-                            "source": self.node,
-                            "destination": recipient,
-                            "hops": 0,
-                            "distance": 0,
-                            "nodes": [],
-                            "message": msg
-                        }
-                    
-                    elif self.algorithm.lower() == 'dv':
-                        recipient_node = self.recv_names(recipient, self.names)
-                        payload = {
-                            "type": "comm",
-                            "sender": self.jid,
-                            "sender_node": self.router.node,
-                            "recipient": recipient,
-                            "recipient_node": recipient_node,
-                            "node_count": 1,
-                            "node_list": [self.node],
-                            "message": msg
-                        }
-
                     if msg != 'exit':
+                        await self.transport.drain() # wait for room instead of dropping
+                        intermediary = self.routing.send(recipient, msg)
 
-                        if self.algorithm.lower()=='flooding':
-                            for node in self.topo[self.node]: # node's neighbors
-                                neighbor = self.names[node]
-                                self.message(neighbor, json.dumps(payload))
-                        
-                        if self.algorithm.lower()=='dv':
-                            intermediary = self.router.vector[recipient_node][1]
-
-                            self.message(self.names[intermediary], json.dumps(payload))
-                    
+                        if intermediary is not None:
                             print(f"""SENT MESSAGE
-                            --> TO: [{recipient_node}] {recipient}
-                            --> THROUGH: [{intermediary}] {self.names[intermediary]}
+                            --> TO: {recipient}
+                            --> THROUGH: [{intermediary}] {self.routing.names[intermediary]}
                             """)
                     else:
                         IN_CHAT = False
@@ -310,6 +562,14 @@ if __name__=='__main__':
     
     parser.add_argument("-n", "--names", dest="names", help="Names filename.")
     parser.add_argument("-t", "--topo", dest="topo", help="Topology filename.")
+    parser.add_argument("-e", "--engine", dest="engine", choices=["dict", "numpy"], default=settings.DV_ENGINE,
+                        help="Distance vector engine: plain dicts or vectorized NumPy arrays.")
+    parser.add_argument("--dataplane", dest="dataplane", help="host:port to exchange routed traffic with the neighbors over TCP.")
+    parser.add_argument("--detect-interval", type=float, default=settings.DETECT_INTERVAL,
+                        help="Silence before a neighbor is probed, 0 disables failure detection.")
+    parser.add_argument("--detect-multiplier", type=int, default=settings.DETECT_MULTIPLIER,
+                        help="Silent intervals before a neighbor is declared down.")
+    parser.add_argument("--snapshot", help="File to save the distance vector state to, and to warm restart from.")
 
     args = parser.parse_args()
 
@@ -322,20 +582,9 @@ if __name__=='__main__':
     if args.password is None:
         args.password = getpass("Password: ")
 
-    nfile = 'names-demo.txt'
-    tfile = 'topo-demo.txt'
-
-    if args.topo:
-        topo = json_to_dict(args.topo)
-        tfile = args.topo
-    else:
-        topo = json_to_dict(input("Topo file: "))
-
-    if args.names:
-        names = json_to_dict(args.names)
-        nfile = args.names
-    else:
-        names = json_to_dict(input("Names file: "))
+    tfile = args.topo or input("Topo file: ")
+    nfile = args.names or input("Names file: ")
+    config = netConfig.load(nfile, tfile) # the router shares it
 
     if args.alg is None:
         print(settings.ALG_MENU)
@@ -352,7 +601,8 @@ if __name__=='__main__':
     print(f"Router ON with {settings.ALGORITHMS[args.alg]} routing algorithm.")
     print(f"Running node: {args.jid}")
 
-    xmpp = Client(args.jid, args.password, args.alg, topo=topo['config'], names=names['config'], nfile=nfile, tfile=tfile)
+    xmpp = Client(args.jid, args.password, args.alg, topo=config.topo, names=config.names, nfile=nfile, tfile=tfile, engine=args.engine, dataplane=args.dataplane,
+                  detect_interval=args.detect_interval, detect_multiplier=args.detect_multiplier, snapshot=args.snapshot)
 
     xmpp.connect()
     xmpp.process(forever=False)
\ No newline at end of file
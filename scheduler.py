@@ -0,0 +1,286 @@
+"""
+Outbound scheduling of the messages a router sends to its neighbors.
+
+ScheduledTransport wraps another Transport and keeps one queue per
+recipient. Messages wait at most a short flush window; queued messages with
+the same key are coalesced (only the newest is kept, e.g. the newest LSP of an
+origin) and everything queued for a recipient leaves as one batch stanza.
+
+Every queue has two classes: control (probes, LSPs, vector updates) always
+leaves before data (user messages). Timestamped echoes and acks (PROBE) skip
+the window and leave on their own, so link delays measured with them do not
+include the time spent queued. Stanzas are paced by a token bucket so a
+node stays under the server's rate limits, and the data class is bounded:
+send() drops data that does not fit and returns False, drain() waits until
+there is room again.
+
+A batch body is '#' followed by '<length>:<body>' for every message. Nodes
+always receive through a ScheduledTransport, since their neighbors may batch;
+with window and rate 0 it sends every message right away, unbatched.
+
+Instance example --> transport = ScheduledTransport(XMPPTransport(xmpp), window=0.02)
+                     transport.send(neighbor, body, key="lsp:" + origin)
+                     await transport.drain(); transport.send(next_hop, body, priority=DATA)
+"""
+
+import time
+import asyncio
+
+import settings
+from transport import Transport, CONTROL, DATA, PROBE
+
+BATCH_PREFIX = "#"
+
+
+def pack_batch(bodies):
+    return BATCH_PREFIX + "".join(f"{len(body)}:{body}" for body in bodies)
+
+
+def unpack_batch(batch):
+    bodies = []
+    pos = len(BATCH_PREFIX)
+    while pos < len(batch):
+        colon = batch.index(":", pos)
+        end = colon + 1 + int(batch[pos:colon])
+        bodies.append(batch[colon+1:end])
+        pos = end
+    return bodies
+
+
+class TokenBucket(object):
+    """
+    Allows rate events per second on average, in bursts of up to burst.
+
+    Arguments:
+        rate --> Tokens added per second, 0 means unlimited
+        burst --> Max tokens stored
+
+    Returns:
+        None
+    """
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self):
+        if not self.rate:
+            return True
+        self.refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def delay(self):
+        """ Seconds until the next token. """
+        if not self.rate:
+            return 0
+        self.refill()
+        return max(0, (1 - self.tokens) / self.rate)
+
+
+class ScheduledTransport(Transport):
+    """
+    Per neighbor prioritized outbound queues with coalescing, batching and pacing
+    on top of a transport.
+
+    Arguments:
+        transport --> Transport that actually sends the stanzas
+        window --> Seconds a message may wait for others to batch with
+        max_batch --> Messages per batch, a full queue is flushed right away
+        max_bytes --> Characters per batch, same
+        rate --> Stanzas per second the wrapped transport may send, 0 for no limit
+        burst --> Stanzas that may be sent back to back
+        max_data --> Data messages queued per neighbor before send() drops them
+
+    Returns:
+        None
+    """
+    def __init__(self, transport, window=settings.OUTBOUND_WINDOW, max_batch=settings.OUTBOUND_MAX_BATCH,
+                 max_bytes=settings.OUTBOUND_MAX_BYTES, rate=settings.OUTBOUND_RATE,
+                 burst=settings.OUTBOUND_BURST, max_data=settings.OUTBOUND_MAX_DATA):
+        Transport.__init__(self, transport.jid)
+        self.transport = transport
+        self.window = window
+        self.max_batch = max_batch
+        self.max_bytes = max_bytes
+        self.max_data = max_data
+        self.bucket = TokenBucket(rate, burst)
+
+        self.queues = {} # recipient -> (control entries, data entries), entries are [key, body]
+        self.keys = {} # recipient -> {key: entry}
+        self.sizes = {} # recipient -> characters queued
+        self.timers = {} # recipient -> flush window TimerHandle
+        self.ready = {} # recipients whose window is over, in arrival order
+        self.pump_timer = None # waiting for a token
+        self.waiters = [] # futures of drain() calls
+
+        self.started = time.monotonic()
+        self.stats = {
+            'messages': 0, # handed to send()
+            'coalesced': 0, # replaced by a newer message with the same key before leaving
+            'dropped': 0, # data refused because the neighbor queue was full
+            'stanzas': 0, # actually sent by the wrapped transport
+            'batches': 0, # stanzas carrying more than one message
+            'throttled': 0, # times the token bucket held stanzas back
+        }
+
+        self.transport.set_handler(self.receive_stanza)
+
+    def receive_stanza(self, sender, body):
+        if body.startswith(BATCH_PREFIX):
+            for message in unpack_batch(body):
+                self.receive(sender, message)
+        else:
+            self.receive(sender, body)
+
+    def send(self, recipient, body, key=None, priority=CONTROL):
+        """ Queues body for recipient. Returns False if it was dropped (data queue full). """
+        self.stats['messages'] += 1
+        if priority == PROBE and self.bucket.take():
+            self.stats['stanzas'] += 1
+            self.transport.send(recipient, pack_batch([body]) if body.startswith(BATCH_PREFIX) else body)
+            return True
+
+        queues = self.queues.get(recipient)
+        if queues is None:
+            queues = self.queues[recipient] = ([], [])
+            self.keys[recipient] = {}
+            self.sizes[recipient] = 0
+
+        keys = self.keys[recipient]
+        if key is not None and key in keys:
+            entry = keys[key]
+            self.sizes[recipient] += len(body) - len(entry[1])
+            entry[1] = body # keeps its place in the queue
+            self.stats['coalesced'] += 1
+            if priority == PROBE:
+                self.flush(recipient)
+            return True
+
+        queue = queues[DATA if priority == DATA else CONTROL]
+        if priority == DATA and len(queue) >= self.max_data:
+            self.stats['dropped'] += 1
+            return False
+
+        entry = [key, body]
+        if key is not None:
+            keys[key] = entry
+        if priority == PROBE: # throttled: first out when the rate allows
+            queue.insert(0, entry)
+        else:
+            queue.append(entry)
+        self.sizes[recipient] += len(body) + 8
+
+        if (len(queues[CONTROL]) + len(queues[DATA]) >= self.max_batch or self.sizes[recipient] >= self.max_bytes
+                or not self.window or priority == PROBE):
+            self.flush(recipient)
+        elif recipient not in self.timers and recipient not in self.ready:
+            self.timers[recipient] = asyncio.get_event_loop().call_later(self.window, self.flush, recipient)
+        return True
+
+    async def drain(self, recipient=None):
+        """ Waits until the data queue of recipient (or of every neighbor) has room. """
+        while self.full(recipient):
+            waiter = asyncio.get_event_loop().create_future()
+            self.waiters.append(waiter)
+            await waiter
+
+    def full(self, recipient=None):
+        recipients = self.queues if recipient is None else [recipient]
+        return any(len(self.queues[r][DATA]) >= self.max_data for r in recipients if r in self.queues)
+
+    def flush(self, recipient):
+        """ Ends the flush window of recipient; its queue leaves as soon as the rate allows. """
+        timer = self.timers.pop(recipient, None)
+        if timer is not None:
+            timer.cancel()
+        if recipient in self.queues:
+            self.ready[recipient] = True
+            if self.pump_timer is None: # otherwise already waiting for a token
+                self.pump()
+
+    def pump(self):
+        self.pump_timer = None
+        while self.ready:
+            # neighbors with control messages waiting go first
+            recipient = next((r for r in self.ready if self.queues[r][CONTROL]), None)
+            if recipient is None:
+                recipient = next(iter(self.ready))
+
+            if not self.bucket.take():
+                self.stats['throttled'] += 1
+                self.pump_timer = asyncio.get_event_loop().call_later(self.bucket.delay(), self.pump)
+                return
+
+            self.send_batch(recipient)
+            self.wake()
+
+    def send_batch(self, recipient):
+        control, data = self.queues[recipient]
+        batch = []
+        size = 0
+        for queue in (control, data):
+            while queue and len(batch) < self.max_batch and (not batch or size + len(queue[0][1]) <= self.max_bytes):
+                key, body = queue.pop(0)
+                if key is not None:
+                    del self.keys[recipient][key]
+                batch.append(body)
+                size += len(body) + 8
+        self.sizes[recipient] -= size
+
+        if not control and not data:
+            del self.queues[recipient]
+            del self.keys[recipient]
+            del self.sizes[recipient]
+            del self.ready[recipient]
+
+        self.stats['stanzas'] += 1
+        if len(batch) == 1 and not batch[0].startswith(BATCH_PREFIX):
+            self.transport.send(recipient, batch[0])
+        else:
+            self.stats['batches'] += 1
+            self.transport.send(recipient, pack_batch(batch))
+
+    def wake(self):
+        waiters, self.waiters = self.waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def flush_all(self):
+        for recipient in list(self.queues):
+            self.flush(recipient)
+
+    def close(self):
+        for timer in list(self.timers.values()) + [self.pump_timer]:
+            if timer is not None:
+                timer.cancel()
+        self.timers = {}
+        # whatever the rate allows right now still goes out
+        self.ready = {recipient: True for recipient in self.queues}
+        while self.ready and self.bucket.take():
+            recipient = next((r for r in self.ready if self.queues[r][CONTROL]), next(iter(self.ready)))
+            self.send_batch(recipient)
+        self.wake()
+        if hasattr(self.transport, 'close'):
+            self.transport.close()
+
+    def queued(self):
+        return sum(len(control) + len(data) for control, data in self.queues.values())
+
+    def metrics(self):
+        """ Counters plus the stanzas per second saved by coalescing and batching. """
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        metrics = dict(self.stats)
+        metrics['queued'] = self.queued()
+        metrics['saved'] = self.stats['messages'] - self.stats['dropped'] - self.stats['stanzas'] - metrics['queued']
+        metrics['saved_per_s'] = metrics['saved'] / elapsed
+        return metrics
@@ -13,6 +13,74 @@ DEBUG = bool(os.environ.get("DEBUG")) and os.environ.get("DEBUG").lower()=='true
 TESTING = bool(os.environ.get("TESTING")) and os.environ.get("TESTING").lower()=='true'
 DEFAULT_ALG = 'flooding'
 
+# Flooding duplicate suppression
+REPLAY_WINDOW = 256 # counters per source remembered behind the newest one
+
+# Distance vector
+DV_REFRESH = 30 # seconds between refresh/sync rounds when nothing changes
+DV_INFINITY = 64 # distance meaning "unreachable", bounds count-to-infinity
+DV_MAX_IN_FLIGHT = 8 # unacknowledged updates remembered per neighbor
+DV_ENGINE = 'dict' # 'dict' or 'numpy' (vectorDistance.ArrayRouter)
+
+# Link state database
+LSP_MAX_AGE = 3600 # lifetime of an LSP in seconds, counted down on each router's own clock, then it is purged
+LSP_AGE_TICK = 1 # seconds between two sweeps of the LSDB aging wheel
+LSP_PURGE_HOLD = 60 # seconds a purged origin is remembered, so late copies of its LSP are not taken back
+
+# Link weights (linkMetric.py)
+LINK_METRIC_ALPHA = 0.125 # gain of the smoothed echo delay
+LINK_METRIC_BETA = 0.25 # gain of its mean deviation
+LINK_METRIC_QUANTUM = 0.005 # seconds per weight bucket
+LINK_METRIC_HYSTERESIS = 0.2 # relative change needed before the weight moves
+
+# Link state timers (link.py, timers.py)
+HELLO_INTERVAL = 5 # seconds between echo probes right after a link changed
+HELLO_MAX_INTERVAL = 60 # probes back off up to this while the link weights are stable
+LSP_MIN_INTERVAL = 1 # hold down between two LSPs triggered by link changes
+LSP_REFRESH = 5 # first periodic re-flood of the own LSP after it changed
+LSP_MAX_REFRESH = 1800 # periodic re-floods back off up to this, keep it under LSP_MAX_AGE
+TIMER_JITTER = 0.25 # max fraction every interval is shortened by, so routers do not sync up
+
+# Names and topology files (netConfig.py)
+NAMES_FILE = "names-default.txt"
+TOPO_FILE = "topo-default.txt"
+CONFIG_POLL = 5 # seconds between checks of the files for changes, 0 disables hot reload
+
+# Warm restart (warmStart.py)
+SNAPSHOT_INTERVAL = 30 # seconds between snapshots of the routing state, only written if it changed
+SNAPSHOT_MAX_AGE = 600 # older snapshots are not loaded
+WARM_START_CONFIRM = 10 # seconds loaded state is used before what the neighbors did not confirm is dropped
+
+# Neighbor failure detection (liveness.py)
+DETECT_INTERVAL = 1.0 # seconds of silence before a neighbor is probed, 0 disables the detection
+DETECT_MULTIPLIER = 3 # silent intervals before a neighbor is declared down
+
+# Shortest paths (linkRouter.py, shortestPath.py)
+# Repair the shortest path tree of the LSPs that changed (shortestPath.DynamicSPF) instead of a full
+# SPF on every change. The repair is cheap enough to run on the event loop, so SPF_EXECUTOR is not
+# used; with LFA on, every build still runs one full SPF per neighbor and most of the gain is lost
+INCREMENTAL_SPF = True
+
+# Multipath forwarding (linkRouter.py)
+MULTIPATH = 'ecmp' # 'off', 'ecmp' (every equal cost next hop) or 'ucmp' (also costlier loop free ones, weighted)
+UCMP_STRETCH = 0.5 # ucmp keeps next hops whose path costs up to this fraction more than the best one
+# Precompute a loop free alternate next hop per destination, so traffic leaves a failed neighbor
+# before the SPF runs again. Off by default: it costs one full SPF per neighbor on every route
+# build (2.5-3x slower builds, also when DynamicSPF repaired the tree with INCREMENTAL_SPF)
+LFA = False
+SPF_EXECUTOR = 'thread' # where link state routes are computed: 'inline', 'thread' or 'process' (routeWorker.py)
+
+# Control messages
+WIRE_FORMAT = 'binary' # 'binary' (wire.py, negotiated per neighbor) or 'json'
+
+# Outbound scheduler (scheduler.py)
+OUTBOUND_WINDOW = 0.02 # seconds a message waits to be batched with others, 0 disables the scheduler
+OUTBOUND_MAX_BATCH = 32 # messages per batch stanza
+OUTBOUND_MAX_BYTES = 32768 # characters per batch stanza
+OUTBOUND_RATE = 25 # stanzas per second sent to the server, 0 for no limit
+OUTBOUND_BURST = 50 # stanzas that may go back to back before the rate applies
+OUTBOUND_MAX_DATA = 256 # user messages queued per neighbor before new ones are dropped
+
 
 # Constants
 MAIN_MENU = """
@@ -0,0 +1,349 @@
+"""
+Multi-process version of emulator.Emulator for large topologies.
+
+The topology is partitioned into one shard per process (one asyncio loop per
+core). Links inside a shard go through that shard's in-memory network, links
+across shards go over local socket pairs between the shard processes. The
+partitioner keeps shards balanced while cutting as few links as possible.
+
+Instance example --> emulator = ShardedEmulator("names.txt", "topo.txt", "dv", shards=8)
+                     result = emulator.run(duration=10)
+"""
+
+import os
+import json
+import time
+import socket
+import struct
+import asyncio
+import multiprocessing
+
+import settings
+from emulator import Emulator
+from transport import LoopbackNetwork
+import netConfig
+
+FRAME_HEADER = struct.Struct("!I")
+
+
+def undirected(topo):
+    """ {node: set(neighbors)} with every link in both directions. """
+    graph = {node: set() for node in topo}
+    for node, neighbors in topo.items():
+        for neighbor in neighbors:
+            if neighbor in graph and neighbor != node:
+                graph[node].add(neighbor)
+                graph[neighbor].add(node)
+    return graph
+
+
+def cut_edges(graph, assignment):
+    return sum(1 for node in graph for neighbor in graph[node] if node < neighbor and assignment[node] != assignment[neighbor])
+
+
+def partition(topo, parts, imbalance=0.05, passes=4):
+    """
+    Splits the nodes of a topology into balanced parts with few links between them.
+
+    Parts are first grown one at a time by BFS, so each one is a connected
+    region. Then a few greedy refinement passes move boundary nodes to the part
+    most of their neighbors are in, as long as the cut shrinks and parts stay
+    within `imbalance` of the average size.
+
+    Arguments:
+        topo --> Topology dict {node: [neighbor nodes]}
+        parts --> Number of parts
+        imbalance --> Allowed extra size of a part over the average, as a fraction
+        passes --> Max refinement passes
+
+    Returns:
+        Dict {node: part index}
+    """
+    graph = undirected(topo)
+    nodes = sorted(graph, key=lambda node: len(graph[node]))
+    target = -(-len(nodes) // parts) # ceil
+    limit = max(target, int(target * (1 + imbalance)))
+
+    assignment = {}
+    sizes = [0] * parts
+    part = 0
+    for seed in nodes:
+        if seed in assignment:
+            continue
+        queue = [seed]
+        assignment[seed] = part
+        sizes[part] += 1
+        for node in queue:
+            for neighbor in sorted(graph[node]):
+                if neighbor in assignment:
+                    continue
+                if sizes[part] >= target:
+                    break
+                assignment[neighbor] = part
+                sizes[part] += 1
+                queue.append(neighbor)
+            if sizes[part] >= target:
+                break
+        if sizes[part] >= target and part < parts - 1:
+            part += 1
+
+    for _ in range(passes):
+        moved = 0
+        for node in nodes:
+            current = assignment[node]
+            counts = {}
+            for neighbor in graph[node]:
+                counts[assignment[neighbor]] = counts.get(assignment[neighbor], 0) + 1
+            best = max(counts, key=counts.get, default=current)
+            if best != current and counts[best] > counts.get(current, 0) and sizes[best] < limit and sizes[current] > 1:
+                assignment[node] = best
+                sizes[best] += 1
+                sizes[current] -= 1
+                moved += 1
+        if not moved:
+            break
+
+    return assignment
+
+
+class ShardNetwork(LoopbackNetwork):
+    """
+    LoopbackNetwork of one shard. Messages to nodes owned by other shards are
+    framed and written to the socket of that shard; frames read from the peers
+    are delivered locally after the link latency.
+
+    Arguments:
+        owner --> Dict {jid: shard index} for every node of the topology
+        shard --> Index of this shard
+        latency, loss, seed --> Same as LoopbackNetwork
+
+    Returns:
+        None
+    """
+    def __init__(self, owner, shard, latency=0.0, loss=0.0, seed=None):
+        LoopbackNetwork.__init__(self, latency, loss, seed)
+        self.owner = owner
+        self.shard = shard
+        self.writers = {}
+        self.remote_sent = 0
+        self.closed = False
+
+    def schedule(self, sender, recipient, body):
+        shard = self.owner.get(recipient, self.shard)
+        if shard == self.shard:
+            LoopbackNetwork.schedule(self, sender, recipient, body)
+            return
+
+        if self.closed:
+            self.dropped += 1
+            return
+
+        frame = json.dumps([sender, recipient, body]).encode()
+        self.writers[shard].write(FRAME_HEADER.pack(len(frame)) + frame)
+        self.remote_sent += 1
+
+    async def read_peer(self, reader):
+        try:
+            while True:
+                header = await reader.readexactly(FRAME_HEADER.size)
+                sender, recipient, body = json.loads(await reader.readexactly(FRAME_HEADER.unpack(header)[0]))
+                LoopbackNetwork.schedule(self, sender, recipient, body)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+
+
+def routes_of(node):
+    """ Number of destinations a node can route to, None for flooding nodes. """
+    router = getattr(node, 'router', None)
+    if router is None:
+        return None
+    if hasattr(router, 'forwarding_table'):
+        return len(router.forwarding_table)
+    return len(router.vector) - 1
+
+
+async def run_shard(shard, config, peers):
+    network = ShardNetwork(config['owner'], shard, config['latency'], config['loss'], config['seed'] + shard)
+
+    readers = []
+    for peer, sock in peers.items():
+        reader, writer = await asyncio.open_connection(sock=sock)
+        network.writers[peer] = writer
+        readers.append(asyncio.ensure_future(network.read_peer(reader)))
+
+    members = config['members'][shard]
+    emulator = Emulator(config['names'], config['topo'], config['algorithm'], engine=config['engine'],
+                        network=network, members=members, wire=config['wire'])
+    build_time = time.time() - config['created']
+
+    # every shard starts its nodes at the same wall clock time
+    await asyncio.sleep(max(0, config['start_at'] - time.time()))
+    emulator.start()
+
+    convergence = None
+    expected = config['expected']
+    deadline = config['start_at'] + config['duration']
+    while time.time() < deadline:
+        await asyncio.sleep(config['poll'])
+        if convergence is None and all(routes_of(node) is not None and routes_of(node) >= expected[jid]
+                                       for jid, node in emulator.nodes.items()):
+            convergence = time.time() - config['start_at']
+
+    for source, recipient, message in config['sends']:
+        if source in emulator.nodes:
+            emulator.send(source, recipient, message)
+    await asyncio.sleep(max(0, deadline + config['settle'] - time.time()))
+
+    # stop writing first and give the other shards time to stop too before closing the sockets
+    emulator.stop()
+    network.closed = True
+    await asyncio.sleep(config['linger'])
+    for task in readers:
+        task.cancel()
+    for writer in network.writers.values():
+        writer.close()
+
+    stats = emulator.stats()
+    stats.update({
+        'shard': shard,
+        'remote_messages': network.remote_sent,
+        'setup_s': build_time,
+        'convergence_s': convergence,
+        'delivered': emulator.delivered,
+    })
+    return stats
+
+
+def shard_main(shard, config, peers, conn):
+    conn.send(asyncio.run(run_shard(shard, config, peers)))
+    conn.close()
+
+
+class ShardedEmulator(object):
+    """
+    Runs a names/topo network split across a pool of processes.
+
+    Arguments:
+        names --> Names file in json format
+        topo --> Topology file in json format
+        algorithm --> 'flooding', 'dv' or 'ls'
+        shards --> Number of processes, one per core by default
+        latency, loss, seed, engine, wire --> Same as emulator.Emulator
+
+    Returns:
+        None
+    """
+    def __init__(self, names, topo, algorithm, shards=None, latency=0.0, loss=0.0, seed=None, engine='dict', wire=settings.WIRE_FORMAT):
+        self.names_file = names
+        self.topo_file = topo
+        self.algorithm = algorithm
+        self.latency = latency
+        self.loss = loss
+        self.seed = seed or 0
+        self.engine = engine
+        self.wire = wire
+
+        self.config = netConfig.load(names, topo) # parsed once, shared with the routers
+        self.names = self.config.names
+        self.topo = self.config.topo
+        self.shards = max(1, min(shards or os.cpu_count() or 1, len(self.names)))
+
+        self.assignment = partition(self.topo, self.shards)
+        self.cut = cut_edges(undirected(self.topo), self.assignment)
+
+    def expected_routes(self):
+        """ Destinations each node should reach: the size of its component minus one. """
+        graph = undirected(self.topo)
+        expected = {}
+        for start in graph:
+            if self.names[start] in expected:
+                continue
+            component = [start]
+            seen = {start}
+            for node in component:
+                for neighbor in graph[node]:
+                    if neighbor not in seen:
+                        seen.add(neighbor)
+                        component.append(neighbor)
+            for node in component:
+                expected[self.names[node]] = len(component) - 1
+        return expected
+
+    def run(self, duration, sends=(), settle=1.0, poll=0.1, startup=None):
+        """
+        Runs every shard for `duration` seconds, then sends the (source, recipient,
+        message) user messages in `sends` and waits `settle` seconds for them.
+
+        Returns:
+            Dict with the aggregated counters, the per shard results, the cut
+            size and every delivery recorded by the shards.
+        """
+        members = [[] for _ in range(self.shards)]
+        for node, shard in self.assignment.items():
+            members[shard].append(node)
+
+        # generous head start so every shard has built its routers before the clock starts
+        if startup is None:
+            startup = 2 + len(self.names) / 2000
+
+        config = {
+            'names': self.names_file,
+            'topo': self.topo_file,
+            'algorithm': self.algorithm,
+            'engine': self.engine,
+            'wire': self.wire,
+            'latency': self.latency,
+            'loss': self.loss,
+            'seed': self.seed,
+            'owner': {self.names[node]: shard for node, shard in self.assignment.items()},
+            'members': members,
+            'expected': self.expected_routes(),
+            'sends': list(sends),
+            'duration': duration,
+            'settle': settle,
+            'poll': poll,
+            'linger': 0.5,
+            'created': time.time(),
+            'start_at': time.time() + startup,
+        }
+
+        peers = [{} for _ in range(self.shards)]
+        for a in range(self.shards):
+            for b in range(a + 1, self.shards):
+                peers[a][b], peers[b][a] = socket.socketpair()
+
+        context = multiprocessing.get_context('fork')
+        processes = []
+        pipes = []
+        for shard in range(self.shards):
+            parent_conn, child_conn = context.Pipe(duplex=False)
+            process = context.Process(target=shard_main, args=(shard, config, peers[shard], child_conn))
+            process.start()
+            processes.append(process)
+            pipes.append(parent_conn)
+
+        for shard_peers in peers:
+            for sock in shard_peers.values():
+                sock.close()
+
+        results = [conn.recv() for conn in pipes]
+        for process in processes:
+            process.join()
+
+        delivered = []
+        for result in results:
+            delivered.extend(result.pop('delivered'))
+
+        convergences = [result['convergence_s'] for result in results]
+        return {
+            'shards': self.shards,
+            'nodes': len(self.names),
+            'cut_links': self.cut,
+            'messages': sum(result['messages'] for result in results),
+            'bytes': sum(result['bytes'] for result in results),
+            'remote_messages': sum(result['remote_messages'] for result in results),
+            'dropped': sum(result['dropped'] for result in results),
+            'convergence_s': None if None in convergences else max(convergences),
+            'per_shard': results,
+            'delivered': delivered,
+        }
@@ -0,0 +1,267 @@
+"""
+Shortest path first (SPF) engine used by the link state router.
+
+Graphs are lists of adjacency dicts indexed by integer node ids, so that
+graph[u] = {v: weight, ...}. Node ids go from 0 to len(graph) - 1.
+"""
+
+import heapq
+
+INFINITY = float('inf')
+
+
+def dijkstra(graph, source):
+    """
+    Priority queue (binary heap) Dijkstra from a single source.
+
+    Arguments:
+        graph --> List of adjacency dicts indexed by node id
+        source --> Id of the starting node
+
+    Returns:
+        Tuple (distance, previous, first_hop) of lists indexed by node id.
+        Unreachable nodes keep INFINITY / None.
+    """
+    num_nodes = len(graph)
+    distance = [INFINITY] * num_nodes
+    previous = [None] * num_nodes
+    first_hop = [None] * num_nodes
+
+    distance[source] = 0
+    heap = [(0, source)]
+
+    while heap:
+        current_dist, current = heapq.heappop(heap)
+        if current_dist > distance[current]:
+            continue # stale heap entry
+
+        hop = first_hop[current]
+        for node, weight in graph[current].items():
+            new_dist = current_dist + weight
+            if new_dist < distance[node]:
+                distance[node] = new_dist
+                previous[node] = current
+                first_hop[node] = node if current == source else hop
+                heapq.heappush(heap, (new_dist, node))
+
+    return distance, previous, first_hop
+
+
+def equal_cost_hops(graph, source, distance, tolerance=1e-9):
+    """
+    First hops of every shortest path from source, for equal cost multipath.
+
+    Arguments:
+        graph --> List of adjacency dicts indexed by node id
+        source --> Id of the starting node
+        distance --> Distance list returned by dijkstra for source
+        tolerance --> Relative slack for two path costs to count as equal
+
+    Returns:
+        List indexed by node id of the set of first hop ids, empty if unreachable
+    """
+    hops = [set() for _ in graph]
+    order = sorted((d, node) for node, d in enumerate(distance) if d < INFINITY)
+
+    # parents are settled before their children, so their hop sets are complete
+    for current_dist, current in order:
+        inherited = hops[current]
+        for node, weight in graph[current].items():
+            new_dist = current_dist + weight
+            if abs(new_dist - distance[node]) <= tolerance * max(1, distance[node]):
+                if current == source:
+                    hops[node].add(node)
+                else:
+                    hops[node] |= inherited
+
+    return hops
+
+
+def build_path(previous, source, target):
+    """
+    Rebuilds the path from source to target out of a predecessor list.
+
+    Arguments:
+        previous --> Predecessor list returned by dijkstra
+        source --> Id of the starting node
+        target --> Id of the destination node
+
+    Returns:
+        List of node ids from source to target, empty if unreachable
+    """
+    if target != source and previous[target] is None:
+        return []
+
+    path = [target]
+    while target != source:
+        target = previous[target]
+        path.append(target)
+
+    path.reverse()
+    return path
+
+
+class DynamicSPF(object):
+    """
+    Shortest path tree that is repaired in place when edge weights change,
+    instead of rerunning dijkstra from scratch.
+
+    Decreases (and new edges) propagate improvements from the head of the
+    edge. Increases (and removed edges) only matter for tree edges: the
+    subtree hanging from the edge is detached and re-attached with a
+    dijkstra limited to that subtree.
+
+    Arguments:
+        graph --> List of adjacency dicts indexed by node id. Owned by the
+                  instance from now on, change it only through update_edge
+                  or update_row. Changed rows are replaced, not edited, so
+                  a tuple(graph) snapshot stays valid.
+        source --> Id of the root of the tree
+    """
+
+    def __init__(self, graph, source):
+        self.graph = graph
+        self.source = source
+
+        self.reverse = [{} for _ in graph]
+        for node, edges in enumerate(graph):
+            for neighbor, weight in edges.items():
+                self.reverse[neighbor][node] = weight
+
+        self.distance, self.previous, self.first_hop = dijkstra(graph, source)
+
+        self.children = [set() for _ in graph]
+        for node, parent in enumerate(self.previous):
+            if parent is not None:
+                self.children[parent].add(node)
+
+    def set_parent(self, node, parent):
+        old_parent = self.previous[node]
+        if old_parent is not None:
+            self.children[old_parent].discard(node)
+        self.previous[node] = parent
+
+        if parent is None:
+            self.first_hop[node] = None
+        else:
+            self.children[parent].add(node)
+            self.first_hop[node] = node if parent == self.source else self.first_hop[parent]
+
+    def update_row(self, node, weights):
+        """
+        Replaces every outgoing edge of node, e.g. with the weights of its LSP.
+
+        Arguments:
+            node --> Id of the node whose links changed
+            weights --> Dict {neighbor id: weight}
+
+        Returns:
+            True if any edge actually changed
+        """
+        old_weights = self.graph[node]
+        self.graph[node] = dict(old_weights)
+        changed = False
+
+        for neighbor in [n for n in old_weights if n not in weights]:
+            self.set_edge(node, neighbor, None)
+            changed = True
+
+        for neighbor, weight in weights.items():
+            if old_weights.get(neighbor) != weight:
+                self.set_edge(node, neighbor, weight)
+                changed = True
+
+        return changed
+
+    def update_edge(self, tail, head, weight):
+        """
+        Sets the weight of edge tail -> head and repairs the tree.
+
+        Arguments:
+            tail --> Id of the node the edge leaves from
+            head --> Id of the node the edge goes to
+            weight --> New weight, None removes the edge
+
+        Returns:
+            None
+        """
+        self.graph[tail] = dict(self.graph[tail])
+        self.set_edge(tail, head, weight)
+
+    def set_edge(self, tail, head, weight):
+        # rows are replaced, never edited where a snapshot could share them
+        old_weight = self.graph[tail].get(head)
+        self.reverse[head] = dict(self.reverse[head])
+
+        if weight is None:
+            self.graph[tail].pop(head, None)
+            self.reverse[head].pop(tail, None)
+        else:
+            self.graph[tail][head] = weight
+            self.reverse[head][tail] = weight
+
+        if weight is not None and (old_weight is None or weight < old_weight):
+            self.decrease(tail, head, weight)
+        elif old_weight is not None and self.previous[head] == tail:
+            self.increase(head)
+
+    def decrease(self, tail, head, weight):
+        new_dist = self.distance[tail] + weight
+        if new_dist >= self.distance[head]:
+            return
+
+        self.distance[head] = new_dist
+        self.set_parent(head, tail)
+
+        heap = [(new_dist, head)]
+        while heap:
+            current_dist, current = heapq.heappop(heap)
+            if current_dist > self.distance[current]:
+                continue
+
+            for node, edge_weight in self.graph[current].items():
+                candidate = current_dist + edge_weight
+                if candidate < self.distance[node]:
+                    self.distance[node] = candidate
+                    self.set_parent(node, current)
+                    heapq.heappush(heap, (candidate, node))
+
+    def increase(self, root):
+        # detach the subtree rooted at root
+        subtree = set()
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            subtree.add(node)
+            stack.extend(self.children[node])
+
+        for node in subtree:
+            self.distance[node] = INFINITY
+
+        # best entry point into each detached node from the untouched part of the tree
+        heap = []
+        for node in subtree:
+            best, parent = INFINITY, None
+            for tail, weight in self.reverse[node].items():
+                if tail not in subtree and self.distance[tail] + weight < best:
+                    best, parent = self.distance[tail] + weight, tail
+
+            self.distance[node] = best
+            self.set_parent(node, parent)
+            if parent is not None:
+                heapq.heappush(heap, (best, node))
+
+        # dijkstra limited to the detached nodes
+        while heap:
+            current_dist, current = heapq.heappop(heap)
+            if current_dist > self.distance[current]:
+                continue
+
+            for node, weight in self.graph[current].items():
+                if node not in subtree:
+                    continue
+                candidate = current_dist + weight
+                if candidate < self.distance[node]:
+                    self.distance[node] = candidate
+                    self.set_parent(node, current)
+                    heapq.heappush(heap, (candidate, node))
@@ -0,0 +1,65 @@
+"""
+envelope.Envelope header encoding, forwarding and the legacy json format.
+"""
+
+import json
+
+import pytest
+
+from envelope import Envelope, parse
+
+PATH = ["a@x", "b@x", "c@x"]
+
+
+def test_flow_id_travels_with_the_message():
+    message = Envelope("direct", "a@x", "c@x", "hi", path=PATH, nodes="a@x", flow="7").encode()
+    forwarded = parse(parse(message).forward("b@x").encode())
+    assert forwarded.flow == "7"
+    assert (forwarded.source, forwarded.destination) == ("a@x", "c@x")
+
+
+def test_header_without_flow_keeps_the_previous_layout():
+    message = Envelope("direct", "a@x", "c@x", "hi", path=PATH, nodes="a@x").encode()
+    assert len(message.split("\n", 1)[0].split(" ")) == 8
+    assert parse(message).flow is None
+
+
+def test_round_trip_keeps_every_field_and_the_body_as_is():
+    body = '{"type": "lsp", "note": "spaces and\nnewlines"}'
+    envelope = Envelope("lsp", "a@x", "b@x", body, hops=2, index=1, path=PATH, nodes="a@xb@x")
+    parsed = parse(envelope.encode())
+    assert (parsed.kind, parsed.source, parsed.destination, parsed.body) == ("lsp", "a@x", "b@x", body)
+    assert (parsed.hops, parsed.index, parsed.path, parsed.nodes) == (2, 1, PATH, "a@xb@x")
+
+
+def test_empty_fields_come_back_empty():
+    parsed = parse(Envelope("echo", "a@x", None, "{}").encode())
+    assert parsed.destination is None
+    assert parsed.path == [] and parsed.nodes == ""
+
+
+def test_forward_counts_the_hop_and_follows_the_path():
+    envelope = Envelope("direct", "a@x", "c@x", "hi", path=PATH, nodes="a@x")
+    forwarded = parse(envelope.encode()).forward("b@x")
+    assert (forwarded.hops, forwarded.index, forwarded.nodes) == (1, 1, "a@xb@x")
+    assert forwarded.next_on_path("b@x") == "c@x"
+    assert forwarded.body == envelope.body
+
+
+def test_legacy_json_messages_are_converted():
+    direct = json.dumps({'from_node': "a@x", 'to_node': "c@x", 'jumps': 1, 'nodes': "a@x",
+                         'payload': {'type': "direct", 'message': "hi", 'path': PATH}})
+    parsed = parse(direct)
+    assert (parsed.kind, parsed.source, parsed.destination, parsed.body) == ("direct", "a@x", "c@x", "hi")
+    assert (parsed.hops, parsed.path, parsed.nodes) == (1, PATH, "a@x")
+
+    lsp = {'type': "lsp", 'lsp': {'origin': "a@x", 'seq': 1}}
+    parsed = parse(json.dumps({'from_node': "a@x", 'to_node': "b@x", 'payload': lsp}))
+    assert parsed.kind == "lsp"
+    assert parsed.payload() == lsp
+
+
+def test_unknown_headers_are_rejected():
+    for message in ("ENV1 direct a@x\nhi", "ENV2 direct a@x c@x 0 0 - - \nhi", "no header"):
+        with pytest.raises(ValueError):
+            parse(message)
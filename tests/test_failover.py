@@ -0,0 +1,96 @@
+"""
+Failover in the emulator: silent neighbors are declared down on time however
+far the hellos backed off, and after neighbor_down link state traffic takes the
+loop free alternate right away, before any SPF runs again.
+"""
+
+import json
+import asyncio
+
+import pytest
+
+import netConfig
+from emulator import Emulator
+from timers import Backoff
+
+#   A --- B --- D --- E     A reaches D and E through B. C is their loop free
+#   |           |           alternate: its own path to D goes C-X-D, not back
+#   C --------- X           through A.
+TOPO = {
+    'A': ['B', 'C'],
+    'B': ['A', 'D'],
+    'C': ['A', 'X'],
+    'X': ['C', 'D'],
+    'D': ['B', 'X', 'E'],
+    'E': ['D'],
+}
+
+
+def jid(node):
+    return node.lower() + "@test.local"
+
+
+@pytest.fixture
+def files(tmp_path):
+    names_file, topo_file = tmp_path / "names.txt", tmp_path / "topo.txt"
+    names_file.write_text(json.dumps({'type': "names", 'config': {node: jid(node) for node in TOPO}}))
+    topo_file.write_text(json.dumps({'type': "topo", 'config': TOPO}))
+    yield str(names_file), str(topo_file)
+    netConfig._configs.clear()
+
+
+def test_traffic_takes_the_alternate_right_after_neighbor_down(files):
+    async def scenario():
+        # full SPFs run in the worker thread, so the alternate is all that moves at once
+        emulator = Emulator(*files, 'ls', latency=0.002, seed=1, multipath='off', lfa=True, incremental=False)
+        emulator.start()
+        await asyncio.sleep(3) # links measured and LSPs flooded
+        router = emulator.nodes[jid('A')].router
+        before = (router.route(jid('E')), router.backups.get(jid('E')))
+
+        emulator.fail_link(jid('A'), jid('B'), notify=True)
+        # no SPF ran since: the repair is the alternate alone
+        repaired = (router.route(jid('E')), router.table_version < router.topology_version)
+
+        emulator.send(jid('A'), jid('E'), "after the cut")
+        await asyncio.sleep(0.5)
+        emulator.stop()
+        return before, repaired, emulator.delivered
+
+    (route, backup), ((hop, _), pending_spf), delivered = asyncio.run(scenario())
+    assert route[0] == jid('B')
+    assert backup[0] == jid('C')
+    assert hop == jid('C')
+    assert pending_spf
+
+    arrived = [nodes for _, recipient, _, message, nodes in delivered
+               if recipient == jid('E') and message == "after the cut"]
+    assert len(arrived) == 1
+    assert jid('C') in arrived[0] and jid('B') not in arrived[0]
+
+
+def test_silent_neighbor_is_declared_down_on_time_after_the_hellos_backed_off(files):
+    interval, multiplier = 0.1, 3
+
+    async def scenario():
+        emulator = Emulator(*files, 'ls', latency=0.002, seed=1, multipath='off')
+        for node in emulator.nodes.values():
+            node.hello = Backoff(0.05, 2.0, 0)
+            node.detect = Backoff(interval, interval, 0)
+            node.detect_multiplier = multiplier
+        emulator.start()
+        await asyncio.sleep(3.5) # stable links: the hellos back off to 2 s
+        node = emulator.nodes[jid('A')]
+        backed_off = node.hello.interval
+
+        cut = asyncio.get_event_loop().time()
+        emulator.fail_link(jid('A'), jid('B'))
+        await asyncio.sleep(1)
+        emulator.stop()
+        return backed_off, cut, node.failovers
+
+    backed_off, cut, failovers = asyncio.run(scenario())
+    assert backed_off > interval * multiplier
+    assert [neighbor for _, neighbor in failovers] == [jid('B')]
+    # silent for multiplier intervals, noticed by the next liveness check
+    assert failovers[0][0] - cut <= interval * (multiplier + 1)
@@ -0,0 +1,207 @@
+"""
+linkRouter.Router route installation and local repair.
+"""
+
+import json
+import asyncio
+from time import time
+
+import pytest
+
+import linkRouter
+from settings import LSP_PURGE_HOLD
+from routeWorker import RouteWorker
+
+#   B --- D --- E      A reaches D and E through B, with C as their
+#  1|     |1           loop free alternate: C's own path to D does
+#   A --- C            not come back through A.
+#      2
+WEIGHTS = {
+    'A': {'B': 1, 'C': 2},
+    'B': {'A': 1, 'D': 1},
+    'C': {'A': 2, 'D': 1},
+    'D': {'B': 1, 'C': 1, 'E': 1},
+    'E': {'D': 1},
+}
+
+
+def jid(node):
+    return node.lower() + "@test.local"
+
+
+@pytest.fixture
+def router(tmp_path):
+    return make_router(tmp_path, lfa=True)
+
+
+def make_router(tmp_path, **options):
+    names_file, topo_file = tmp_path / "names.txt", tmp_path / "topo.txt"
+    names_file.write_text(json.dumps({'type': "names", 'config': {node: jid(node) for node in WEIGHTS}}))
+    topo_file.write_text(json.dumps({'type': "topo", 'config': {node: sorted(weights) for node, weights in WEIGHTS.items()}}))
+
+    router = linkRouter.Router(jid('A'), str(names_file), str(topo_file), **options)
+    router.neighbors_distance = {jid(node): weight for node, weight in WEIGHTS['A'].items()}
+    router.build_package()
+    for node, weights in WEIGHTS.items():
+        if node != 'A':
+            lsp(router, node, weights, seq=1)
+    router.build_graph_matrix()
+    return router
+
+
+def lsp(router, node, weights, seq):
+    return router.install_lsp({'origin': jid(node), 'seq': seq, 'age': time(), 'lifetime': 3600,
+                               'weights': {jid(neighbor): weight for neighbor, weight in weights.items()}})
+
+
+def hop(router, node):
+    return router.forwarding_table[jid(node)][0]
+
+
+def test_alternates_are_loop_free(router):
+    assert hop(router, 'D') == jid('B')
+    assert router.backups[jid('D')] == (jid('C'), [jid('A'), jid('C'), jid('D')])
+    assert router.backups[jid('E')] == (jid('C'), [jid('A'), jid('C'), jid('D'), jid('E')])
+
+
+def test_neighbor_down_moves_to_the_alternate(router):
+    router.neighbor_down(jid('B'))
+    assert hop(router, 'D') == jid('C')
+    assert router.route(jid('E')) == (jid('C'), [jid('A'), jid('C'), jid('D'), jid('E')])
+
+
+def test_neighbor_down_leaves_the_spf_to_the_worker(router):
+    router.lfa = False
+    router.neighbor_down(jid('B'))
+    # the graph already lost the link, the routes wait for the worker
+    assert router.index[jid('B')] not in router.distances[router.index[router.name]]
+    assert router.table_version < router.topology_version
+
+    RouteWorker(router, 'inline').request()
+    assert router.table_version == router.topology_version
+    assert hop(router, 'D') == jid('C')
+    assert hop(router, 'E') == jid('C')
+
+
+def test_routes_computed_before_a_failure_are_repaired(router):
+    # an LSP arrives and its routes are computed in the background...
+    lsp(router, 'E', {'D': 2}, seq=2)
+    graph, version, tree = router.snapshot()
+    routes = linkRouter.compute_routes(graph, router.index[router.name], router.jids, version,
+                                       router.multipath_mode, router.lfa, tree)
+
+    # ...while B fails and the traffic moves to the alternate
+    router.neighbor_down(jid('B'))
+    assert hop(router, 'E') == jid('C')
+
+    assert router.install(routes)
+    assert hop(router, 'D') == jid('C')
+    assert hop(router, 'E') == jid('C')
+
+
+def test_dynamic_spf_routes_are_built_in_the_executor(tmp_path):
+    router = make_router(tmp_path, incremental=True)
+
+    async def scenario():
+        worker = RouteWorker(router, 'thread')
+        lsp(router, 'B', {'A': 1, 'D': 5}, seq=2) # the tree is repaired right away...
+        graph, _, tree = router.snapshot()
+        worker.request()
+        assert worker.stats['runs'] == 1 # ...the table is not: it is built off the loop
+        assert hop(router, 'E') == jid('B')
+
+        lsp(router, 'B', {'A': 1, 'D': 1}, seq=3)
+        worker.request() # coalesced into one more run
+        # what the first run reads is not touched by the newer LSP
+        assert graph[router.index[jid('B')]] == {router.index[jid('A')]: 1, router.index[jid('D')]: 5}
+        assert tree[1][router.index[jid('D')]] == router.index[jid('C')]
+        for _ in range(1000):
+            if router.table_version == router.topology_version:
+                break
+            await asyncio.sleep(0.001)
+        assert worker.stats['runs'] == 2
+
+    asyncio.run(scenario())
+    assert hop(router, 'E') == jid('B')
+
+
+@pytest.mark.parametrize("skew", [-10 * 3600, 10 * 3600])
+def test_lsp_lifetime_runs_on_the_local_clock(router, skew):
+    # the origin's clock is hours off ours: its LSP is taken and ages out on our clock
+    now = time()
+    assert router.install_lsp({'origin': jid('E'), 'seq': 2, 'age': now + skew, 'lifetime': 60,
+                               'weights': {jid('D'): 1}}, now)
+    assert router.outgoing_lsp(jid('E'), now + 20)['lifetime'] == 40
+    assert router.age_lsdb(now + 59) == []
+    assert [purge['origin'] for purge in router.age_lsdb(now + 61)] == [jid('E')]
+
+
+def test_lsp_without_lifetime_left_is_expired(router):
+    assert not router.install_lsp({'origin': jid('E'), 'seq': 2, 'age': time(), 'lifetime': 0,
+                                   'weights': {jid('D'): 1}})
+    assert router.lsdb_stats['expired'] == 1
+
+
+def test_higher_seq_wins_over_a_newer_stamp(router):
+    # E's clock went back: its next LSP still replaces the one before
+    assert router.install_lsp({'origin': jid('E'), 'seq': 2, 'age': time() - 600, 'lifetime': 3600,
+                               'weights': {jid('D'): 3}})
+    assert router.packages[jid('E')]['weights'] == {jid('D'): 3}
+
+
+def test_lower_seq_loses_to_an_older_stamp(router):
+    # a copy with a fast clock does not override the newer LSP
+    assert not router.install_lsp({'origin': jid('E'), 'seq': 0, 'age': time() + 600, 'lifetime': 3600,
+                                   'weights': {jid('D'): 3}})
+    assert router.packages[jid('E')]['weights'] == {jid('D'): 1}
+    assert router.lsdb_stats['stale'] == 1
+
+
+def test_stamp_breaks_seq_ties(router):
+    old = router.packages[jid('E')]
+    assert not router.install_lsp(dict(old, age=old['age'] - 1, weights={jid('D'): 3}))
+    assert router.install_lsp(dict(old, age=old['age'] + 1, weights={jid('D'): 3}))
+    assert router.packages[jid('E')]['weights'] == {jid('D'): 3}
+
+
+def test_purge_of_the_current_lsp_is_recognized(router):
+    old = router.packages[jid('E')]
+    assert not router.install_lsp(dict(old, seq=0, lifetime=0, weights={}, purge=True))
+    assert router.install_lsp(dict(old, lifetime=0, weights={}, purge=True))
+    assert router.packages[jid('E')].get('purge')
+
+
+def test_own_lsp_from_before_a_restart_raises_our_seq(router):
+    seq = router.package['seq']
+    assert not router.install_lsp(dict(router.package, seq=seq + 5, age=time() - 600))
+    assert router.build_package()['seq'] == seq + 6
+
+
+def test_aged_out_lsp_is_purged_and_its_purge_held(router):
+    now = time()
+    router.install_lsp({'origin': jid('E'), 'seq': 2, 'age': now, 'lifetime': 10, 'weights': {jid('D'): 1}}, now)
+    late_copy = dict(router.packages[jid('E')])
+
+    purges = router.age_lsdb(now + 11)
+    assert [purge['origin'] for purge in purges] == [jid('E')]
+    assert router.index[jid('E')] in router.removed
+    assert not router.install_lsp(late_copy, now + 12) # turned away while the purge is held
+
+    router.age_lsdb(now + 11 + LSP_PURGE_HOLD + 1)
+    assert jid('E') not in router.packages
+    assert router.install_lsp(dict(late_copy, seq=3), now + 80) # E is back
+    assert router.index[jid('E')] not in router.removed
+
+
+def test_routes_come_from_the_table_until_the_topology_changes(router):
+    runs = router.spf_stats['runs']
+    assert router.route(jid('E')) == (jid('B'), [jid('A'), jid('B'), jid('D'), jid('E')])
+    router.build_graph_matrix()
+    lsp(router, 'E', WEIGHTS['E'], seq=2) # refresh, same weights
+    router.build_graph_matrix()
+    assert router.spf_stats['runs'] == runs
+
+    lsp(router, 'B', {'A': 1, 'D': 5}, seq=2)
+    router.build_graph_matrix()
+    assert router.spf_stats['runs'] == runs + 1
+    assert router.route(jid('E')) == (jid('C'), [jid('A'), jid('C'), jid('D'), jid('E')])
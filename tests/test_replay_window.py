@@ -0,0 +1,36 @@
+"""
+replayWindow.ReplayWindow duplicate suppression.
+"""
+
+from replayWindow import ReplayWindow
+
+
+def test_new_counters_pass_once():
+    window = ReplayWindow(8)
+    assert [window.accept(counter) for counter in (1, 2, 3)] == [True, True, True]
+    assert not window.accept(3)
+    assert not window.accept(1)
+
+
+def test_late_counters_inside_the_window_pass_once():
+    window = ReplayWindow(8)
+    assert window.accept(10)
+    assert window.accept(7) # arrived out of order
+    assert not window.accept(7)
+    assert window.accept(3) # highest - 7, the oldest one tracked
+
+
+def test_counters_behind_the_window_are_dropped():
+    window = ReplayWindow(8)
+    assert window.accept(10)
+    assert not window.accept(2) # highest - 8, too old to tell
+
+
+def test_jump_past_the_window_forgets_the_old_counters():
+    window = ReplayWindow(8)
+    for counter in range(1, 6):
+        window.accept(counter)
+    assert window.accept(100)
+    assert window.bitmap == 1
+    assert window.accept(99)
+    assert not window.accept(5)
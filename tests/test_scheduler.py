@@ -0,0 +1,125 @@
+"""
+scheduler.ScheduledTransport batching, probes and batch splitting.
+"""
+
+import asyncio
+
+from scheduler import ScheduledTransport, pack_batch
+from transport import Transport, CONTROL, DATA, PROBE
+
+
+class Recorder(Transport):
+    """ Keeps what is sent instead of sending it. """
+    def __init__(self, jid="a@test.local"):
+        Transport.__init__(self, jid)
+        self.sent = []
+
+    def send(self, recipient, body, key=None, priority=CONTROL):
+        self.sent.append((recipient, body))
+        return True
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_messages_wait_for_the_window_and_leave_as_one_batch():
+    async def scenario():
+        inner = Recorder()
+        transport = ScheduledTransport(inner, window=0.05, rate=0)
+        transport.send("b", "lsp1", key="lsp:x")
+        transport.send("b", "user", priority=DATA)
+        transport.send("b", "lsp2", key="lsp:x") # replaces lsp1
+        assert inner.sent == []
+        await asyncio.sleep(0.1)
+        return inner.sent
+
+    assert run(scenario()) == [("b", pack_batch(["lsp2", "user"]))]
+
+
+def test_probes_skip_the_window():
+    async def scenario():
+        inner = Recorder()
+        transport = ScheduledTransport(inner, window=0.05, rate=0)
+        transport.send("b", "lsp")
+        transport.send("b", "echo", key="echo", priority=PROBE)
+        sent = list(inner.sent)
+        await asyncio.sleep(0.1)
+        return sent, inner.sent
+
+    at_once, later = run(scenario())
+    assert at_once == [("b", "echo")]
+    assert later == [("b", "echo"), ("b", "lsp")]
+
+
+def test_throttled_probe_leaves_first():
+    async def scenario():
+        inner = Recorder()
+        transport = ScheduledTransport(inner, window=0.05, rate=20, burst=1)
+        transport.send("b", "first", priority=PROBE) # takes the only token
+        transport.send("b", "lsp")
+        transport.send("b", "echo", priority=PROBE)
+        await asyncio.sleep(0.2)
+        return inner.sent
+
+    assert run(scenario()) == [("b", "first"), ("b", pack_batch(["echo", "lsp"]))]
+
+
+def test_disabled_scheduler_sends_right_away_and_splits_batches():
+    async def scenario():
+        inner = Recorder()
+        transport = ScheduledTransport(inner, window=0, rate=0)
+        received = []
+        transport.set_handler(lambda sender, body: received.append(body))
+
+        transport.send("b", "lsp")
+        inner.receive("b", pack_batch(["one", "two"]))
+        inner.receive("b", "three")
+        return inner.sent, received
+
+    sent, received = run(scenario())
+    assert sent == [("b", "lsp")]
+    assert received == ["one", "two", "three"]
+
+
+def test_control_leaves_before_data_queued_earlier():
+    async def scenario():
+        inner = Recorder()
+        transport = ScheduledTransport(inner, window=0.05, rate=0)
+        transport.send("b", "user1", priority=DATA)
+        transport.send("b", "lsp")
+        transport.send("b", "user2", priority=DATA)
+        await asyncio.sleep(0.1)
+        return inner.sent
+
+    assert run(scenario()) == [("b", pack_batch(["lsp", "user1", "user2"]))]
+
+
+def test_full_data_queue_drops_data_but_not_control():
+    async def scenario():
+        inner = Recorder()
+        transport = ScheduledTransport(inner, window=0.05, rate=0, max_data=2)
+        accepted = [transport.send("b", f"user{i}", priority=DATA) for i in range(3)]
+        accepted.append(transport.send("b", "lsp"))
+        full = transport.full("b")
+        await asyncio.sleep(0.1)
+        return accepted, full, transport.stats['dropped'], inner.sent
+
+    accepted, full, dropped, sent = run(scenario())
+    assert accepted == [True, True, False, True]
+    assert full and dropped == 1
+    assert sent == [("b", pack_batch(["lsp", "user0", "user1"]))]
+
+
+def test_drain_waits_until_the_data_queue_has_room():
+    async def scenario():
+        inner = Recorder()
+        transport = ScheduledTransport(inner, window=0.05, rate=0, max_data=1)
+        transport.send("b", "user1", priority=DATA)
+        drained = asyncio.ensure_future(transport.drain("b"))
+        await asyncio.sleep(0.01)
+        waiting = not drained.done()
+        await asyncio.wait_for(drained, 1)
+        return waiting, transport.send("b", "user2", priority=DATA)
+
+    assert run(scenario()) == (True, True)
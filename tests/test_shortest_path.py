@@ -0,0 +1,142 @@
+"""
+shortestPath.DynamicSPF against a full shortestPath.dijkstra after every update.
+"""
+
+import random
+
+import pytest
+
+import shortestPath
+from shortestPath import INFINITY, DynamicSPF, dijkstra
+
+
+def random_graph(num_nodes, degree, rng):
+    """ Connected random graph: a ring plus random chords, weights in (0, 1]. """
+    graph = [{} for _ in range(num_nodes)]
+
+    def link(u, v):
+        if u != v:
+            graph[u][v] = graph[v][u] = rng.uniform(0.001, 1)
+
+    for u in range(num_nodes):
+        link(u, (u + 1) % num_nodes)
+    for _ in range(num_nodes * (degree - 2) // 2):
+        link(rng.randrange(num_nodes), rng.randrange(num_nodes))
+    return graph
+
+
+def random_updates(graph, count, rng):
+    """ (tail, head, weight) updates, weight None meaning link down. """
+    for _ in range(count):
+        tail = rng.randrange(len(graph))
+        kind = rng.random()
+        if graph[tail] and kind < 0.3: # increase
+            head = rng.choice(list(graph[tail]))
+            yield tail, head, graph[tail][head] * rng.uniform(1, 5)
+        elif graph[tail] and kind < 0.6: # decrease
+            head = rng.choice(list(graph[tail]))
+            yield tail, head, graph[tail][head] * rng.uniform(0.2, 1)
+        elif graph[tail] and kind < 0.85: # link down
+            yield tail, rng.choice(list(graph[tail])), None
+        else: # new link
+            head = rng.randrange(len(graph))
+            if head != tail:
+                yield tail, head, rng.uniform(0.001, 1)
+
+
+def assert_consistent(spf, graph):
+    """ Same distances as a full dijkstra, and a tree made of real edges that matches them. """
+    distance, _, _ = dijkstra(graph, spf.source)
+    assert spf.distance == pytest.approx(distance)
+    for node in range(len(graph)):
+        parent = spf.previous[node]
+        if node == spf.source:
+            continue
+        if distance[node] == INFINITY:
+            assert parent is None and spf.first_hop[node] is None
+            continue
+        assert spf.distance[node] == pytest.approx(spf.distance[parent] + graph[parent][node])
+        assert spf.first_hop[node] == (node if parent == spf.source else spf.first_hop[parent])
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_updates_match_dijkstra(seed):
+    rng = random.Random(seed)
+    graph = random_graph(60, 4, rng)
+    spf = DynamicSPF([dict(row) for row in graph], 0)
+    assert_consistent(spf, graph)
+
+    for tail, head, weight in list(random_updates(graph, 300, rng)):
+        if weight is None:
+            graph[tail].pop(head, None)
+        else:
+            graph[tail][head] = weight
+        spf.update_edge(tail, head, weight)
+        assert_consistent(spf, graph)
+
+
+def test_removed_tree_edge_reroutes():
+    # 0 -> 1 -> 2 is the tree, 0 -> 3 -> 2 the longer way around
+    graph = [{1: 1, 3: 2}, {2: 1}, {}, {2: 2}]
+    spf = DynamicSPF([dict(row) for row in graph], 0)
+    assert spf.previous[2] == 1 and spf.distance[2] == 2
+
+    spf.update_edge(1, 2, None)
+    assert spf.distance[2] == 4
+    assert spf.previous[2] == 3
+    assert spf.first_hop[2] == 3
+    assert 2 not in spf.children[1]
+
+
+def test_tie_keeps_a_valid_equal_cost_parent():
+    graph = [{1: 1, 2: 1}, {3: 1}, {3: 1}, {}]
+    spf = DynamicSPF([dict(row) for row in graph], 0)
+    first = spf.previous[3]
+    other = 2 if first == 1 else 1
+
+    spf.update_edge(first, 3, None)
+    graph[first].pop(3)
+    assert spf.distance[3] == 2
+    assert spf.previous[3] == other
+    assert_consistent(spf, graph)
+
+    # back at the same cost: either parent is a shortest path
+    spf.update_edge(first, 3, 1)
+    graph[first][3] = 1
+    assert spf.distance[3] == 2
+    assert spf.previous[3] in (1, 2)
+    assert_consistent(spf, graph)
+
+
+def test_disconnected_subtree_and_reconnection():
+    graph = [{1: 1}, {0: 1, 2: 1}, {1: 1, 3: 1}, {2: 1}]
+    spf = DynamicSPF([dict(row) for row in graph], 0)
+
+    spf.update_edge(1, 2, None)
+    graph[1].pop(2)
+    for node in (2, 3):
+        assert spf.distance[node] == INFINITY
+        assert spf.previous[node] is None
+        assert spf.first_hop[node] is None
+    assert_consistent(spf, graph)
+
+    spf.update_edge(0, 3, 5)
+    graph[0][3] = 5
+    assert spf.distance[3] == 5 and spf.first_hop[3] == 3
+    assert spf.distance[2] == 6 and spf.first_hop[2] == 3
+    assert_consistent(spf, graph)
+
+
+def test_update_row_replaces_every_edge():
+    graph = [{1: 1, 2: 4}, {2: 1}, {}]
+    spf = DynamicSPF([dict(row) for row in graph], 0)
+
+    assert spf.update_row(0, {2: 1})
+    assert not spf.update_row(0, {2: 1})
+    assert spf.distance == [0, INFINITY, 1]
+    assert spf.first_hop[2] == 2
+
+
+def test_build_path_follows_previous():
+    distance, previous, _ = dijkstra([{1: 1}, {2: 1}, {}], 0)
+    assert shortestPath.build_path(previous, 0, 2) == [0, 1, 2]
@@ -0,0 +1,68 @@
+"""
+timers.Backoff jitter and growth, and timers.TimerWheel deadlines.
+"""
+
+import random
+
+from timers import Backoff, TimerWheel
+
+
+def test_backoff_doubles_up_to_the_maximum_and_resets():
+    backoff = Backoff(5, 60, jitter=0)
+    assert [backoff.next() for _ in range(6)] == [5, 10, 20, 40, 60, 60]
+    backoff.reset()
+    assert backoff.next() == 5
+
+
+def test_jitter_only_shortens_the_interval():
+    random.seed(1)
+    backoff = Backoff(4, 4, jitter=0.25)
+    delays = [backoff.next() for _ in range(200)]
+    assert all(3 <= delay <= 4 for delay in delays)
+    assert max(delays) - min(delays) > 0.5 # they do drift apart
+
+
+def test_peek_does_not_back_off():
+    backoff = Backoff(1, 8, jitter=0)
+    assert backoff.peek() == backoff.peek() == 1
+    assert backoff.next() == 1
+    assert backoff.interval == 2
+
+
+def test_wheel_returns_keys_once_when_due():
+    wheel = TimerWheel(1, slots=8)
+    wheel.schedule("a", 2.5)
+    wheel.schedule("b", 4)
+    assert wheel.advance(2) == []
+    assert wheel.advance(3) == ["a"]
+    assert wheel.advance(5) == ["b"]
+    assert wheel.advance(6) == []
+    assert len(wheel) == 0
+
+
+def test_rescheduling_replaces_the_deadline():
+    wheel = TimerWheel(1, slots=8)
+    wheel.schedule("a", 2)
+    wheel.schedule("a", 5) # refreshed
+    assert wheel.deadline("a") == 5
+    assert wheel.advance(3) == []
+    assert wheel.advance(5) == ["a"]
+
+
+def test_deadlines_a_turn_ahead_wait_for_their_turn():
+    wheel = TimerWheel(1, slots=4)
+    wheel.schedule("far", 10) # same slot as tick 2
+    wheel.schedule("near", 2)
+    assert wheel.advance(3) == ["near"]
+    assert "far" in wheel
+    assert wheel.advance(10) == ["far"]
+
+
+def test_cancel_and_late_sweeps():
+    wheel = TimerWheel(1, slots=4)
+    wheel.schedule("a", 1)
+    wheel.schedule("b", 2)
+    wheel.cancel("a")
+    assert wheel.advance(100) == ["b"] # more than a turn went by
+    wheel.schedule("c", 50) # in the past: due on the next sweep
+    assert wheel.advance(101) == ["c"]
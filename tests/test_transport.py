@@ -0,0 +1,78 @@
+"""
+transport.SocketTransport connection tokens: only neighbors that got one over
+the fallback transport may send on the data plane.
+"""
+
+import asyncio
+
+from transport import Transport, SocketTransport, FRAME_HEADER
+
+
+class Relay(Transport):
+    """ Fallback that hands bodies straight to another Relay, like the XMPP server would. """
+    def __init__(self, jid):
+        Transport.__init__(self, jid)
+        self.other = None
+
+    def send(self, recipient, body, key=None, priority=None):
+        self.other.receive(self.jid, body)
+        return True
+
+
+def pair():
+    relay_a, relay_b = Relay("a@test.local"), Relay("b@test.local")
+    relay_a.other, relay_b.other = relay_b, relay_a
+    a = SocketTransport("a@test.local", fallback=relay_a)
+    b = SocketTransport("b@test.local", fallback=relay_b)
+    received = []
+    b.set_handler(lambda sender, body: received.append((sender, body)))
+    return a, b, received
+
+
+async def frame(host, port, *bodies):
+    reader, writer = await asyncio.open_connection(host, port)
+    for body in bodies:
+        data = body.encode()
+        writer.write(FRAME_HEADER.pack(len(data)) + data)
+    await writer.drain()
+    await asyncio.sleep(0.1)
+    closed = reader.at_eof() or await reader.read(1) == b""
+    writer.close()
+    return closed
+
+
+def test_neighbor_with_the_announced_token_is_accepted():
+    async def scenario():
+        a, b, received = pair()
+        await a.start()
+        await b.start()
+        b.announce(["a@test.local"])
+        a.announce(["b@test.local"])
+        assert a.peers["b@test.local"] == b.address
+        a.send("b@test.local", "hello")
+        await asyncio.sleep(0.1)
+        a.close()
+        b.close()
+        return received, b.rejected
+
+    received, rejected = asyncio.run(scenario())
+    assert received == [("a@test.local", "hello")]
+    assert rejected == 0
+
+
+def test_connection_claiming_a_neighbor_without_its_token_is_dropped():
+    async def scenario():
+        a, b, received = pair()
+        await b.start()
+        b.announce(["a@test.local"])
+        no_token = await frame(*b.address, "a@test.local", '{"type": "lsp"}')
+        wrong_token = await frame(*b.address, "a@test.local 00", '{"type": "lsp"}')
+        stranger = await frame(*b.address, "c@test.local " + b.tokens[("a@test.local", "b@test.local")], "x")
+        b.close()
+        a.close()
+        return (no_token, wrong_token, stranger), received, b.rejected
+
+    closed, received, rejected = asyncio.run(scenario())
+    assert all(closed)
+    assert received == []
+    assert rejected == 3
@@ -0,0 +1,67 @@
+"""
+vectorDistance delta updates, acks, split horizon with poison reverse and the
+periodic sync checksum, for the dict and the numpy router.
+"""
+
+import json
+
+import pytest
+
+import netConfig
+import vectorDistance
+from settings import DV_INFINITY
+
+#   A --- B --- C --- D
+TOPO = {'A': ['B'], 'B': ['A', 'C'], 'C': ['B', 'D'], 'D': ['C']}
+
+
+@pytest.fixture(params=[vectorDistance.Router, vectorDistance.ArrayRouter], ids=["dict", "numpy"])
+def router(request, tmp_path):
+    names_file, topo_file = tmp_path / "names.txt", tmp_path / "topo.txt"
+    names_file.write_text(json.dumps({'type': "names", 'config': {node: node.lower() + "@test.local" for node in TOPO}}))
+    topo_file.write_text(json.dumps({'type': "topo", 'config': TOPO}))
+    yield request.param('B', str(names_file), str(topo_file))
+    netConfig._configs.clear()
+
+
+def test_routes_through_a_neighbor_are_poisoned_towards_it(router):
+    router.process('C', {'C': 0, 'D': 1}, full=True)
+    assert router.vector['D'] == (2, 'C')
+    assert router.advertised('D', 'A') == 2
+    assert router.advertised('D', 'C') == DV_INFINITY
+
+
+def test_delta_carries_only_what_changed_since_the_ack(router):
+    router.process('C', {'C': 0, 'D': 1}, full=True)
+    updates = router.build_updates()
+    assert updates['A'][1]['D'] == 2
+    for neighbor, (seq, _) in updates.items():
+        router.acknowledge(neighbor, seq)
+    assert router.build_updates() == {}
+
+    router.process('C', {'D': 3})
+    updates = router.build_updates()
+    assert updates['A'][1] == {'D': 4}
+    assert 'C' not in updates # poisoned to C before and after
+
+
+def test_unacked_entries_are_repeated(router):
+    router.process('C', {'C': 0, 'D': 1}, full=True)
+    first, entries = router.build_updates()['A']
+    assert entries['D'] == 2
+
+    router.process('C', {'D': DV_INFINITY}) # D withdrawn before A acked
+    second, entries = router.build_updates()['A']
+    assert second > first
+    assert entries['D'] == DV_INFINITY
+
+
+def test_sync_checksum_matches_what_the_neighbor_holds(router):
+    router.process('C', {'C': 0, 'D': 1}, full=True)
+    seq, entries = router.build_updates()['A']
+    assert router.sync_checksum('A') is None # still in flight
+
+    router.acknowledge('A', seq)
+    held = {'B': 0}
+    held.update({dest: cost for dest, cost in entries.items() if cost < DV_INFINITY})
+    assert router.sync_checksum('A') == router.checksum(held)
@@ -0,0 +1,95 @@
+"""
+warmStart.Snapshot round trips, also after nodes were added to the names file.
+"""
+
+import os
+import json
+from time import time
+
+import pytest
+
+import netConfig
+import linkRouter
+import vectorDistance
+from warmStart import Snapshot
+
+
+def jid(node):
+    return node.lower() + "@test.local"
+
+
+def write_config(directory, topo):
+    names_file, topo_file = directory / "names.txt", directory / "topo.txt"
+    names_file.write_text(json.dumps({'type': "names", 'config': {node: jid(node) for node in topo}}))
+    topo_file.write_text(json.dumps({'type': "topo", 'config': topo}))
+    for path in (names_file, topo_file): # a new mtime even within the clock resolution
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    return str(names_file), str(topo_file)
+
+
+def link_state(router, topo):
+    router.build_package()
+    for node, neighbors in topo.items():
+        if jid(node) != router.name:
+            router.install_lsp({'origin': jid(node), 'seq': 1, 'age': time(), 'lifetime': 3600,
+                                'weights': {jid(neighbor): 1 for neighbor in neighbors}})
+    router.build_graph_matrix()
+
+
+@pytest.fixture
+def config(tmp_path):
+    topo = {'A': ['B'], 'B': ['A', 'C'], 'C': ['B']}
+    yield tmp_path, topo, write_config(tmp_path, topo)
+    netConfig._configs.clear()
+
+
+def test_link_state_round_trip(config):
+    directory, topo, (names_file, topo_file) = config
+    router = linkRouter.Router(jid('A'), names_file, topo_file)
+    link_state(router, topo)
+    snapshot = Snapshot(str(directory / "a.snap"), router.users)
+    assert snapshot.save_link_state(router)
+
+    restarted = linkRouter.Router(jid('A'), names_file, topo_file)
+    assert Snapshot(str(directory / "a.snap"), restarted.users).load_link_state(restarted)
+    assert restarted.forwarding_table == router.forwarding_table
+    assert jid('C') in restarted.forwarding_table
+
+
+def test_nodes_added_at_runtime(config):
+    directory, topo, (names_file, topo_file) = config
+    router = linkRouter.Router(jid('A'), names_file, topo_file)
+    snapshot = Snapshot(str(directory / "a.snap"), router.users)
+
+    topo = dict(topo, C=['B', 'D'], D=['C'])
+    write_config(directory, topo)
+    assert netConfig.load(names_file, topo_file).ids['D'] == 3
+    link_state(router, topo)
+    assert jid('D') in router.forwarding_table
+
+    # the codec does not know D yet: its routes are left out, nothing raises
+    assert snapshot.save_link_state(router)
+    snapshot.add_nodes(router.users)
+    assert snapshot.save_link_state(router)
+
+    restarted = linkRouter.Router(jid('A'), names_file, topo_file)
+    assert Snapshot(str(directory / "a.snap"), restarted.users).load_link_state(restarted)
+    assert restarted.forwarding_table[jid('D')] == router.forwarding_table[jid('D')]
+
+
+def test_vector_with_a_neighbor_added_at_runtime(config):
+    directory, topo, (names_file, topo_file) = config
+    router = vectorDistance.Router('B', names_file, topo_file)
+    snapshot = Snapshot(str(directory / "b.snap"), router.names)
+
+    write_config(directory, dict(topo, B=['A', 'C', 'D'], D=['B']))
+    netConfig.load(names_file, topo_file)
+    router.add_neighbor('D')
+    assert snapshot.save_vector(router)
+    snapshot.add_nodes(router.names)
+    assert snapshot.save_vector(router)
+
+    restarted = vectorDistance.Router('B', names_file, topo_file)
+    assert Snapshot(str(directory / "b.snap"), restarted.names).load_vector(restarted)
+    assert restarted.vector['D'] == (1, 'D')
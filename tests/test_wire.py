@@ -0,0 +1,92 @@
+"""
+wire varints, binary round trips through base64 and the per neighbor negotiation.
+"""
+
+import json
+
+import pytest
+
+from wire import WireCodec, PREFIX, WIRE_VERSION, write_varint, read_varint, read_varints
+
+NAMES = {'A': "a@test.local", 'B': "b@test.local", 'C': "c@test.local"}
+
+
+def binary_pair():
+    """ Codecs of A and B that already know the other decodes binary. """
+    a, b = WireCodec(NAMES), WireCodec(NAMES)
+    a.peers.add(NAMES['B'])
+    b.peers.add(NAMES['A'])
+    return a, b
+
+
+@pytest.mark.parametrize("value", [0, 1, 127, 128, 300, 16383, 16384, 2**32, 2**63])
+def test_varint_round_trip(value):
+    out = bytearray()
+    write_varint(out, value)
+    assert len(out) == max(1, (value.bit_length() + 6) // 7)
+    assert read_varint(bytes(out), 0) == (value, len(out))
+
+
+def test_read_varints_mixes_short_and_long_values():
+    values = [5, 200, 0, 70000, 127]
+    out = bytearray()
+    for value in values:
+        write_varint(out, value)
+    out.append(0xff) # whatever follows is left alone
+    assert read_varints(bytes(out), 0, len(values)) == (values, len(out) - 1)
+
+
+@pytest.mark.parametrize("payload", [
+    {'type': 'lsp', 'lsp': {'origin': NAMES['A'], 'seq': 300, 'age': 1700000000.25, 'lifetime': 3600,
+                            'weights': {NAMES['B']: 0.012345, NAMES['C']: 1.0}}},
+    {'type': 'echo', 'timestamp': 1700000000.125},
+    {'type': 'ack', 'start_timestamp': 1700000000.125},
+    {'type': 'update', 'sender': 'A', 'seq': 9, 'full': True, 'vector': {'B': 1, 'C': 64}},
+    {'type': 'update-ack', 'sender': 'A', 'seq': 9},
+    {'type': 'sync', 'sender': 'A', 'checksum': 2**32 - 1},
+    {'type': 'resync', 'sender': 'A'},
+])
+def test_binary_round_trip(payload):
+    a, b = binary_pair()
+    body = a.dumps(payload, NAMES['B'])
+    assert body.startswith(PREFIX)
+    assert b.loads(body, NAMES['A']) == payload
+
+
+def test_json_until_the_neighbor_shows_it_decodes_binary():
+    a, b = WireCodec(NAMES), WireCodec(NAMES)
+    echo = {'type': 'echo', 'timestamp': 1.5}
+    body = a.dumps(echo, NAMES['B'])
+    assert json.loads(body)['wire'] == WIRE_VERSION
+
+    b.loads(body, NAMES['A']) # the capability field
+    assert b.dumps(echo, NAMES['A']).startswith(PREFIX)
+
+
+def test_json_only_codec_never_advertises_binary():
+    a, b = WireCodec(NAMES, binary=False), WireCodec(NAMES)
+    body = a.dumps({'type': 'echo', 'timestamp': 1.5}, NAMES['B'])
+    assert 'wire' not in json.loads(body)
+    b.loads(body, NAMES['A'])
+    assert not b.dumps({'type': 'echo', 'timestamp': 1.5}, NAMES['A']).startswith(PREFIX)
+
+
+def test_what_binary_can_not_carry_falls_back_to_json():
+    a, b = binary_pair()
+    purge = {'type': 'lsp', 'lsp': {'origin': NAMES['A'], 'seq': 3, 'age': 1.0, 'lifetime': 0,
+                                    'weights': {}, 'purge': True}}
+    unknown = {'type': 'update', 'sender': 'Z', 'seq': 1, 'full': False, 'vector': {}}
+    for payload in (purge, unknown):
+        body = a.dumps(payload, NAMES['B'])
+        assert not body.startswith(PREFIX)
+        assert b.loads(body, NAMES['A']) == payload
+
+
+def test_nodes_added_at_runtime_get_the_next_ids():
+    a, b = binary_pair()
+    names = dict(NAMES, D="d@test.local")
+    a.add_nodes(names)
+    b.add_nodes(names)
+    assert a.ids['D'] == a.ids["d@test.local"] == 3
+    update = {'type': 'update', 'sender': 'D', 'seq': 1, 'full': False, 'vector': {'A': 2}}
+    assert b.loads(a.dumps(update, NAMES['B']), NAMES['A']) == update
@@ -0,0 +1,115 @@
+"""
+Timers of the link state routers.
+
+Backoff: jittered exponential backoff for the periodic messages.
+
+Every interval is cut by a random fraction (up to jitter) so routers that
+started together drift apart instead of probing and flooding in lockstep.
+While nothing changes the interval doubles up to a maximum; reset() brings it
+back to the initial one.
+
+Instance example --> hello = Backoff(5, 60)
+                     await asyncio.sleep(hello.next()) # 3.75..5, then 7.5..10, ... up to 60
+                     hello.reset() # a link changed
+
+TimerWheel: deadlines of many keys (the LSDB entries), swept a slot at a time
+instead of scanning every key.
+
+Instance example --> wheel = TimerWheel(1)
+                     wheel.schedule(origin, time() + lsp['lifetime']) # again on every refresh
+                     for origin in wheel.advance(time()): ... # every tick
+"""
+
+import random
+
+import settings
+
+
+class Backoff(object):
+    """
+    Arguments:
+        initial --> First interval, and the one used again after reset(), in seconds
+        maximum --> Largest interval
+        jitter --> Max fraction an interval is shortened by, 0 for none
+        factor --> Growth of the interval after every use
+
+    Returns:
+        None
+    """
+    def __init__(self, initial, maximum, jitter=settings.TIMER_JITTER, factor=2):
+        self.initial = initial
+        self.maximum = max(initial, maximum)
+        self.jitter = jitter
+        self.factor = factor
+        self.interval = initial
+
+    def peek(self):
+        """ Jittered current interval, without backing off. """
+        return self.interval * (1 - self.jitter * random.random())
+
+    def next(self):
+        """ Jittered current interval; the following one will be longer. """
+        delay = self.peek()
+        self.interval = min(self.maximum, self.interval * self.factor)
+        return delay
+
+    def reset(self):
+        self.interval = self.initial
+
+
+class TimerWheel(object):
+    """
+    Hashed timing wheel. A key due at a deadline sits in the slot of its tick;
+    advance() only looks at the slots of the ticks that went by, so the cost
+    does not grow with the keys that are not due. Deadlines more than a turn
+    ahead share slots with closer ones and are left there until their turn.
+
+    Arguments:
+        tick --> Seconds covered by one slot
+        slots --> Slots in the wheel, one turn is tick * slots seconds
+        now --> Time the wheel starts at
+
+    Returns:
+        None
+    """
+    def __init__(self, tick, slots=4096, now=0.0):
+        self.tick = tick
+        self.slots = [{} for _ in range(slots)] # key -> deadline
+        self.ticks = {} # key -> tick of its slot
+        self.current = int(now // tick) # first tick not swept for good yet
+
+    def __len__(self):
+        return len(self.ticks)
+
+    def __contains__(self, key):
+        return key in self.ticks
+
+    def schedule(self, key, deadline):
+        """ Key is due at deadline, replacing its previous deadline. """
+        self.cancel(key)
+        tick = max(int(deadline // self.tick), self.current)
+        self.slots[tick % len(self.slots)][key] = deadline
+        self.ticks[key] = tick
+
+    def deadline(self, key):
+        """ Deadline of key, which must be on the wheel. """
+        return self.slots[self.ticks[key] % len(self.slots)][key]
+
+    def cancel(self, key):
+        tick = self.ticks.pop(key, None)
+        if tick is not None:
+            del self.slots[tick % len(self.slots)][key]
+
+    def advance(self, now):
+        """ Keys whose deadline is not after now, taken off the wheel. """
+        due = []
+        last = int(now // self.tick)
+        # after more than a turn every slot is swept once
+        for tick in range(max(self.current, last - len(self.slots) + 1), last + 1):
+            slot = self.slots[tick % len(self.slots)]
+            for key in [key for key, deadline in slot.items() if deadline <= now]:
+                del slot[key]
+                del self.ticks[key]
+                due.append(key)
+        self.current = last # its slot may still hold later deadlines of this tick
+        return due
@@ -0,0 +1,415 @@
+"""
+Transports move message bodies between routers. The routing logic in link.Node
+and routing.Node only talks to a Transport, so the same nodes run over an XMPP
+server (XMPPTransport), over direct TCP connections between neighbors
+(SocketTransport) or fully in memory (LoopbackNetwork).
+
+Instance example --> network = LoopbackNetwork(latency=0.01, loss=0.0)
+                     transport = network.attach("a@lab.local")
+"""
+
+import hmac
+import json
+import random
+import secrets
+import socket
+import struct
+import asyncio
+import logging
+
+FRAME_HEADER = struct.Struct("!I")
+MAX_HELLO = 1024 # bytes of the jid and token frame opening a data plane connection
+
+# message classes, for transports that prioritize (scheduler.ScheduledTransport)
+CONTROL = 0
+DATA = 1
+PROBE = 2 # timestamped echoes and acks: never held back to be batched
+ANNOUNCEMENT = '{"type": "dataplane"'
+
+
+class Transport(object):
+    """
+    Interface between a routing node and the network.
+
+    Arguments:
+        jid --> Address of the node using the transport
+
+    Returns:
+        None
+    """
+    def __init__(self, jid):
+        self.jid = jid
+        self.handler = None
+
+    def set_handler(self, handler):
+        """ handler(sender_jid, body) is called for every incoming message. """
+        self.handler = handler
+
+    def receive(self, sender, body):
+        if self.handler is not None:
+            self.handler(sender, body)
+
+    def send(self, recipient, body, key=None, priority=CONTROL):
+        """
+        Sends body (a str) to recipient. Fire and forget.
+
+        key marks messages that supersede each other (e.g. LSPs of one origin)
+        and priority is CONTROL, DATA or PROBE; only queueing transports such as
+        scheduler.ScheduledTransport use them.
+
+        Returns:
+            False if the message was dropped right away, True otherwise
+        """
+        raise NotImplementedError
+
+    async def drain(self, recipient=None):
+        """ Waits until a DATA message to recipient would not be dropped. """
+        pass
+
+
+class XMPPTransport(Transport):
+    """
+    Transport over an XMPP server through a slixmpp client.
+
+    Arguments:
+        xmpp --> slixmpp.ClientXMPP already configured with jid and password
+
+    Returns:
+        None
+    """
+    def __init__(self, xmpp):
+        Transport.__init__(self, xmpp.boundjid.bare)
+        self.xmpp = xmpp
+        self.xmpp.add_event_handler("message", self.receive_stanza)
+
+    def receive_stanza(self, msg):
+        if msg['type'] in ('chat', 'normal'):
+            self.receive(str(msg['from'].bare), str(msg['body']))
+        elif msg['type'] == 'error':
+            print('An error has ocurred.')
+
+    def send(self, recipient, body, key=None, priority=CONTROL):
+        self.xmpp.send_message(
+            mto = recipient,
+            mbody = body,
+            mtype = 'chat',
+            mfrom = self.xmpp.boundjid
+        )
+        return True
+
+
+class LoopbackTransport(Transport):
+    """
+    Endpoint of a LoopbackNetwork. Created through LoopbackNetwork.attach.
+
+    Arguments:
+        network --> LoopbackNetwork the endpoint belongs to
+        jid --> Address of the node
+
+    Returns:
+        None
+    """
+    def __init__(self, network, jid):
+        Transport.__init__(self, jid)
+        self.network = network
+
+    def send(self, recipient, body, key=None, priority=CONTROL):
+        self.network.deliver(self.jid, recipient, body)
+        return True
+
+
+class LoopbackNetwork(object):
+    """
+    In memory network for running a whole topology in one asyncio loop.
+
+    Every message is delivered after the latency of its link, or dropped with
+    the loss probability of its link. Links without their own settings use
+    the network defaults. Message and byte counters are kept per sender.
+
+    Arguments:
+        latency --> Default one way delay in seconds
+        loss --> Default probability of dropping a message
+        seed --> Seed for the loss decisions, for repeatable runs
+
+    Returns:
+        None
+    """
+    def __init__(self, latency=0.0, loss=0.0, seed=None):
+        self.latency = latency
+        self.loss = loss
+        self.random = random.Random(seed)
+
+        self.endpoints = {}
+        self.links = {}
+
+        self.sent = {}
+        self.sent_bytes = {}
+        self.dropped = 0
+
+    def attach(self, jid):
+        """ Creates (or returns) the transport of a node. """
+        if jid not in self.endpoints:
+            self.endpoints[jid] = LoopbackTransport(self, jid)
+            self.sent[jid] = 0
+            self.sent_bytes[jid] = 0
+        return self.endpoints[jid]
+
+    def start(self):
+        pass
+
+    def close(self):
+        pass
+
+    def set_link(self, a, b, latency=None, loss=None):
+        """ Overrides latency and/or loss of the link between a and b, both ways. """
+        settings = self.links.get((a, b), {})
+        if latency is not None:
+            settings['latency'] = latency
+        if loss is not None:
+            settings['loss'] = loss
+        self.links[(a, b)] = settings
+        self.links[(b, a)] = settings
+
+    def link(self, a, b):
+        settings = self.links.get((a, b), {})
+        return settings.get('latency', self.latency), settings.get('loss', self.loss)
+
+    def deliver(self, sender, recipient, body):
+        self.sent[sender] += 1
+        self.sent_bytes[sender] += len(body)
+
+        _, loss = self.link(sender, recipient)
+        if loss and self.random.random() < loss:
+            self.dropped += 1
+            return
+
+        self.schedule(sender, recipient, body)
+
+    def schedule(self, sender, recipient, body):
+        """ Hands body to the recipient endpoint once the link latency has passed. """
+        endpoint = self.endpoints.get(recipient)
+        if endpoint is None:
+            self.dropped += 1
+            return
+
+        latency, _ = self.link(sender, recipient)
+        loop = asyncio.get_event_loop()
+        if latency:
+            loop.call_later(latency, endpoint.receive, sender, body)
+        else:
+            loop.call_soon(endpoint.receive, sender, body)
+
+
+class SocketTransport(Transport):
+    """
+    Data plane over persistent TCP connections to the neighbors.
+
+    Frames are a 4 byte length followed by the utf-8 body; the first frame of
+    every connection is the jid of the node that opened it and the token it was
+    given for the connection. A connection to a peer is opened on the first
+    message to it and reused afterwards. Recipients without a known address go
+    through the fallback transport (usually XMPPTransport), which is also used
+    to announce our address to the topology neighbors, along with a random
+    token for each of them: a connection that does not show the token we gave
+    its jid is dropped, so nobody who merely reaches the port can speak for a
+    neighbor.
+
+    Arguments:
+        jid --> Address of the node using the transport
+        host --> Interface to listen on
+        port --> Port to listen on, 0 picks a free one
+        peers --> Dict {jid: (host, port)} of known data plane addresses
+        fallback --> Transport used for bootstrap and for unknown peers
+        tokens --> Dict {(connecting jid, accepting jid): token} of the connection
+                   tokens given and received; transports that share it (SocketNetwork)
+                   make them up on first use
+
+    Returns:
+        None
+    """
+    def __init__(self, jid, host="127.0.0.1", port=0, peers=None, fallback=None, tokens=None):
+        Transport.__init__(self, jid)
+        self.peers = peers if peers is not None else {}
+        self.tokens = tokens if tokens is not None else {}
+        self.fallback = fallback
+        self.neighbors = set()
+
+        # bound right away so the address can be shared before start() runs
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind((host, port))
+        self.sock.listen(128)
+        self.address = self.sock.getsockname()[:2]
+        self.server = None
+
+        self.writers = {} # jid -> StreamWriter of our outgoing connection
+        self.pending = {} # jid -> frames waiting for the connection to open
+        self.readers = set() # StreamWriters of incoming connections
+
+        self.sent = 0
+        self.sent_bytes = 0
+        self.dropped = 0
+        self.rejected = 0 # incoming connections dropped for a bad token
+
+        if self.fallback is not None:
+            self.fallback.set_handler(self.receive_fallback)
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.accept, sock=self.sock)
+
+    def close(self):
+        if self.server is not None:
+            self.server.close()
+        else:
+            self.sock.close()
+        for writer in self.writers.values():
+            writer.close()
+        for writer in list(self.readers):
+            writer.close()
+        self.writers = {}
+        self.pending = {}
+
+    def announce(self, neighbors):
+        """ Sends our data plane address to the neighbors through the fallback transport. """
+        self.neighbors.update(neighbors)
+        if self.fallback is None:
+            return
+        for neighbor in neighbors:
+            self.fallback.send(neighbor, self.announcement(neighbor))
+
+    def announcement(self, neighbor):
+        """ Our address, and the token neighbor has to show when it connects to it. """
+        token = self.tokens.setdefault((neighbor, self.jid), secrets.token_hex(16))
+        return json.dumps({"type": "dataplane", "jid": self.jid, "address": list(self.address), "token": token})
+
+    def receive_fallback(self, sender, body):
+        if body.startswith(ANNOUNCEMENT):
+            payload = json.loads(body)
+            if payload.get('type') == "dataplane":
+                if sender in self.neighbors:
+                    address = tuple(payload['address'])
+                    self.tokens[(self.jid, sender)] = payload['token']
+                    if self.peers.get(sender) != address:
+                        known = sender in self.peers
+                        self.peers[sender] = address
+                        old = self.writers.pop(sender, None)
+                        if old is not None:
+                            old.close()
+                        if not known:
+                            self.fallback.send(sender, self.announcement(sender)) # so late joiners learn ours
+                return
+        self.receive(sender, body)
+
+    def send(self, recipient, body, key=None, priority=CONTROL):
+        if recipient not in self.peers:
+            if self.fallback is not None:
+                return self.fallback.send(recipient, body)
+            self.dropped += 1
+            return False
+
+        data = body.encode()
+        frame = FRAME_HEADER.pack(len(data)) + data
+        self.sent += 1
+        self.sent_bytes += len(data)
+
+        writer = self.writers.get(recipient)
+        if writer is not None and not writer.is_closing():
+            writer.write(frame)
+            return True
+
+        if recipient in self.pending:
+            self.pending[recipient].append((frame, body))
+        else:
+            self.pending[recipient] = [(frame, body)]
+            asyncio.ensure_future(self.connect(recipient))
+        return True
+
+    async def connect(self, recipient):
+        host, port = self.peers[recipient]
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+        except OSError as err:
+            logging.debug(f"Data plane connection to {recipient} failed: {err}")
+            for _, body in self.pending.pop(recipient, []):
+                if self.fallback is not None:
+                    self.fallback.send(recipient, body)
+                else:
+                    self.dropped += 1
+            return
+
+        token = self.tokens.setdefault((self.jid, recipient), secrets.token_hex(16)) # made up only when shared
+        hello = f"{self.jid} {token}".encode()
+        writer.write(FRAME_HEADER.pack(len(hello)) + hello)
+        for frame, _ in self.pending.pop(recipient, []):
+            writer.write(frame)
+        self.writers[recipient] = writer
+
+    async def accept(self, reader, writer):
+        self.readers.add(writer)
+        try:
+            header = await reader.readexactly(FRAME_HEADER.size)
+            length = FRAME_HEADER.unpack(header)[0]
+            hello = (await reader.readexactly(length)).decode(errors="replace") if length <= MAX_HELLO else ""
+            sender, _, token = hello.partition(" ")
+            expected = self.tokens.get((sender, self.jid))
+            if expected is None or not hmac.compare_digest(token.encode(), expected.encode()):
+                logging.warning(f"Data plane connection from {writer.get_extra_info('peername')} claiming {sender} refused: bad token")
+                self.rejected += 1
+                return
+            while True:
+                header = await reader.readexactly(FRAME_HEADER.size)
+                body = await reader.readexactly(FRAME_HEADER.unpack(header)[0])
+                self.receive(sender, body.decode())
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except asyncio.CancelledError:
+            pass # loop shutting down; asyncio.streams logs an error if the handler ends cancelled
+        finally:
+            self.readers.discard(writer)
+            writer.close()
+
+
+class SocketNetwork(object):
+    """
+    Set of SocketTransports on one host that already know each other's
+    addresses, for running a whole topology over real TCP connections.
+    Has the attach/start/close/counters interface of LoopbackNetwork.
+
+    Arguments:
+        host --> Interface every endpoint listens on
+
+    Returns:
+        None
+    """
+    def __init__(self, host="127.0.0.1"):
+        self.host = host
+        self.endpoints = {}
+        self.peers = {} # shared by every endpoint
+        self.tokens = {} # too, every endpoint is trusted
+
+    def attach(self, jid):
+        if jid not in self.endpoints:
+            endpoint = SocketTransport(jid, self.host, peers=self.peers, tokens=self.tokens)
+            self.endpoints[jid] = endpoint
+            self.peers[jid] = endpoint.address
+        return self.endpoints[jid]
+
+    def start(self):
+        for endpoint in self.endpoints.values():
+            asyncio.ensure_future(endpoint.start())
+
+    def close(self):
+        for endpoint in self.endpoints.values():
+            endpoint.close()
+
+    @property
+    def sent(self):
+        return {jid: endpoint.sent for jid, endpoint in self.endpoints.items()}
+
+    @property
+    def sent_bytes(self):
+        return {jid: endpoint.sent_bytes for jid, endpoint in self.endpoints.items()}
+
+    @property
+    def dropped(self):
+        return sum(endpoint.dropped for endpoint in self.endpoints.values())
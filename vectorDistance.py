@@ -1,27 +1,19 @@
 """
 Instance example --> router = Router("A", "names-default.txt", "topo-default.txt")
+                     router = ArrayRouter("A", "names-default.txt", "topo-default.txt")
 """
 
 import json
 import string
+import zlib
+from collections.abc import Mapping
 
+import numpy as np
 
-"""
-Converts a json formatted string from a .txt file to a python dictionary.
-
-Arguments:
-    fname --> Name of the input file
+import settings
+import netConfig
 
-Returns:
-    Dictionary
-"""
-def json_to_dict(fname):
-    with open(fname, 'r') as f:
-        string = f.read()
-        json_string = string.replace("'", '"')
-        dict = json.loads(json_string)
-    
-    return dict
+INFINITY = settings.DV_INFINITY
 
 
 class Router(object):
@@ -42,20 +34,430 @@ class Router(object):
     def __init__(self, node, names, topo):
         self.names = names
         self.topo = topo
+        self.config = netConfig.load(names, topo) # shared with the other routers of the process
 
         self.node = node
 
         self.names = self.get_names()
         self.neighbors = self.get_neighbors()
-        self.to_process = []
 
         self.addr = self.names[self.node]
         self.vector = {
             self.node: (0, node),
         }
 
+        # per neighbor state: cost of the link, vector it advertised to us,
+        # what it acknowledged from us and our updates still waiting for an ack
+        self.link_cost = {}
+        self.neighbor_vectors = {}
+        self.acked = {}
+        self.in_flight = {}
+        self.update_seq = 0
+        # destinations whose route changed since the last round of updates
+        self.changed = set()
+        # neighbors declared down by the failure detection
+        self.down = set()
+        # neighbors whose vector was loaded from a snapshot and not confirmed by a full update yet
+        self.provisional = set()
+
         for nb in self.neighbors:
             self.vector[nb] = (1, nb)
+            self.link_cost[nb] = 1
+            self.neighbor_vectors[nb] = {nb: 0}
+            self.acked[nb] = {self.node: 0}
+            self.in_flight[nb] = []
+
+
+    """
+    Applies an update received from a neighbor and recomputes the routes it touches.
+
+    Arguments:
+        sender --> Name of the neighbor node that sent the update
+        vector --> Dict {node: distance} as advertised by sender. Distances of
+                   INFINITY withdraw the route.
+        full --> True if vector is the whole advertisement instead of a delta
+
+    Returns:
+        True if any route was added, changed or removed
+    """
+    def process(self, sender, vector, full=False):
+        if sender not in self.neighbor_vectors:
+            return False
+
+        received = self.neighbor_vectors[sender]
+        affected = set(vector)
+        if full:
+            self.provisional.discard(sender)
+            affected.update(received)
+            received.clear()
+            received[sender] = 0
+
+        for key, value in vector.items():
+            if value >= INFINITY:
+                received.pop(key, None)
+            else:
+                received[key] = value
+
+        changed = False
+        for key in affected:
+            changed = self.recompute(key) or changed
+
+        return changed
+
+
+    """
+    Applies a batch of neighbor updates.
+
+    Arguments:
+        updates --> List of (sender, vector, full) tuples, in arrival order
+
+    Returns:
+        True if any route was added, changed or removed
+    """
+    def process_batch(self, updates):
+        changed = False
+        for sender, vector, full in updates:
+            changed = self.process(sender, vector, full) or changed
+
+        return changed
+
+
+    """
+    Recomputes the best route to dest out of every neighbor vector.
+
+    Arguments:
+        dest --> Name of the destination node
+
+    Returns:
+        True if the route changed
+    """
+    def recompute(self, dest):
+        if dest == self.node:
+            return False
+
+        old = self.vector.get(dest)
+        best, hop = INFINITY, None
+        for nb, received in self.neighbor_vectors.items():
+            if dest in received:
+                cost = received[dest] + self.link_cost[nb]
+                # on ties keep the current next hop to avoid flapping
+                if cost < best or (cost == best and old is not None and nb == old[1]):
+                    best, hop = cost, nb
+
+        new = (best, hop) if best < INFINITY else None
+        if new == old:
+            return False
+
+        if new is None:
+            del self.vector[dest]
+        else:
+            self.vector[dest] = new
+        self.changed.add(dest)
+        return True
+
+
+    """
+    Distance to dest as advertised to a neighbor, with split horizon and poison reverse:
+    routes that go through that neighbor are advertised as INFINITY.
+
+    Arguments:
+        dest --> Name of the destination node
+        neighbor --> Name of the neighbor the advertisement is for
+
+    Returns:
+        Distance to advertise
+    """
+    def advertised(self, dest, neighbor):
+        route = self.vector.get(dest)
+        if route is None or route[1] == neighbor:
+            return INFINITY
+        return route[0]
+
+
+    """
+    Builds the next update for a neighbor.
+
+    A delta update carries the destinations that changed since the last round plus
+    every destination still waiting for an ack, compared against what the neighbor
+    has acknowledged. A full update carries the whole advertisement.
+
+    Arguments:
+        neighbor --> Name of the neighbor node
+        full --> Send the whole advertisement instead of a delta
+
+    Returns:
+        Tuple (seq, entries), or None if the neighbor is already up to date
+    """
+    def build_update(self, neighbor, full=False):
+        if full:
+            entries = {}
+            for dest in self.vector:
+                cost = self.advertised(dest, neighbor)
+                if cost < INFINITY:
+                    entries[dest] = cost
+        else:
+            unacked = set()
+            for _, sent, _ in self.in_flight[neighbor]:
+                unacked.update(sent)
+
+            acked = self.acked[neighbor]
+            entries = {}
+            for dest in self.changed | unacked:
+                cost = self.advertised(dest, neighbor)
+                if dest in unacked or cost != acked.get(dest, INFINITY):
+                    entries[dest] = cost
+
+            if not entries:
+                return None
+
+        self.update_seq += 1
+        pending = self.in_flight[neighbor]
+        pending.append((self.update_seq, entries, full))
+        # newer updates repeat every unacked destination, so old ones only matter for their ack
+        del pending[:-settings.DV_MAX_IN_FLIGHT]
+
+        return self.update_seq, entries
+
+
+    """
+    Builds the next update for every neighbor and starts a new round of changes.
+
+    Arguments:
+        full --> Send the whole advertisement instead of deltas
+
+    Returns:
+        Dict {neighbor: (seq, entries)} for the neighbors that need an update
+    """
+    def build_updates(self, full=False):
+        updates = {}
+        for nb in self.neighbors:
+            if nb in self.down:
+                continue
+            update = self.build_update(nb, full)
+            if update is not None:
+                updates[nb] = update
+
+        self.changed.clear()
+        return updates
+
+
+    """
+    Stops routing through a neighbor that stopped answering: the routes it
+    advertised are withdrawn and recomputed over the other neighbors.
+
+    Arguments:
+        neighbor --> Name of the neighbor node
+
+    Returns:
+        True if any route changed
+    """
+    def neighbor_down(self, neighbor):
+        if neighbor not in self.link_cost or neighbor in self.down:
+            return False
+
+        self.down.add(neighbor)
+        # it will need a full update when it comes back
+        self.in_flight[neighbor] = []
+        self.acked[neighbor] = {}
+        return self.drop_vector(neighbor)
+
+
+    """
+    Routes through a neighbor that answers again, starting from the direct link only.
+
+    Arguments:
+        neighbor --> Name of the neighbor node
+
+    Returns:
+        True if any route changed
+    """
+    def neighbor_up(self, neighbor):
+        if neighbor not in self.down:
+            return False
+
+        self.down.discard(neighbor)
+        return self.reset_vector(neighbor)
+
+
+    def drop_vector(self, neighbor):
+        received = self.neighbor_vectors[neighbor]
+        affected = list(received)
+        received.clear()
+
+        changed = False
+        for dest in affected:
+            changed = self.recompute(dest) or changed
+        return changed
+
+
+    def reset_vector(self, neighbor):
+        self.neighbor_vectors[neighbor] = {neighbor: 0}
+        return self.recompute(neighbor)
+
+
+    """
+    Vector a neighbor advertised to us.
+
+    Arguments:
+        neighbor --> Name of the neighbor node
+
+    Returns:
+        Dict {node: distance}
+    """
+    def received_vector(self, neighbor):
+        return dict(self.neighbor_vectors[neighbor])
+
+
+    """
+    Starts routing through a neighbor added to the topology file, from the direct link only.
+
+    Arguments:
+        neighbor --> Name of the neighbor node
+
+    Returns:
+        True if any route changed
+    """
+    def add_neighbor(self, neighbor):
+        if neighbor in self.link_cost or neighbor == self.node:
+            return False
+
+        self.neighbors.append(neighbor)
+        self.link_cost[neighbor] = 1
+        self.acked[neighbor] = {self.node: 0}
+        self.in_flight[neighbor] = []
+        return self.reset_vector(neighbor)
+
+
+    """
+    Withdraws the routes through a neighbor removed from the topology file and forgets it.
+
+    Arguments:
+        neighbor --> Name of the neighbor node
+
+    Returns:
+        True if any route changed
+    """
+    def remove_neighbor(self, neighbor):
+        if neighbor not in self.link_cost:
+            return False
+
+        changed = self.drop_vector(neighbor)
+        self.forget_neighbor(neighbor)
+        return changed
+
+
+    def forget_neighbor(self, neighbor):
+        self.neighbors.remove(neighbor)
+        for state in (self.link_cost, self.neighbor_vectors, self.acked, self.in_flight):
+            del state[neighbor]
+        self.down.discard(neighbor)
+        self.provisional.discard(neighbor)
+
+
+    """
+    Loads the neighbor vectors saved by a warmStart.Snapshot before the restart and
+    routes over them. They are provisional until each neighbor sends a full update.
+
+    Arguments:
+        vectors --> Dict {neighbor: {node: distance}}
+
+    Returns:
+        True if any route changed
+    """
+    def warm_start(self, vectors):
+        changed = False
+        for nb, vector in vectors.items():
+            if nb in self.link_cost and nb not in self.down:
+                changed = self.process(nb, vector, full=True) or changed
+                self.provisional.add(nb)
+        return changed
+
+
+    """
+    Falls back to the direct link for the neighbors that did not confirm their loaded vector.
+
+    Arguments:
+        None
+
+    Returns:
+        True if any route changed
+    """
+    def drop_provisional(self):
+        changed = False
+        for nb in self.provisional:
+            changed = self.reset_vector(nb) or changed
+        self.provisional = set()
+        return changed
+
+
+    """
+    Marks every update up to seq as received by a neighbor.
+
+    Arguments:
+        neighbor --> Name of the neighbor node
+        seq --> Sequence number acknowledged
+
+    Returns:
+        None
+    """
+    def acknowledge(self, neighbor, seq):
+        pending = self.in_flight.get(neighbor, [])
+        acked = self.acked.get(neighbor)
+
+        while pending and pending[0][0] <= seq:
+            _, entries, full = pending.pop(0)
+            if full:
+                acked.clear()
+            for dest, cost in entries.items():
+                if cost >= INFINITY:
+                    acked.pop(dest, None)
+                else:
+                    acked[dest] = cost
+
+
+    """
+    CRC32 of a {node: distance} view, used to check a neighbor is in sync.
+
+    Arguments:
+        view --> Dict {node: distance}
+
+    Returns:
+        Integer checksum
+    """
+    def checksum(self, view):
+        items = sorted((dest, cost) for dest, cost in view.items() if cost < INFINITY)
+        return zlib.crc32(json.dumps(items).encode())
+
+
+    """
+    Checksum of what a neighbor should hold from us, for the periodic sync.
+
+    Arguments:
+        neighbor --> Name of the neighbor node
+
+    Returns:
+        Integer checksum, or None while updates to it are still unacknowledged
+    """
+    def sync_checksum(self, neighbor):
+        if self.in_flight[neighbor]:
+            return None
+        return self.checksum(self.acked[neighbor])
+
+
+    """
+    Checks the vector we hold from a neighbor against the checksum it sent.
+
+    Arguments:
+        neighbor --> Name of the neighbor node
+        checksum --> Checksum received in its sync message
+
+    Returns:
+        True if both sides agree (or the sender is not a neighbor)
+    """
+    def in_sync(self, neighbor, checksum):
+        if neighbor not in self.neighbor_vectors:
+            return True
+        return self.checksum(self.neighbor_vectors[neighbor]) == checksum
 
 
     """
@@ -68,9 +470,7 @@ class Router(object):
         List with the name of the neighbor nodes
     """
     def get_neighbors(self):
-        topo = json_to_dict(self.topo)
-
-        return topo['config'][self.node]
+        return list(self.config.neighbors(self.node))
 
 
     """
@@ -83,5 +483,245 @@ class Router(object):
         List with the address of each node
     """
     def get_names(self):
-        names = json_to_dict(self.names)
-        return names['config']
+        return self.config.names
+
+
+class VectorView(Mapping):
+    """
+    Read only {node: (distance, next hop)} view over the arrays of an ArrayRouter,
+    so it can be used wherever Router.vector is.
+
+    Arguments:
+        router --> ArrayRouter whose vector is exposed
+
+    Returns:
+        None
+    """
+    def __init__(self, router):
+        self.router = router
+
+    def __getitem__(self, node):
+        router = self.router
+        i = router.ids[node]
+        if router.best[i] >= INFINITY:
+            raise KeyError(node)
+        return (int(router.best[i]), router.hop_names[router.hop[i]])
+
+    def __iter__(self):
+        router = self.router
+        reachable = np.flatnonzero(router.best[:len(router.id_names)] < INFINITY)
+        return (router.id_names[i] for i in reachable)
+
+    def __len__(self):
+        return int(np.count_nonzero(self.router.best[:len(self.router.id_names)] < INFINITY))
+
+
+class ArrayRouter(Router):
+    """
+    Distance vector router backed by NumPy arrays.
+
+    Nodes are interned to integer ids. The vectors advertised by the K neighbors are
+    rows of a K x N matrix, so a whole batch of updates is relaxed with one
+    vectorized min-plus step over the columns it touched:
+        best[d] = min_k(link[k] + costs[k, d])
+
+    `vector` is a VectorView, so next hops and the dict style access keep working.
+
+    Arguments:
+        node --> Name (letter) of the node assigned
+        names --> File with the names in json format
+        topo --> File with the topology in json format
+
+    Returns:
+        None
+    """
+    def __init__(self, node, names, topo):
+        Router.__init__(self, node, names, topo)
+
+        self.ids = {}
+        self.id_names = []
+        self.capacity = max(16, len(self.names))
+
+        # hop index k < K is a neighbor, K is the node itself, -1 is "no route"
+        self.neighbor_index = {nb: k for k, nb in enumerate(self.neighbors)}
+        self.hop_names = list(self.neighbors) + [self.node]
+
+        self.costs = np.full((len(self.neighbors), self.capacity), INFINITY, dtype=np.int64)
+        self.links = np.array([self.link_cost[nb] for nb in self.neighbors], dtype=np.int64)
+        self.best = np.full(self.capacity, INFINITY, dtype=np.int64)
+        self.hop = np.full(self.capacity, -1, dtype=np.int64)
+
+        for name in self.config.node_names: # same ids as the shared config
+            self.intern(name)
+        self.self_id = self.intern(self.node)
+        self.best[self.self_id] = 0
+        self.hop[self.self_id] = len(self.neighbors)
+
+        for nb, k in self.neighbor_index.items():
+            self.costs[k, self.intern(nb)] = 0
+        self.relax(np.arange(len(self.id_names)))
+
+        # the arrays replace the dict state built by Router.__init__
+        del self.neighbor_vectors
+        self.vector = VectorView(self)
+
+
+    """
+    Returns the integer id of a node, assigning one (and growing the arrays) if new.
+
+    Arguments:
+        name --> Name of the node
+
+    Returns:
+        Integer id
+    """
+    def intern(self, name):
+        i = self.ids.get(name)
+        if i is None:
+            i = len(self.id_names)
+            self.ids[name] = i
+            self.id_names.append(name)
+
+            if i >= self.capacity:
+                grow = self.capacity
+                self.capacity += grow
+                self.costs = np.pad(self.costs, ((0, 0), (0, grow)), constant_values=INFINITY)
+                self.best = np.pad(self.best, (0, grow), constant_values=INFINITY)
+                self.hop = np.pad(self.hop, (0, grow), constant_values=-1)
+
+        return i
+
+
+    def process(self, sender, vector, full=False):
+        return self.process_batch([(sender, vector, full)])
+
+
+    def process_batch(self, updates):
+        affected = []
+        for sender, vector, full in updates:
+            k = self.neighbor_index.get(sender)
+            if k is None:
+                continue
+
+            ids = np.fromiter((self.intern(dest) for dest in vector), dtype=np.int64, count=len(vector))
+            values = np.fromiter(vector.values(), dtype=np.int64, count=len(vector))
+
+            row = self.costs[k]
+            if full:
+                self.provisional.discard(sender)
+                affected.append(np.flatnonzero(row < INFINITY))
+                row[:] = INFINITY
+                row[self.ids[sender]] = 0
+
+            row[ids] = np.minimum(values, INFINITY)
+            affected.append(ids)
+
+        if not affected:
+            return False
+        return self.relax(np.unique(np.concatenate(affected)))
+
+
+    def recompute(self, dest):
+        return self.relax(np.array([self.intern(dest)]))
+
+
+    def drop_vector(self, neighbor):
+        row = self.costs[self.neighbor_index[neighbor]]
+        affected = np.flatnonzero(row < INFINITY)
+        row[:] = INFINITY
+        return self.relax(affected)
+
+
+    def reset_vector(self, neighbor):
+        row = self.costs[self.neighbor_index[neighbor]]
+        row[:] = INFINITY
+        row[self.ids[neighbor]] = 0
+        return self.relax(np.array([self.ids[neighbor]]))
+
+
+    def add_neighbor(self, neighbor):
+        if neighbor in self.link_cost or neighbor == self.node:
+            return False
+
+        self.intern(neighbor)
+        k = len(self.neighbors)
+        # the new neighbor takes hop index k, the node itself moves to k + 1
+        self.hop[self.hop == k] = k + 1
+        self.costs = np.vstack([self.costs, np.full((1, self.capacity), INFINITY, dtype=np.int64)])
+        self.links = np.append(self.links, 1)
+        self.neighbor_index[neighbor] = k
+        self.hop_names.insert(k, neighbor)
+        return Router.add_neighbor(self, neighbor)
+
+
+    def forget_neighbor(self, neighbor):
+        k = self.neighbor_index[neighbor]
+        # no route goes through k any more after drop_vector
+        self.costs = np.delete(self.costs, k, axis=0)
+        self.links = np.delete(self.links, k)
+        self.hop[self.hop > k] -= 1
+
+        self.neighbors.remove(neighbor)
+        for state in (self.link_cost, self.acked, self.in_flight):
+            del state[neighbor]
+        self.down.discard(neighbor)
+        self.provisional.discard(neighbor)
+        self.neighbor_index = {nb: i for i, nb in enumerate(self.neighbors)}
+        del self.hop_names[k]
+
+
+    """
+    Vectorized min-plus relaxation of a set of destinations.
+
+    Arguments:
+        columns --> Array of node ids to recompute
+
+    Returns:
+        True if the distance or next hop of any of them changed
+    """
+    def relax(self, columns):
+        columns = columns[columns != self.self_id]
+        if len(columns) == 0 or len(self.neighbors) == 0:
+            return False
+
+        total = self.costs[:, columns] + self.links[:, None]
+        hop = total.argmin(axis=0)
+        span = np.arange(len(columns))
+        best = total[hop, span]
+
+        # on ties keep the current next hop to avoid flapping
+        old_hop = self.hop[columns]
+        has_hop = (old_hop >= 0) & (old_hop < len(self.neighbors))
+        old_cost = total[np.where(has_hop, old_hop, 0), span]
+        hop = np.where(has_hop & (old_cost == best), old_hop, hop)
+
+        unreachable = best >= INFINITY
+        best[unreachable] = INFINITY
+        hop[unreachable] = -1
+
+        changed = (best != self.best[columns]) | (hop != self.hop[columns])
+        if not changed.any():
+            return False
+
+        self.best[columns] = best
+        self.hop[columns] = hop
+        self.changed.update(self.id_names[i] for i in columns[changed])
+        return True
+
+
+    def advertised(self, dest, neighbor):
+        i = self.ids.get(dest)
+        if i is None or self.best[i] >= INFINITY or self.hop[i] == self.neighbor_index.get(neighbor):
+            return INFINITY
+        return int(self.best[i])
+
+
+    def received_vector(self, neighbor):
+        row = self.costs[self.neighbor_index[neighbor], :len(self.id_names)]
+        return {self.id_names[i]: int(row[i]) for i in np.flatnonzero(row < INFINITY)}
+
+
+    def in_sync(self, neighbor, checksum):
+        if neighbor not in self.neighbor_index:
+            return True
+        return self.checksum(self.received_vector(neighbor)) == checksum
@@ -0,0 +1,240 @@
+"""
+Warm restart snapshots of the routing state.
+
+A router periodically saves its link state database and forwarding table
+(link state) or the vectors its neighbors advertised (distance vector). A
+restarted router loads them before it hears from anyone, so it routes right
+away instead of after several refresh rounds. The loaded state is
+provisional: the neighbors are asked for theirs, and whatever they do not
+confirm within settings.WARM_START_CONFIRM seconds is dropped.
+
+The file is a fixed header followed by varint encoded sections, with nodes as
+their position in the names file (like wire.py), and is read through mmap.
+It is written to a temporary file, fsynced and renamed over the previous one,
+so a crash leaves the old snapshot or the new one, never half of each; the
+header CRC catches anything else, and a bad file is just not loaded.
+
+Instance example --> snapshot = Snapshot("n1.snap", router.users)
+                     snapshot.save_link_state(router) # every settings.SNAPSHOT_INTERVAL
+                     snapshot.load_link_state(router) # at startup, True if it was used
+"""
+
+import os
+import mmap
+import zlib
+import struct
+import logging
+from time import time
+
+import settings
+from wire import WireCodec, DOUBLE, WEIGHT_SCALE, write_varint, read_varint, read_varints
+
+MAGIC = b"RLSN"
+VERSION = 2 # 2: LSPs keep their remaining lifetime
+LINK_STATE = 1
+DISTANCE_VECTOR = 2
+
+# magic, version, kind, crc of the names, time written, body length, crc of the body
+HEADER = struct.Struct("!4sBBIdII")
+
+
+class Snapshot(object):
+    """
+    Arguments:
+        path --> File the snapshots of one router are kept in
+        names --> Names dict {node: jid}; snapshots of another names file are not loaded
+        max_age --> Seconds after which a snapshot is too old to be loaded
+
+    Returns:
+        None
+    """
+    def __init__(self, path, names, max_age=settings.SNAPSHOT_MAX_AGE):
+        self.path = path
+        self.codec = WireCodec(names, binary=False) # only for its node <-> id tables
+        self.names_crc = zlib.crc32("\n".join(self.codec.jids).encode())
+        self.max_age = max_age
+        self.body_crc = None # of the last body written or loaded, to skip unchanged saves
+        self.written = 0.0 # time the file was last written
+        self.stats = {'written': 0, 'unchanged': 0, 'loaded': 0, 'rejected': 0}
+
+    def add_nodes(self, names):
+        """ Nodes appended to the names file at runtime; later snapshots are of the new file. """
+        self.codec.add_nodes(names)
+        self.names_crc = zlib.crc32("\n".join(self.codec.jids).encode())
+
+    def save_link_state(self, router):
+        """ Saves the LSDB and the forwarding table of a linkRouter.Router. Returns True if written. """
+        ids = self.codec.ids
+        out = bytearray()
+        now = time()
+        lsps = [router.outgoing_lsp(origin, now) for origin, lsp in router.packages.items()
+                if origin in ids and not lsp.get('purge')]
+        write_varint(out, len(lsps))
+        for lsp in lsps:
+            weights = [(ids[jid], weight) for jid, weight in lsp['weights'].items() if jid in ids]
+            write_varint(out, ids[lsp['origin']])
+            write_varint(out, lsp['seq'])
+            out += DOUBLE.pack(lsp['age'])
+            write_varint(out, round(lsp['lifetime']))
+            write_varint(out, len(weights))
+            for node, weight in weights:
+                write_varint(out, node)
+                write_varint(out, round(weight * WEIGHT_SCALE))
+
+        # routes through nodes we have no id for (not in the names file) are left out
+        routes = [(dest, hop, path) for dest, (hop, path) in router.forwarding_table.items()
+                  if dest in ids and hop in ids and all(node in ids for node in path)]
+        write_varint(out, len(routes))
+        for dest, hop, path in routes:
+            write_varint(out, ids[dest])
+            write_varint(out, ids[hop])
+            write_varint(out, len(path))
+            for node in path:
+                write_varint(out, ids[node])
+
+        return self.write(LINK_STATE, out)
+
+    def load_link_state(self, router):
+        """ Loads a link state snapshot into router as provisional state. Returns True if there was one. """
+        def decode(data):
+            jids = self.codec.jids
+            count, pos = read_varint(data, 0)
+            lsps = []
+            for _ in range(count):
+                (origin, seq_), pos = read_varints(data, pos, 2)
+                age = DOUBLE.unpack_from(data, pos)[0]
+                (lifetime, links), pos = read_varints(data, pos + DOUBLE.size, 2)
+                values, pos = read_varints(data, pos, 2 * links)
+                lsps.append({'origin': jids[origin], 'seq': seq_, 'age': age, 'lifetime': lifetime,
+                             'weights': {jids[node]: weight / WEIGHT_SCALE for node, weight in zip(values[0::2], values[1::2])}})
+
+            count, pos = read_varint(data, pos)
+            forwarding = {}
+            for _ in range(count):
+                (dest, hop, length), pos = read_varints(data, pos, 3)
+                path, pos = read_varints(data, pos, length)
+                forwarding[jids[dest]] = (jids[hop], [jids[node] for node in path])
+            return lsps, forwarding
+
+        state = self.read(LINK_STATE, decode)
+        if state is None:
+            return False
+        lsps, forwarding = state
+        down = time() - self.written # the lifetimes kept running while we were down
+        for lsp in lsps:
+            lsp['lifetime'] -= down
+        router.warm_start(lsps, forwarding)
+        return True
+
+    def save_vector(self, router):
+        """ Saves the vectors the live neighbors of a vectorDistance router advertised. Returns True if written. """
+        ids = self.codec.ids
+        out = bytearray()
+        neighbors = [nb for nb in router.neighbors if nb not in router.down and nb in ids]
+        write_varint(out, len(neighbors))
+        for nb in neighbors:
+            vector = [(ids[dest], cost) for dest, cost in router.received_vector(nb).items() if dest in ids]
+            write_varint(out, ids[nb])
+            write_varint(out, len(vector))
+            for dest, cost in vector:
+                write_varint(out, dest)
+                write_varint(out, cost)
+
+        return self.write(DISTANCE_VECTOR, out)
+
+    def load_vector(self, router):
+        """ Loads a distance vector snapshot into router as provisional state. Returns True if there was one. """
+        def decode(data):
+            names = self.codec.node_names
+            count, pos = read_varint(data, 0)
+            vectors = {}
+            for _ in range(count):
+                (nb, length), pos = read_varints(data, pos, 2)
+                values, pos = read_varints(data, pos, 2 * length)
+                vectors[names[nb]] = {names[dest]: cost for dest, cost in zip(values[0::2], values[1::2])}
+            return vectors
+
+        vectors = self.read(DISTANCE_VECTOR, decode)
+        if vectors is None:
+            return False
+        router.warm_start(vectors)
+        return True
+
+    def write(self, kind, body):
+        """
+        Atomically replaces the snapshot file, unless body did not change since the
+        last one and that one is not about to be too old to be loaded.
+        """
+        body_crc = zlib.crc32(body)
+        now = time()
+        if body_crc == self.body_crc and now - self.written < self.max_age / 2:
+            self.stats['unchanged'] += 1
+            return False
+
+        header = HEADER.pack(MAGIC, VERSION, kind, self.names_crc, now, len(body), body_crc)
+        temp = self.path + ".tmp"
+        try:
+            with open(temp, "wb") as file:
+                file.write(header)
+                file.write(body)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temp, self.path)
+        except OSError as err:
+            logging.error(f"Could not write snapshot {self.path}: {err}")
+            return False
+
+        try: # the rename itself survives a crash once the directory is synced
+            directory = os.open(os.path.dirname(os.path.abspath(self.path)), os.O_RDONLY)
+            try:
+                os.fsync(directory)
+            finally:
+                os.close(directory)
+        except OSError:
+            pass # not supported on every platform
+
+        self.body_crc = body_crc
+        self.written = now
+        self.stats['written'] += 1
+        return True
+
+    def read(self, kind, decode):
+        """ decode(body) of the snapshot file, None if there is none or it can not be used. """
+        try:
+            file = open(self.path, "rb")
+        except OSError:
+            return None
+
+        with file:
+            if os.fstat(file.fileno()).st_size < HEADER.size:
+                return self.reject("truncated")
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                magic, version, kind_, names_crc, written, length, body_crc = HEADER.unpack_from(data, 0)
+                if magic != MAGIC or version != VERSION or kind_ != kind:
+                    return self.reject("not a snapshot of this kind")
+                if names_crc != self.names_crc:
+                    return self.reject("written with another names file")
+                if time() - written > self.max_age:
+                    return self.reject("too old")
+                if len(data) != HEADER.size + length:
+                    return self.reject("truncated")
+
+                with memoryview(data) as view:
+                    body = view[HEADER.size:]
+                    try:
+                        if zlib.crc32(body) != body_crc:
+                            return self.reject("corrupt")
+                        state = decode(body)
+                    except (IndexError, struct.error):
+                        return self.reject("corrupt")
+                    finally:
+                        body.release()
+
+        self.body_crc, self.written = body_crc, written
+        self.stats['loaded'] += 1
+        return state
+
+    def reject(self, reason):
+        logging.warning(f"Snapshot {self.path} not loaded: {reason}")
+        self.stats['rejected'] += 1
+        return None
@@ -0,0 +1,246 @@
+"""
+Compact binary encoding of the control messages (LSPs, echo/ack probes and
+distance vector updates), with JSON as the fallback.
+
+Nodes are sent as their position in the names file, integers as LEB128
+varints, link state weights as varint microseconds, LSP lifetimes as varint
+seconds and timestamps as 8 byte doubles. The bytes are base64 encoded behind a '~' so they fit in an XMPP
+body and are never mistaken for JSON.
+
+Binary is negotiated per neighbor: while a neighbor has not shown it can
+decode it, control messages to it stay JSON and carry a "wire" capability
+field. Old nodes ignore that field, so they keep getting JSON.
+
+Instance example --> codec = WireCodec(names)
+                     body = codec.dumps({'type': 'echo', 'timestamp': time()}, neighbor_jid)
+                     payload = codec.loads(body, neighbor_jid)
+"""
+
+import json
+import base64
+import struct
+
+WIRE_VERSION = 2 # 2: LSPs carry their remaining lifetime
+PREFIX = "~"
+
+LSP = 1
+ECHO = 2
+ACK = 3
+UPDATE = 4
+UPDATE_ACK = 5
+SYNC = 6
+RESYNC = 7
+
+KINDS = {
+    'lsp': LSP,
+    'echo': ECHO,
+    'ack': ACK,
+    'update': UPDATE,
+    'update-ack': UPDATE_ACK,
+    'sync': SYNC,
+    'resync': RESYNC,
+}
+
+DOUBLE = struct.Struct("!d")
+WEIGHT_SCALE = 1000000 # link state weights travel in microseconds
+
+
+def write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varints(data, pos, count):
+    """ count varints starting at pos, as a list, plus the position after them. """
+    values = []
+    append = values.append
+    for _ in range(count):
+        byte = data[pos]
+        pos += 1
+        if byte < 0x80: # most ids and costs fit in one byte
+            append(byte)
+            continue
+        value = byte & 0x7f
+        shift = 7
+        while True:
+            byte = data[pos]
+            pos += 1
+            value |= (byte & 0x7f) << shift
+            if byte < 0x80:
+                break
+            shift += 7
+        append(value)
+    return values, pos
+
+
+def read_varint(data, pos):
+    value = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+class WireCodec(object):
+    """
+    Encodes and decodes the control messages of one node.
+
+    Arguments:
+        names --> Names dict {node: jid}; node ids are the positions in it, so
+                  every node must use the same names file
+        binary --> False to always send JSON (and not advertise binary)
+
+    Returns:
+        None
+    """
+    def __init__(self, names, binary=True):
+        self.node_names = list(names)
+        self.jids = [names[node] for node in self.node_names]
+        self.ids = {}
+        for i, node in enumerate(self.node_names):
+            self.ids[node] = i
+            self.ids[names[node]] = i
+
+        self.binary = binary
+        self.peers = set() # jids known to decode binary
+
+    def add_nodes(self, names):
+        """ Gives ids to the nodes appended to the names file since; existing ids never change. """
+        for node, jid in names.items():
+            if node not in self.ids:
+                self.ids[node] = self.ids[jid] = len(self.node_names)
+                self.node_names.append(node)
+                self.jids.append(jid)
+
+    def dumps(self, payload, recipient):
+        """ Body for payload sent to recipient: binary if negotiated and encodable, JSON otherwise. """
+        kind = KINDS.get(payload.get('type'))
+        if kind is None or not self.binary:
+            return json.dumps(payload)
+
+        if recipient in self.peers:
+            data = self.encode(kind, payload)
+            if data is not None:
+                return PREFIX + base64.b64encode(data).decode()
+            return json.dumps(payload)
+
+        return json.dumps(dict(payload, wire=WIRE_VERSION))
+
+    def loads(self, body, sender=None):
+        """ Payload dict out of a JSON or binary body. Also learns whether sender speaks binary. """
+        if body.startswith(PREFIX):
+            if sender is not None:
+                self.peers.add(sender)
+            return self.decode(base64.b64decode(body[1:]))
+
+        payload = json.loads(body)
+        if self.binary and sender is not None and payload.get('wire', 0) >= WIRE_VERSION:
+            self.peers.add(sender)
+        return payload
+
+    def is_binary(self, body):
+        return body.startswith(PREFIX)
+
+    def encode(self, kind, payload):
+        """ Bytes for payload, None if it has something the binary format can not carry. """
+        out = bytearray((kind,))
+        try:
+            if kind == LSP:
+                lsp = payload['lsp']
+                if len(lsp) != 5:
+                    return None # e.g. a purge, it goes as JSON
+                write_varint(out, self.ids[lsp['origin']])
+                write_varint(out, lsp['seq'])
+                out += DOUBLE.pack(lsp['age'])
+                write_varint(out, round(lsp['lifetime']))
+                write_varint(out, len(lsp['weights']))
+                for jid, weight in lsp['weights'].items():
+                    write_varint(out, self.ids[jid])
+                    write_varint(out, round(weight * WEIGHT_SCALE))
+
+            elif kind == ECHO:
+                out += DOUBLE.pack(payload['timestamp'])
+
+            elif kind == ACK:
+                out += DOUBLE.pack(payload['start_timestamp'])
+
+            elif kind == UPDATE:
+                write_varint(out, self.ids[payload['sender']])
+                write_varint(out, payload['seq'])
+                out.append(1 if payload['full'] else 0)
+                write_varint(out, len(payload['vector']))
+                for node, cost in payload['vector'].items():
+                    write_varint(out, self.ids[node])
+                    write_varint(out, cost)
+
+            elif kind == UPDATE_ACK:
+                write_varint(out, self.ids[payload['sender']])
+                write_varint(out, payload['seq'])
+
+            elif kind == SYNC:
+                write_varint(out, self.ids[payload['sender']])
+                write_varint(out, payload['checksum'])
+
+            elif kind == RESYNC:
+                write_varint(out, self.ids[payload['sender']])
+
+        except (KeyError, TypeError, ValueError, struct.error):
+            return None # unknown node, negative or non integer value...
+
+        return bytes(out)
+
+    def decode(self, data):
+        kind = data[0]
+        pos = 1
+
+        if kind == LSP:
+            origin, pos = read_varint(data, pos)
+            seq, pos = read_varint(data, pos)
+            age = DOUBLE.unpack_from(data, pos)[0]
+            lifetime, pos = read_varint(data, pos + DOUBLE.size)
+            count, pos = read_varint(data, pos)
+            values, pos = read_varints(data, pos, 2 * count)
+            jids = self.jids
+            weights = {jids[node]: weight / WEIGHT_SCALE for node, weight in zip(values[0::2], values[1::2])}
+            lsp = {'origin': self.jids[origin], 'seq': seq, 'age': age, 'lifetime': lifetime, 'weights': weights}
+            return {'type': 'lsp', 'lsp': lsp}
+
+        if kind == ECHO:
+            return {'type': 'echo', 'timestamp': DOUBLE.unpack_from(data, pos)[0]}
+
+        if kind == ACK:
+            return {'type': 'ack', 'start_timestamp': DOUBLE.unpack_from(data, pos)[0]}
+
+        sender, pos = read_varint(data, pos)
+        payload = {'sender': self.node_names[sender]}
+
+        if kind == UPDATE:
+            payload['type'] = 'update'
+            payload['seq'], pos = read_varint(data, pos)
+            payload['full'] = data[pos] == 1
+            count, pos = read_varint(data, pos + 1)
+            values, pos = read_varints(data, pos, 2 * count)
+            node_names = self.node_names
+            payload['vector'] = {node_names[node]: cost for node, cost in zip(values[0::2], values[1::2])}
+
+        elif kind == UPDATE_ACK:
+            payload['type'] = 'update-ack'
+            payload['seq'], pos = read_varint(data, pos)
+
+        elif kind == SYNC:
+            payload['type'] = 'sync'
+            payload['checksum'], pos = read_varint(data, pos)
+
+        elif kind == RESYNC:
+            payload['type'] = 'resync'
+
+        else:
+            raise ValueError(f"Unknown wire message kind {kind}")
+
+        return payload